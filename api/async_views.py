@@ -0,0 +1,123 @@
+"""
+Vistas asíncronas de sólo lectura, pensadas para servirse con un servidor ASGI.
+
+DRF no soporta vistas asíncronas, así que estas son vistas de Django que usan el ORM
+asíncrono. Las respuestas se generan con los mismos serializers y el mismo renderer JSON
+que sus equivalentes síncronas en api/views.py, por lo que el contenido es idéntico.
+Mientras una consulta lenta espera a la base de datos, el proceso sigue atendiendo otras
+peticiones en lugar de bloquear un worker completo.
+"""
+from math import ceil
+from django.http import HttpResponse
+from django.views.decorators.http import require_safe
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from business.cache import aget_cached_summary, acache_summary
+from business.models import Customer, Order, Remission, ArchivedRemission, DailySalesRollup
+from core.routers import read_alias
+from .renderers import FastJSONRenderer
+from .rows import ValuesSerializer
+from .serializers import CustomerSerializer, OrderSerializer
+from .views import RemissionViewSet, etag_matches, parse_date_range
+
+
+def json_response(data, status=200):
+    return HttpResponse(FastJSONRenderer().render(data), status=status, content_type='application/json')
+
+
+async def paginated_response(request, queryset, serializer_class):
+    """
+    Paginación por número de página con el mismo formato que PageNumberPagination de DRF.
+    Las filas se arman desde .values() y aceptan ?fields= igual que los listados síncronos.
+    """
+    fields = request.GET.get('fields')
+    try:
+        rows = ValuesSerializer(serializer_class, fields.split(',') if fields else None)
+    except ValidationError as e:
+        return json_response(e.detail, status=400)
+    queryset = rows.values(queryset)
+
+    page_size = api_settings.PAGE_SIZE
+    try:
+        page = int(request.GET.get('page', 1))
+    except ValueError:
+        page = 0
+
+    count = await queryset.acount()
+    if page < 1 or page > max(1, ceil(count / page_size)):
+        return json_response({'detail': 'Invalid page.'}, status=404)
+
+    objects = [obj async for obj in queryset[(page - 1) * page_size:page * page_size]]
+
+    url = request.build_absolute_uri()
+    next_url = replace_query_param(url, 'page', page + 1) if page * page_size < count else None
+    if page == 1:
+        previous_url = None
+    elif page == 2:
+        previous_url = remove_query_param(url, 'page')
+    else:
+        previous_url = replace_query_param(url, 'page', page - 1)
+
+    return json_response({
+        'count': count,
+        'next': next_url,
+        'previous': previous_url,
+        'results': rows.many(objects)
+    })
+
+
+@require_safe
+async def customer_list(request):
+    return await paginated_response(request, Customer.objects.order_by('pk'), CustomerSerializer)
+
+
+@require_safe
+async def order_list(request):
+    return await paginated_response(request, Order.objects.order_by('pk'), OrderSerializer)
+
+
+@require_safe
+async def remission_list(request):
+    """
+    Mismos filtros, orden e ?include=totals que RemissionViewSet, reutilizando sus filtros.
+    """
+    view = RemissionViewSet(request=Request(request), action='list', format_kwarg=None, args=(), kwargs={})
+    try:
+        queryset = view.filter_queryset(view.get_queryset())
+    except ValidationError as e:
+        return json_response(e.detail, status=400)
+    return await paginated_response(request, queryset, view.get_serializer_class())
+
+
+@require_safe
+async def remission_summary(request, pk):
+    """
+    Resumen de la remisión (activa o archivada) desde la caché o sus totales acumulados, con ETag.
+    La caché se llena desde la base principal, igual que en RemissionViewSet.summary.
+    """
+    key, entry = await aget_cached_summary(pk)
+    if entry is None:
+        remission = (
+            await Remission.objects.filter(pk=pk).afirst()
+            or await ArchivedRemission.objects.filter(pk=pk).afirst()
+        )
+        if remission is None:
+            return json_response({'detail': 'No Remission matches the given query.'}, status=404)
+        entry = await acache_summary(key, remission.summary())
+
+    if etag_matches(request, entry['etag']):
+        response = HttpResponse(status=304)
+    else:
+        response = json_response(entry['data'])
+    response['ETag'] = entry['etag']
+    return response
+
+
+@require_safe
+async def daily_sales_report(request):
+    date_from, date_to, error = parse_date_range(request)
+    if error:
+        return json_response({'error': error}, status=400)
+    return json_response(await DailySalesRollup.objects.using(read_alias()).areport(date_from, date_to))
@@ -0,0 +1,138 @@
+import csv
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework.renderers import BaseRenderer
+from business.models import (
+    Sale, CreditAssignment, ArchivedSale, ArchivedCreditAssignment, DailySalesRollup, day_range
+)
+from core.routers import read_alias
+
+# Filas leídas de la base de datos por cada viaje del cursor.
+EXPORT_CHUNK_SIZE = 2000
+
+
+class StreamingRenderer(BaseRenderer):
+    """
+    Renderer que sólo participa en la negociación de contenido (?format= o Accept).
+    Las vistas de exportación responden con StreamingHttpResponse, que DRF no vuelve a renderizar.
+    """
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data).encode()
+
+
+class CSVRenderer(StreamingRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+
+class NDJSONRenderer(StreamingRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+
+def export_value(value):
+    """
+    Formatea un valor igual que los serializers: decimales como texto y fechas en ISO 8601.
+    """
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, datetime):
+        value = timezone.localtime(value).isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+class Echo:
+    """
+    Objeto tipo archivo que regresa lo escrito en lugar de guardarlo (para csv.writer).
+    """
+    def write(self, value):
+        return value
+
+
+def filter_rows(queryset, date_from=None, date_to=None, remission=None):
+    """
+    Filtra ventas o créditos por fecha de creación (inclusive) y remisión.
+    """
+    if date_from:
+        queryset = queryset.filter(created_at__gte=day_range(date_from, date_from)[0])
+    if date_to:
+        queryset = queryset.filter(created_at__lt=day_range(date_to, date_to)[1])
+    if remission:
+        queryset = queryset.filter(remission_id=remission)
+    return queryset
+
+
+def with_archived(model, archived_model, columns, date_from=None, date_to=None, remission=None):
+    """
+    Columnas de las filas activas y archivadas (ver el comando archive_remissions) de ventas
+    o créditos, con los mismos filtros y en orden de id.
+    """
+    active, archived = (
+        filter_rows(rows.objects.using(read_alias()).order_by(), date_from, date_to, remission).values_list(*columns)
+        for rows in (model, archived_model)
+    )
+    return active.union(archived, all=True).order_by('id')
+
+
+def export_rows(dataset, date_from=None, date_to=None, remission=None):
+    """
+    Columnas y generador de filas de una exportación ('sales', 'credits' o 'daily-sales').
+    El reporte diario requiere date_from y date_to y no se filtra por remisión.
+    """
+    if dataset == 'sales':
+        columns = ['id', 'remission', 'subtotal', 'tax', 'total', 'created_at']
+        rows = with_archived(
+            Sale, ArchivedSale, ['id', 'remission_id', 'subtotal', 'tax', 'total', 'created_at'],
+            date_from, date_to, remission
+        ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    elif dataset == 'credits':
+        credits = with_archived(
+            CreditAssignment, ArchivedCreditAssignment, ['id', 'remission_id', 'amount', 'reason', 'created_at'],
+            date_from, date_to, remission
+        )
+        columns = ['id', 'remission', 'amount', 'reason', 'created_at']
+        rows = credits.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    else:
+        columns = ['date', 'total_sales', 'total_tax', 'sales_count']
+        rows = (
+            [row[column] for column in columns]
+            for row in DailySalesRollup.objects.using(read_alias()).iter_report(
+                date_from, date_to, chunk_size=EXPORT_CHUNK_SIZE
+            )
+        )
+    return columns, rows
+
+
+def stream_csv(columns, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow(['' if value is None else export_value(value) for value in row])
+
+
+def stream_ndjson(columns, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(columns, map(export_value, row))), ensure_ascii=False) + '\n'
+
+
+def stream_export(export_format, columns, rows):
+    return stream_csv(columns, rows) if export_format == 'csv' else stream_ndjson(columns, rows)
+
+
+def streaming_export(export_format, filename, columns, rows):
+    """
+    Respuesta en streaming: las filas se formatean conforme el cliente las consume,
+    así que la memoria no crece con el número de filas.
+    """
+    content_type = 'text/csv; charset=utf-8' if export_format == 'csv' else 'application/x-ndjson'
+    response = StreamingHttpResponse(stream_export(export_format, columns, rows), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{export_format}"'
+    return response
@@ -0,0 +1,50 @@
+from decimal import Decimal, InvalidOperation
+from rest_framework import serializers
+from rest_framework.filters import BaseFilterBackend
+from business.models import Remission
+
+
+class RemissionFilter(BaseFilterBackend):
+    """
+    Filtros del listado de remisiones: ?status=open|closed, ?min_balance= y ?max_balance=.
+    El saldo sale de los totales acumulados (ver RemissionQuerySet.with_balance).
+    """
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+
+        status = params.get('status')
+        if status:
+            if status not in dict(Remission.STATUS_CHOICES):
+                raise serializers.ValidationError({'status': f'Estado inválido: {status}'})
+            queryset = queryset.filter(status=status)
+
+        return filter_amounts(queryset, params, (('min_balance', 'balance__gte'), ('max_balance', 'balance__lte')))
+
+
+class SaleFilter(BaseFilterBackend):
+    """
+    Filtros del listado de ventas por monto total: ?min_total= y ?max_total=.
+    Usan el índice sale_total_idx, igual que ?ordering=-total (ventas más grandes).
+    """
+    def filter_queryset(self, request, queryset, view):
+        return filter_amounts(
+            queryset, request.query_params, (('min_total', 'total__gte'), ('max_total', 'total__lte'))
+        )
+
+
+def filter_amounts(queryset, params, lookups):
+    """
+    Aplica los filtros de monto presentes en la petición (pares parámetro, lookup).
+    """
+    for param, lookup in lookups:
+        value = params.get(param)
+        if not value:
+            continue
+        try:
+            amount = Decimal(value)
+        except InvalidOperation:
+            amount = None
+        if amount is None or not amount.is_finite():
+            raise serializers.ValidationError({param: 'Debe ser un número'})
+        queryset = queryset.filter(**{lookup: amount})
+    return queryset
@@ -0,0 +1,43 @@
+"""
+Trabajos en segundo plano que generan archivos con las exportaciones de api/exports.py.
+"""
+import os
+from pathlib import Path
+from django.conf import settings
+from business.jobs import register, parse_dates
+from .exports import EXPORT_CHUNK_SIZE, export_rows, stream_export
+
+
+def result_path(job, export_format):
+    return Path(settings.JOB_RESULTS_DIR) / f'job-{job.pk}.{export_format}'
+
+
+@register('export')
+def export(job, dataset, format, date_from=None, date_to=None, remission=None):
+    """
+    Escribe una exportación (ventas, créditos o reporte diario) en JOB_RESULTS_DIR.
+    El avance es el número de filas escritas. El archivo se escribe con otro nombre y se
+    renombra al terminar, así que un intento fallido no deja un resultado a medias.
+    """
+    date_from, date_to = parse_dates(date_from, date_to)
+    columns, rows = export_rows(dataset, date_from, date_to, remission)
+
+    written = 0
+
+    def counted(rows):
+        nonlocal written
+        for row in rows:
+            yield row
+            written += 1
+            if written % EXPORT_CHUNK_SIZE == 0:
+                job.set_progress(written)
+
+    path = result_path(job, format)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_name(path.name + '.partial')
+    with open(partial, 'w', encoding='utf-8', newline='') as output:
+        for chunk in stream_export(format, columns, counted(rows)):
+            output.write(chunk)
+    os.replace(partial, path)
+    job.set_progress(written)
+    return {'file': path.name, 'format': format, 'rows': written}
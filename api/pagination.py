@@ -0,0 +1,74 @@
+from functools import partial
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class CountQuerysetPaginator(Paginator):
+    """
+    Paginator que cuenta las filas con count_queryset, un queryset con el mismo número de
+    filas que el paginado pero más barato de contar (por ejemplo, sin sus JOIN ni GROUP BY).
+    """
+    def __init__(self, object_list, per_page, count_queryset=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_queryset = count_queryset
+
+    @cached_property
+    def count(self):
+        if self.count_queryset is None:
+            return super().count
+        return self.count_queryset.count()
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Paginación por cursor sobre la llave primaria.
+    Cada página es un WHERE id > x ORDER BY id LIMIT n: sin COUNT(*) ni OFFSET,
+    por lo que el costo por página es constante sin importar la profundidad.
+    """
+    ordering = 'id'
+    page_size_query_param = 'page_size'
+    max_page_size = 5000
+
+
+class OptionalCursorPagination(PageNumberPagination):
+    """
+    Paginación por número de página por defecto. Con ?pagination=cursor
+    (o al seguir un enlace con ?cursor=) delega en KeysetPagination.
+    Si la vista define get_count_queryset(), el total de la página se cuenta con ese queryset.
+    """
+    mode_query_param = 'pagination'
+    cursor_paginator_class = KeysetPagination
+
+    def use_cursor(self, request):
+        return (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or self.cursor_paginator_class.cursor_query_param in request.query_params
+        )
+
+    def position_fields(self, request, queryset, view=None):
+        """
+        Campos que el cursor lee de la última fila para armar el enlace siguiente
+        (ninguno en la paginación por número de página).
+        """
+        if not self.use_cursor(request):
+            return ()
+        ordering = self.cursor_paginator_class().get_ordering(request, queryset, view)
+        return [field.lstrip('-') for field in ordering]
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if self.use_cursor(request):
+            self.cursor_paginator = self.cursor_paginator_class()
+            return self.cursor_paginator.paginate_queryset(queryset, request, view)
+
+        get_count_queryset = getattr(view, 'get_count_queryset', None)
+        self.django_paginator_class = partial(
+            CountQuerysetPaginator, count_queryset=get_count_queryset() if get_count_queryset else None
+        )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
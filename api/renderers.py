@@ -0,0 +1,47 @@
+import decimal
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FallbackToJSON(Exception):
+    pass
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer que usa orjson cuando está instalado y produce exactamente los mismos bytes
+    que el JSONRenderer de DRF. Los tipos que orjson no representa igual (fechas, decimales,
+    etc.) se convierten con el mismo JSONEncoder de DRF. Sin orjson, con indentación o con
+    una configuración distinta a la compacta en UTF-8 se usa el renderer de DRF.
+    """
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None or data is None or self.ensure_ascii or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        encode = self.encoder_class().default
+
+        def default(obj):
+            value = encode(obj)
+            if isinstance(obj, decimal.Decimal) and value and not 1e-4 <= abs(value) < 1e16:
+                # orjson escribe estos números sin el signo del exponente ("1e16" contra "1e+16").
+                raise FallbackToJSON
+            return value
+
+        try:
+            ret = orjson.dumps(
+                data,
+                default=default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+            )
+        except (FallbackToJSON, orjson.JSONEncodeError):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Igual que DRF: se escapan U+2028 y U+2029 para que el JSON sea un subconjunto de JavaScript.
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
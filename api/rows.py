@@ -0,0 +1,153 @@
+"""
+Ruta rápida de lectura para los listados.
+
+ValuesSerializer arma cada fila directamente desde los diccionarios de .values(), sin
+instanciar modelos ni recorrer el serializer por cada objeto, y produce exactamente la misma
+salida que el ModelSerializer del que parte: mismos campos, mismo orden y la misma
+representación (los decimales y fechas se formatean con la misma lógica que los campos de
+DRF, pero preparando el contexto decimal y la zona horaria una sola vez).
+"""
+import decimal
+from operator import attrgetter
+from django.db.models import F
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+# Campos cuyo valor leído de la base de datos ya es su representación.
+PASSTHROUGH_FIELDS = (
+    serializers.IntegerField,
+    serializers.CharField,
+    serializers.BooleanField,
+    serializers.ReadOnlyField,
+    serializers.PrimaryKeyRelatedField,
+)
+
+
+def decimal_converter(field):
+    """
+    Equivalente a DecimalField.to_representation con el contexto calculado una sola vez.
+    """
+    coerce_to_string = getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+    if not coerce_to_string or field.localize or field.decimal_places is None:
+        return field.to_representation
+
+    exponent = decimal.Decimal('.1') ** field.decimal_places
+    context = decimal.getcontext().copy()
+    if field.max_digits is not None:
+        context.prec = field.max_digits
+
+    def convert(value):
+        if not isinstance(value, decimal.Decimal):
+            return field.to_representation(value)
+        return '{:f}'.format(value.quantize(exponent, rounding=field.rounding, context=context))
+    return convert
+
+
+def datetime_converter(field):
+    """
+    Equivalente a DateTimeField.to_representation en formato ISO 8601, resolviendo la zona
+    horaria una sola vez por serialización.
+    """
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+    if output_format is None or output_format.lower() != ISO_8601 or field_timezone is None:
+        return field.to_representation
+
+    def convert(value):
+        if isinstance(value, str) or value.tzinfo is None:
+            return field.to_representation(value)
+        value = value.astimezone(field_timezone).isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    return convert
+
+
+def converter(field):
+    """
+    Función que convierte el valor leído de la base de datos en la representación del campo,
+    o None si el valor ya es su representación.
+    """
+    if isinstance(field, PASSTHROUGH_FIELDS):
+        return None
+    if isinstance(field, serializers.DecimalField):
+        return decimal_converter(field)
+    if isinstance(field, serializers.DateTimeField):
+        return datetime_converter(field)
+    return field.to_representation
+
+
+class ValuesSerializer:
+    """
+    Serializa filas de .values() con los campos de un ModelSerializer.
+
+    Con fields se limita la salida a esos campos (en el orden del serializer) y la consulta
+    sólo lee sus columnas. annotations son los nombres de anotaciones del queryset que se leen
+    como columnas. Los demás campos que no corresponden a una columna (propiedades del modelo)
+    se calculan sobre una instancia ligera armada con las columnas de la fila.
+    """
+    def __init__(self, serializer_class, fields=None, context=None, annotations=()):
+        readable = {
+            name: field for name, field in serializer_class(context=context).fields.items()
+            if not field.write_only
+        }
+        if fields is not None:
+            unknown = [name for name in fields if name not in readable]
+            if unknown:
+                raise serializers.ValidationError({'fields': f'Campos desconocidos: {", ".join(unknown)}'})
+            readable = {name: field for name, field in readable.items() if name in fields}
+
+        self.model = serializer_class.Meta.model
+        concrete = {field.name: field for field in self.model._meta.concrete_fields}
+        columns = set(concrete) | set(annotations)
+
+        self.plan = []
+        self.columns = []
+        self.needs_instance = False
+        for name, field in readable.items():
+            if field.source in columns:
+                column, getter = field.source, None
+                if column not in self.columns:
+                    self.columns.append(column)
+            else:
+                column = None
+                getter = attrgetter(field.source) if field.source != '*' else field.get_attribute
+                self.needs_instance = True
+            self.plan.append((name, column, converter(field), getter))
+
+        if self.needs_instance:
+            # Las propiedades pueden depender de cualquier columna de la fila.
+            self.columns += [name for name in concrete if name not in self.columns]
+            self.attnames = {field.name: field.attname for field in concrete.values()}
+
+    def values(self, queryset, extra=()):
+        """
+        Reduce el queryset a las columnas necesarias. extra agrega columnas o alias que la
+        paginación necesita leer de cada fila (por ejemplo, el campo de orden del cursor).
+        """
+        columns = list(self.columns)
+        aliases = {}
+        for name in extra:
+            if name in columns:
+                continue
+            if name in queryset.query.annotations:
+                aliases[name] = F(name)
+            else:
+                columns.append(name)
+        if aliases:
+            queryset = queryset.annotate(**aliases)
+        return queryset.values(*columns, *aliases)
+
+    def to_representation(self, row):
+        instance = self.instance(row) if self.needs_instance else None
+        data = {}
+        for name, column, convert, getter in self.plan:
+            value = row[column] if column is not None else getter(instance)
+            data[name] = value if value is None or convert is None else convert(value)
+        return data
+
+    def instance(self, row):
+        instance = self.model.__new__(self.model)
+        instance.__dict__.update((self.attnames[name], value) for name, value in row.items() if name in self.attnames)
+        return instance
+
+    def many(self, rows):
+        return [self.to_representation(row) for row in rows]
@@ -1,17 +1,74 @@
+from decimal import Decimal
+from django.db import transaction
 from rest_framework import serializers
-from business.models import Customer, Order, Remission, Sale, CreditAssignment
+from business.models import (
+    Customer, Order, Remission, ArchivedRemission, Sale, CreditAssignment, DailySalesRollup, Job
+)
+from business.changes import FEEDS, decode_cursor
+from business.search import KINDS, MIN_TERM_LENGTH, split_terms
+
+# Tamaño de lote para las consultas con __in y los INSERT masivos.
+BATCH_SIZE = 500
+
+# Máximo de elementos aceptados en una sola petición de carga masiva.
+MAX_BULK_ITEMS = 50000
+
+# Máximo de remisiones por petición de resúmenes en lote.
+MAX_SUMMARY_ITEMS = 500
+
+
+def open_remission_errors(remission_ids):
+    """
+    Valida en bloque que las remisiones existan y sigan abiertas, bloqueando sus filas.
+    Retorna un diccionario id -> mensaje de error para las que no cumplen.
+    """
+    ids = sorted(set(remission_ids))
+    statuses = {}
+    for start in range(0, len(ids), BATCH_SIZE):
+        statuses.update(
+            Remission.objects.select_for_update()
+            .filter(pk__in=ids[start:start + BATCH_SIZE])
+            .values_list('pk', 'status')
+        )
+
+    errors = {}
+    for pk in ids:
+        if pk not in statuses:
+            errors[pk] = f'La remisión {pk} no existe'
+        elif statuses[pk] != 'open':
+            errors[pk] = f'La remisión {pk} está cerrada'
+    return errors
 
 class CustomerSerializer(serializers.ModelSerializer):
     class Meta:
         model = Customer
         fields = '__all__'
 
+class CustomerReceivableSerializer(serializers.ModelSerializer):
+    """
+    Cliente con su cartera (ver CustomerQuerySet.with_receivables).
+    """
+    open_remissions = serializers.IntegerField(read_only=True)
+    total_sales = serializers.DecimalField(max_digits=16, decimal_places=2, read_only=True)
+    total_credits = serializers.DecimalField(max_digits=16, decimal_places=2, read_only=True)
+    balance = serializers.DecimalField(max_digits=16, decimal_places=2, read_only=True)
+
+    class Meta:
+        model = Customer
+        fields = ['id', 'name', 'email', 'is_active', 'open_remissions', 'total_sales', 'total_credits', 'balance']
+
 class OrderSerializer(serializers.ModelSerializer):
     class Meta:
         model = Order
         fields = '__all__'
         
 class RemissionSerializer(serializers.ModelSerializer):
+    def validate_folio(self, folio):
+        # Los folios de las remisiones archivadas siguen ocupados.
+        if ArchivedRemission.objects.filter(folio=folio).exists():
+            raise serializers.ValidationError(f'El folio {folio} está repetido')
+        return folio
+
     class Meta:
         model = Remission
         fields = [
@@ -21,10 +78,32 @@ class RemissionSerializer(serializers.ModelSerializer):
             'status',
             'created_at'
         ]
+
+class RemissionTotalsSerializer(RemissionSerializer):
+    """
+    Remisión con sus totales (?include=totals), leídos de los totales acumulados de la fila.
+    """
+    total_sales = serializers.DecimalField(max_digits=14, decimal_places=2, read_only=True)
+    total_tax = serializers.DecimalField(source='sales_tax', max_digits=14, decimal_places=2, read_only=True)
+    total_credits = serializers.DecimalField(source='credits_total', max_digits=14, decimal_places=2, read_only=True)
+    balance = serializers.DecimalField(max_digits=14, decimal_places=2, read_only=True)
+    sales_count = serializers.IntegerField(read_only=True)
+
+    class Meta(RemissionSerializer.Meta):
+        fields = RemissionSerializer.Meta.fields + [
+            'total_sales',
+            'total_tax',
+            'total_credits',
+            'balance',
+            'sales_count'
+        ]
         
 class SaleSerializer(serializers.ModelSerializer):
-    
-    total = serializers.ReadOnlyField()
+    total = serializers.DecimalField(max_digits=13, decimal_places=2, read_only=True)
+    def validate_remission(self, remission):
+        if remission.status != 'open':
+            raise serializers.ValidationError('La remisión está cerrada')
+        return remission
     
     class Meta:
         model = Sale
@@ -38,8 +117,323 @@ class SaleSerializer(serializers.ModelSerializer):
         ]
 
 class CreditAssignmentSerializer(serializers.ModelSerializer):
+
+    def validate_remission(self, remission):
+        if remission.status != 'open':
+            raise serializers.ValidationError('La remisión está cerrada')
+        return remission
+
     class Meta:
         model = CreditAssignment
         fields = '__all__'
-        
-        
\ No newline at end of file
+
+
+class BulkCloseSerializer(serializers.Serializer):
+    """
+    Parámetros del cierre masivo: una lista de ids o un filtro sobre las remisiones abiertas.
+    """
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, max_length=50000)
+    order = serializers.IntegerField(required=False)
+    customer = serializers.IntegerField(required=False)
+    created_before = serializers.DateTimeField(required=False)
+
+    def validate(self, attrs):
+        if not attrs:
+            raise serializers.ValidationError('Debe indicar "ids" o al menos un filtro')
+        return attrs
+
+
+class RemissionSummariesSerializer(serializers.Serializer):
+    """
+    Parámetros de los resúmenes en lote: ids separados por comas y/o un filtro por orden,
+    cliente y estado. Con filtro, "limit" acota el número de remisiones y "after" continúa
+    después del último id recibido.
+    """
+    ids = serializers.CharField(required=False)
+    order = serializers.IntegerField(required=False)
+    customer = serializers.IntegerField(required=False)
+    status = serializers.ChoiceField(choices=[choice for choice, _ in Remission.STATUS_CHOICES], required=False)
+    after = serializers.IntegerField(required=False, min_value=0)
+    limit = serializers.IntegerField(min_value=1, max_value=MAX_SUMMARY_ITEMS, default=200)
+
+    def validate_ids(self, ids):
+        try:
+            ids = sorted({int(pk) for pk in ids.split(',')})
+        except ValueError:
+            raise serializers.ValidationError('Debe ser una lista de ids separados por comas')
+        if len(ids) > MAX_SUMMARY_ITEMS:
+            raise serializers.ValidationError(f'Se aceptan hasta {MAX_SUMMARY_ITEMS} ids')
+        return ids
+
+    def validate(self, attrs):
+        if 'ids' not in attrs and not attrs.keys() & {'order', 'customer', 'status'}:
+            raise serializers.ValidationError('Debe indicar "ids" o al menos un filtro')
+        return attrs
+
+
+class DateRangeSerializer(serializers.Serializer):
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        if 'date_from' in attrs and 'date_to' in attrs and attrs['date_from'] > attrs['date_to']:
+            raise serializers.ValidationError('"date_from" no puede ser posterior a "date_to"')
+        return attrs
+
+
+class SearchSerializer(serializers.Serializer):
+    """
+    Parámetros de /api/search/: texto a buscar, tipo de registro y número de resultados.
+    """
+    q = serializers.CharField(max_length=200)
+    type = serializers.ChoiceField(choices=list(KINDS), required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
+
+    def validate_q(self, q):
+        if not split_terms(q)[0]:
+            raise serializers.ValidationError(
+                f'La búsqueda debe incluir al menos un término de {MIN_TERM_LENGTH} caracteres'
+            )
+        return q
+
+
+class ChangesSerializer(serializers.Serializer):
+    """
+    Parámetros de /api/changes/: recurso, cursor de la página anterior y número de cambios.
+    """
+    resource = serializers.ChoiceField(choices=list(FEEDS))
+    cursor = serializers.CharField(required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=5000, default=500)
+
+    def validate_cursor(self, cursor):
+        try:
+            decode_cursor(cursor)
+        except ValueError as e:
+            raise serializers.ValidationError(str(e))
+        return cursor
+
+
+class ExportJobSerializer(DateRangeSerializer):
+    """
+    Parámetros de una exportación en segundo plano; las mismas de /api/exports/.
+    """
+    dataset = serializers.ChoiceField(choices=['sales', 'credits', 'daily-sales'])
+    format = serializers.ChoiceField(choices=['csv', 'ndjson'], default='csv')
+    remission = serializers.IntegerField(required=False, min_value=1)
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        if attrs['dataset'] == 'daily-sales':
+            if 'date_from' not in attrs or 'date_to' not in attrs:
+                raise serializers.ValidationError('El reporte diario requiere "date_from" y "date_to"')
+            if 'remission' in attrs:
+                raise serializers.ValidationError('El reporte diario no se filtra por remisión')
+        return attrs
+
+
+# Tipo de trabajo -> serializer de sus parámetros (ver business/jobs.py y api/jobs.py).
+JOB_PARAMS_SERIALIZERS = {
+    'close_remissions': BulkCloseSerializer,
+    'rebuild_daily_rollup': DateRangeSerializer,
+    'export': ExportJobSerializer,
+}
+
+
+class JobSerializer(serializers.ModelSerializer):
+    """
+    Alta y estado de un trabajo en segundo plano. Los parámetros se validan con el
+    serializer de su tipo y se guardan ya normalizados.
+    """
+    kind = serializers.ChoiceField(choices=list(JOB_PARAMS_SERIALIZERS))
+    params = serializers.JSONField(required=False, default=dict)
+
+    class Meta:
+        model = Job
+        fields = [
+            'id', 'kind', 'params', 'status', 'progress', 'progress_total', 'attempts', 'max_attempts',
+            'error', 'created_at', 'started_at', 'finished_at'
+        ]
+        read_only_fields = [
+            'status', 'progress', 'progress_total', 'attempts', 'max_attempts',
+            'error', 'created_at', 'started_at', 'finished_at'
+        ]
+
+    def validate(self, attrs):
+        params = JOB_PARAMS_SERIALIZERS[attrs['kind']](data=attrs['params'])
+        if not params.is_valid():
+            raise serializers.ValidationError({'params': params.errors})
+        attrs['params'] = params.data
+        return attrs
+
+    def create(self, validated_data):
+        return Job.objects.submit(validated_data['kind'], validated_data['params'])
+
+
+class BulkTrackedListSerializer(serializers.ListSerializer):
+    """
+    Carga masiva de ventas o créditos sobre remisiones existentes.
+
+    Valida cada elemento sin consultas, después valida todas las remisiones destino
+    con una consulta por lote e inserta todo con bulk_create en una transacción.
+    Los errores se reportan por elemento, en el mismo orden que la petición.
+    """
+    def to_internal_value(self, data):
+        items = super().to_internal_value(data)
+
+        errors = open_remission_errors(item['remission_id'] for item in items)
+        if errors:
+            raise serializers.ValidationError([
+                {'remission': [errors[item['remission_id']]]} if item['remission_id'] in errors else {}
+                for item in items
+            ])
+        return items
+
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        return model.objects.bulk_create_tracked(
+            [model(**item) for item in validated_data], batch_size=BATCH_SIZE
+        )
+
+
+class SaleBulkSerializer(serializers.ModelSerializer):
+    remission = serializers.IntegerField(source='remission_id')
+
+    class Meta:
+        model = Sale
+        fields = ['id', 'remission', 'subtotal', 'tax', 'created_at']
+        list_serializer_class = BulkTrackedListSerializer
+
+
+class CreditAssignmentBulkSerializer(serializers.ModelSerializer):
+    remission = serializers.IntegerField(source='remission_id')
+
+    class Meta:
+        model = CreditAssignment
+        fields = ['id', 'remission', 'amount', 'reason', 'created_at']
+        list_serializer_class = BulkTrackedListSerializer
+
+
+class SaleIngestSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Sale
+        fields = ['subtotal', 'tax']
+
+
+class CreditAssignmentIngestSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CreditAssignment
+        fields = ['amount', 'reason']
+
+
+class RemissionIngestSerializer(serializers.Serializer):
+    folio = serializers.CharField(max_length=50)
+    sales = SaleIngestSerializer(many=True, required=False, default=list)
+    credits = CreditAssignmentIngestSerializer(many=True, required=False, default=list)
+
+
+class OrderIngestSerializer(serializers.Serializer):
+    customer = serializers.IntegerField()
+    folio = serializers.CharField(max_length=50)
+    remissions = RemissionIngestSerializer(many=True, required=False, default=list)
+
+
+class IngestSerializer(serializers.Serializer):
+    """
+    Carga masiva anidada: órdenes nuevas con sus remisiones, ventas y créditos.
+
+    Las validaciones contra la base de datos (clientes existentes y folios únicos)
+    se hacen con una consulta por lote, no por elemento. Las remisiones se insertan con
+    sus totales ya calculados, así que sólo el acumulado diario se actualiza aparte.
+    """
+    orders = OrderIngestSerializer(many=True, max_length=MAX_BULK_ITEMS)
+
+    def validate_orders(self, orders):
+        customer_ids = sorted({order['customer'] for order in orders})
+        order_folios = [order['folio'] for order in orders]
+        remission_folios = [remission['folio'] for order in orders for remission in order['remissions']]
+
+        existing_customers = self._existing(Customer.objects.all(), 'pk', customer_ids)
+        taken_orders = self._duplicated(order_folios) | self._existing(Order.objects.all(), 'folio', order_folios)
+        taken_remissions = (
+            self._duplicated(remission_folios)
+            | self._existing(Remission.objects.all(), 'folio', remission_folios)
+            | self._existing(ArchivedRemission.objects.all(), 'folio', remission_folios)
+        )
+
+        errors = []
+        for order in orders:
+            error = {}
+            if order['customer'] not in existing_customers:
+                error['customer'] = [f'El cliente {order["customer"]} no existe']
+            if order['folio'] in taken_orders:
+                error['folio'] = [f'El folio {order["folio"]} está repetido']
+
+            remission_errors = [
+                {'folio': [f'El folio {remission["folio"]} está repetido']}
+                if remission['folio'] in taken_remissions else {}
+                for remission in order['remissions']
+            ]
+            if any(remission_errors):
+                error['remissions'] = remission_errors
+            errors.append(error)
+
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return orders
+
+    @staticmethod
+    def _duplicated(values):
+        seen, duplicated = set(), set()
+        for value in values:
+            (duplicated if value in seen else seen).add(value)
+        return duplicated
+
+    @staticmethod
+    def _existing(queryset, field, values):
+        values = sorted(set(values))
+        found = set()
+        for start in range(0, len(values), BATCH_SIZE):
+            found.update(
+                queryset.filter(**{f'{field}__in': values[start:start + BATCH_SIZE]})
+                .values_list(field, flat=True)
+            )
+        return found
+
+    def create(self, validated_data):
+        orders_data = validated_data['orders']
+
+        with transaction.atomic():
+            orders = Order.objects.bulk_create(
+                [Order(customer_id=order['customer'], folio=order['folio']) for order in orders_data],
+                batch_size=BATCH_SIZE
+            )
+
+            remissions, children = [], []
+            for order, order_data in zip(orders, orders_data):
+                for remission_data in order_data['remissions']:
+                    sales = [Sale(**sale) for sale in remission_data['sales']]
+                    credits = [CreditAssignment(**credit) for credit in remission_data['credits']]
+                    remissions.append(Remission(
+                        order=order,
+                        folio=remission_data['folio'],
+                        sales_subtotal=sum((sale.subtotal for sale in sales), Decimal('0.00')),
+                        sales_tax=sum((sale.tax for sale in sales), Decimal('0.00')),
+                        sales_count=len(sales),
+                        credits_total=sum((credit.amount for credit in credits), Decimal('0.00'))
+                    ))
+                    children.append((sales, credits))
+
+            Remission.objects.bulk_create(remissions, batch_size=BATCH_SIZE)
+
+            sales, credits = [], []
+            for remission, (remission_sales, remission_credits) in zip(remissions, children):
+                for child in remission_sales + remission_credits:
+                    child.remission = remission
+                sales.extend(remission_sales)
+                credits.extend(remission_credits)
+
+            Sale.objects.bulk_create(sales, batch_size=BATCH_SIZE)
+            CreditAssignment.objects.bulk_create(credits, batch_size=BATCH_SIZE)
+            DailySalesRollup.objects.apply_sales(sales)
+
+        return {'orders': len(orders), 'remissions': len(remissions), 'sales': len(sales), 'credits': len(credits)}
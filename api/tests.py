@@ -1,3 +1,1115 @@
-from django.test import TestCase
+import asyncio
+import csv
+import io
+import json
+import os
+import tempfile
+import time
+from unittest import skipUnless
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+from asgiref.sync import async_to_sync
+from asgiref.testing import ApplicationCommunicator
+from django.core.handlers.asgi import ASGIHandler
+from django.db.backends.utils import CursorWrapper
+from django.core.cache import cache
+from django.core.management import call_command
+from django.contrib.auth.models import User
+from django.test import AsyncClient, Client, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.conf import settings
+from django.db import connection
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.db.utils import ConnectionDoesNotExist
+from rest_framework.mixins import ListModelMixin
+from rest_framework.renderers import JSONRenderer
+from django.utils import timezone
+from business.jobs import run_job
+from business.models import Customer, Order, Remission, Sale, CreditAssignment, DailySalesRollup, Job
+from api import renderers
+from api.renderers import FastJSONRenderer
+from api.serializers import SaleSerializer
+from api.views import ValuesListMixin
+from business.cache import get_cached_summary, cache_summary
+from business.changes import FEEDS, RESOURCES, changes, encode_cursor
+from core.metrics import registry
+from core.routers import PrimaryReplicaRouter, read_alias
 
-# Create your tests here.
+
+class CursorPaginationTest(TestCase):
+    """
+    Pruebas de la paginación por cursor opcional en los listados.
+    """
+    def setUp(self):
+        Customer.objects.bulk_create(Customer(name=f"Client {i}") for i in range(25))
+
+    def test_page_number_remains_default(self):
+        response = self.client.get('/api/customers/')
+        self.assertEqual(response.data['count'], 25)
+        self.assertEqual(len(response.data['results']), 10)
+
+    def test_cursor_mode_walks_every_row_without_count(self):
+        ids = []
+        url = '/api/customers/?pagination=cursor&page_size=7'
+        while url:
+            with self.assertNumQueries(1):
+                response = self.client.get(url)
+            self.assertNotIn('count', response.data)
+            ids.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+
+        self.assertEqual(ids, sorted(Customer.objects.values_list('id', flat=True)))
+
+
+class BulkIngestionTest(TestCase):
+    """
+    Pruebas de la carga masiva de ventas, créditos y órdenes anidadas.
+    """
+    def setUp(self):
+        self.customer = Customer.objects.create(name="Test Client")
+        order = Order.objects.create(customer=self.customer, folio="ORD-001")
+        self.remission = Remission.objects.create(order=order, folio="REM-001")
+        self.closed = Remission.objects.create(order=order, folio="REM-002", status='closed')
+
+    def post(self, url, payload):
+        return self.client.post(url, payload, content_type='application/json')
+
+    def test_bulk_sales_update_totals_and_rollup(self):
+        payload = [
+            {'remission': self.remission.pk, 'subtotal': '100.00', 'tax': '16.00'},
+            {'remission': self.remission.pk, 'subtotal': '50.00', 'tax': '8.00'},
+        ]
+        response = self.post('/api/sales/bulk/', payload)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 2)
+        self.remission.refresh_from_db()
+        self.assertEqual(self.remission.total_sales, Decimal('174.00'))
+        self.assertEqual(self.remission.sales_count, 2)
+        self.assertEqual(DailySalesRollup.objects.get().sales_count, 2)
+
+    def test_bulk_sales_report_errors_per_item(self):
+        payload = [
+            {'remission': self.remission.pk, 'subtotal': '100.00', 'tax': '16.00'},
+            {'remission': self.closed.pk, 'subtotal': '10.00', 'tax': '1.00'},
+            {'remission': 9999, 'subtotal': '10.00', 'tax': '1.00'},
+        ]
+        response = self.post('/api/sales/bulk/', payload)
+
+        self.assertEqual(response.status_code, 400)
+        errors = response.data['errors']
+        self.assertEqual(errors[0], {})
+        self.assertIn('cerrada', errors[1]['remission'][0])
+        self.assertIn('no existe', errors[2]['remission'][0])
+        self.assertFalse(Sale.objects.exists())
+
+        response = self.post('/api/sales/bulk/', [{'remission': self.remission.pk, 'subtotal': '-1', 'tax': '0'}])
+        self.assertIn('subtotal', response.data['errors'][0])
+
+    def test_bulk_credits(self):
+        payload = [{'remission': self.remission.pk, 'amount': '20.00', 'reason': 'Credit'}]
+        response = self.post('/api/credits/bulk/', payload)
+
+        self.assertEqual(response.status_code, 201)
+        self.remission.refresh_from_db()
+        self.assertEqual(self.remission.credits_total, Decimal('20.00'))
+
+    def test_nested_ingest(self):
+        payload = {'orders': [{
+            'customer': self.customer.pk,
+            'folio': 'ORD-100',
+            'remissions': [{
+                'folio': 'REM-100',
+                'sales': [{'subtotal': '100.00', 'tax': '16.00'}, {'subtotal': '10.00', 'tax': '1.60'}],
+                'credits': [{'amount': '5.00', 'reason': 'Credit'}]
+            }]
+        }]}
+        response = self.post('/api/ingest/', payload)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], {'orders': 1, 'remissions': 1, 'sales': 2, 'credits': 1})
+        remission = Remission.objects.get(folio='REM-100')
+        self.assertEqual(remission.summary()['balance'], Decimal('122.60'))
+        self.assertFalse(Remission.objects.out_of_sync().exists())
+
+    def test_nested_ingest_rejects_taken_folios(self):
+        payload = {'orders': [
+            {'customer': self.customer.pk, 'folio': 'ORD-001', 'remissions': [{'folio': 'REM-200'}]},
+            {'customer': 9999, 'folio': 'ORD-300', 'remissions': [{'folio': 'REM-200'}]},
+        ]}
+        response = self.post('/api/ingest/', payload)
+
+        self.assertEqual(response.status_code, 400)
+        errors = response.data['errors']['orders']
+        self.assertIn('folio', errors[0])
+        self.assertIn('customer', errors[1])
+        self.assertIn('folio', errors[1]['remissions'][0])
+        self.assertFalse(Order.objects.filter(folio='ORD-300').exists())
+
+
+class MetricsTest(TestCase):
+    """
+    Pruebas del middleware de métricas y su endpoint en formato Prometheus.
+    """
+    def setUp(self):
+        registry.reset()
+        cache.clear()
+
+    def test_requests_are_recorded_per_route(self):
+        customer = Customer.objects.create(name="Test Client")
+        order = Order.objects.create(customer=customer, folio="ORD-001")
+        remission = Remission.objects.create(order=order, folio="REM-001")
+
+        self.client.get(f'/api/remissions/{remission.pk}/summary/')
+        self.client.get(f'/api/remissions/{remission.pk}/summary/')
+
+        response = self.client.get('/metrics')
+        body = response.content.decode()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('http_request_duration_seconds_count{route="remission-summary",method="GET"} 2', body)
+        # La segunda petición se sirve desde la caché de resúmenes.
+        self.assertIn('http_requests_db_queries_total{route="remission-summary",method="GET"} 1', body)
+        self.assertIn('http_requests_total{route="remission-summary",method="GET",status="200"} 2', body)
+
+    def test_slow_requests_are_logged(self):
+        with self.settings(METRICS_SLOW_REQUEST_MS=0), self.assertLogs('core.metrics', 'WARNING'):
+            self.client.get('/api/customers/')
+
+
+class ProfilingTest(TestCase):
+    """
+    Pruebas del perfilado bajo demanda y del comando profiles.
+    """
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        customer = Customer.objects.create(name="Test Client")
+        order = Order.objects.create(customer=customer, folio="ORD-001")
+        self.remission = Remission.objects.create(order=order, folio="REM-001")
+        Sale.objects.create(remission=self.remission, subtotal=Decimal('100.00'), tax=Decimal('16.00'))
+
+    def profiling(self, **overrides):
+        return self.settings(PROFILING_ENABLED=True, PROFILING_DIR=self.directory, **overrides)
+
+    def test_header_captures_sql_plans_and_serializer_time_for_staff(self):
+        staff = User.objects.create_user('staff', password='x', is_staff=True)
+        with self.profiling():
+            client = Client()
+            # Un usuario anónimo no puede pedir el perfil.
+            self.assertNotIn('X-Profile-Id', client.get('/api/sales/', HTTP_X_PROFILE='1'))
+            client.force_login(staff)
+            response = client.get('/api/sales/', HTTP_X_PROFILE='1')
+
+        capture_id = response['X-Profile-Id']
+        with open(os.path.join(self.directory, f'{capture_id}.json')) as capture_file:
+            capture = json.load(capture_file)
+        self.assertTrue(os.path.exists(os.path.join(self.directory, f'{capture_id}.prof')))
+        self.assertEqual((capture['trigger'], capture['view'], capture['status']), ('header', 'sale-list', 200))
+        select = next(s for s in capture['sql']['statements'] if 'FROM "business_sale"' in s['sql'])
+        self.assertTrue(select['explain'])
+        self.assertGreater(capture['serializer_ms'], 0)
+        self.assertTrue(capture['functions'])
+
+        with self.settings(PROFILING_DIR=self.directory):
+            out = io.StringIO()
+            call_command('profiles', stdout=out)
+            self.assertIn(f'{capture_id}    200', out.getvalue())
+            out = io.StringIO()
+            call_command('profiles', capture_id, stdout=out)
+        self.assertIn('GET /api/sales/ -> 200', out.getvalue())
+        self.assertIn('Slowest queries:', out.getvalue())
+
+    def test_sampling_and_async_requests(self):
+        with self.profiling(PROFILING_SAMPLE_RATE=1):
+            response = async_to_sync(AsyncClient().get)(f'/api/remissions/{self.remission.pk}/summary/')
+        self.assertEqual(response.status_code, 200)
+        with open(os.path.join(self.directory, f"{response['X-Profile-Id']}.json")) as capture_file:
+            capture = json.load(capture_file)
+        self.assertEqual((capture['trigger'], capture['view']), ('sample', 'remission-summary'))
+        self.assertEqual(capture['sql']['count'], 1)
+
+    def test_disabled_by_default(self):
+        with self.settings(PROFILING_DIR=self.directory, PROFILING_STAFF_ONLY=False):
+            response = Client().get('/api/sales/', HTTP_X_PROFILE='1')
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertEqual(os.listdir(self.directory), [])
+
+
+class RemissionListTotalsTest(TestCase):
+    """
+    Pruebas del listado de remisiones con totales, filtros por saldo y estado y ordenamiento.
+    """
+    def setUp(self):
+        customer = Customer.objects.create(name="Test Client")
+        order = Order.objects.create(customer=customer, folio="ORD-001")
+        self.remissions = []
+        for index, (subtotal, credit) in enumerate([('100.00', '0'), ('300.00', '50.00'), ('50.00', '58.00')]):
+            remission = Remission.objects.create(order=order, folio=f"REM-{index}")
+            Sale.objects.create(remission=remission, subtotal=Decimal(subtotal), tax=Decimal(subtotal) * Decimal('0.16'))
+            if Decimal(credit):
+                CreditAssignment.objects.create(remission=remission, amount=Decimal(credit), reason="Credit")
+            self.remissions.append(remission)
+        self.remissions[0].close()
+
+    def test_list_reads_only_remission_rows(self):
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/remissions/')
+        self.assertEqual(list(response.data['results'][0]), ['id', 'order', 'folio', 'status', 'created_at'])
+
+    def test_include_totals(self):
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/remissions/', {'include': 'totals'})
+        second = response.data['results'][1]
+        self.assertEqual(second['total_sales'], '348.00')
+        self.assertEqual(second['total_tax'], '48.00')
+        self.assertEqual(second['total_credits'], '50.00')
+        self.assertEqual(second['balance'], '298.00')
+        self.assertEqual(second['sales_count'], 1)
+
+        detail = self.client.get(f'/api/remissions/{self.remissions[2].pk}/', {'include': 'totals'})
+        self.assertEqual(detail.data['balance'], '0.00')
+
+    def test_open_balance_worklist(self):
+        response = self.client.get(
+            '/api/remissions/', {'status': 'open', 'min_balance': '0.01', 'ordering': '-balance', 'include': 'totals'}
+        )
+        self.assertEqual([row['id'] for row in response.data['results']], [self.remissions[1].pk])
+
+        response = self.client.get('/api/remissions/', {'ordering': 'balance'})
+        self.assertEqual(
+            [row['id'] for row in response.data['results']],
+            [self.remissions[2].pk, self.remissions[0].pk, self.remissions[1].pk]
+        )
+        response = self.client.get('/api/remissions/', {'max_balance': '0', 'pagination': 'cursor'})
+        self.assertEqual([row['id'] for row in response.data['results']], [self.remissions[2].pk])
+
+    def test_invalid_filters_are_rejected(self):
+        self.assertEqual(self.client.get('/api/remissions/', {'min_balance': 'abc'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/remissions/', {'status': 'pending'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/async/remissions/', {'status': 'pending'}).status_code, 400)
+
+    def test_async_list_supports_totals_and_filters(self):
+        params = {'status': 'open', 'ordering': '-balance', 'include': 'totals'}
+        sync_response = self.client.get('/api/remissions/', params)
+        async_response = self.client.get('/api/async/remissions/', params)
+        self.assertEqual(json.loads(async_response.content), json.loads(sync_response.content))
+
+
+class ReceivablesReportTest(TestCase):
+    """
+    Pruebas del reporte de cartera por cliente.
+    """
+    def setUp(self):
+        self.first = Customer.objects.create(name="First", email="first@example.com")
+        self.second = Customer.objects.create(name="Second", email="second@example.com")
+        self.inactive = Customer.objects.create(name="Inactive", is_active=False)
+        self.empty = Customer.objects.create(name="Empty")
+
+        def remission(customer, folio, subtotal, credit='0', closed=False):
+            order = Order.objects.create(customer=customer, folio=f"ORD-{folio}")
+            remission = Remission.objects.create(order=order, folio=f"REM-{folio}")
+            Sale.objects.create(remission=remission, subtotal=Decimal(subtotal), tax=Decimal(subtotal) * Decimal('0.16'))
+            if Decimal(credit):
+                CreditAssignment.objects.create(remission=remission, amount=Decimal(credit), reason="Credit")
+            if closed:
+                remission.close()
+            return remission
+
+        remission(self.first, '1', '100.00', '16.00')
+        self.old = remission(self.first, '2', '50.00', closed=True)
+        remission(self.second, '3', '500.00', '80.00')
+        remission(self.inactive, '4', '10.00')
+        Remission.objects.filter(pk=self.old.pk).update(created_at=timezone.now() - timedelta(days=10))
+
+    def test_totals_per_customer(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/reports/receivables/')
+        self.assertEqual(len(queries), 2)
+        self.assertNotIn('JOIN', queries[0]['sql'])
+        self.assertEqual(response.data['count'], 4)
+        rows = {row['id']: row for row in response.data['results']}
+        self.assertEqual(rows[self.first.pk], {
+            'id': self.first.pk, 'name': 'First', 'email': 'first@example.com', 'is_active': True,
+            'open_remissions': 1, 'total_sales': '174.00', 'total_credits': '16.00', 'balance': '158.00'
+        })
+        self.assertEqual(rows[self.second.pk]['balance'], '500.00')
+        self.assertEqual(rows[self.empty.pk]['total_sales'], '0.00')
+        self.assertEqual(rows[self.empty.pk]['open_remissions'], 0)
+
+    def test_sorted_by_balance(self):
+        response = self.client.get('/api/reports/receivables/')
+        self.assertEqual(
+            [row['id'] for row in response.data['results']],
+            [self.second.pk, self.first.pk, self.inactive.pk, self.empty.pk]
+        )
+        response = self.client.get('/api/reports/receivables/', {'ordering': 'balance', 'pagination': 'cursor'})
+        self.assertEqual(response.data['results'][0]['id'], self.empty.pk)
+
+    def test_filters(self):
+        response = self.client.get('/api/reports/receivables/', {'is_active': 'false'})
+        self.assertEqual([row['id'] for row in response.data['results']], [self.inactive.pk])
+
+        today = timezone.localdate().isoformat()
+        response = self.client.get('/api/reports/receivables/', {'from': today, 'to': today, 'is_active': 'true'})
+        rows = {row['id']: row for row in response.data['results']}
+        self.assertEqual(rows[self.first.pk]['total_sales'], '116.00')
+        self.assertEqual(rows[self.first.pk]['balance'], '100.00')
+
+    def test_invalid_filters_are_rejected(self):
+        self.assertEqual(self.client.get('/api/reports/receivables/', {'is_active': 'yes'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/reports/receivables/', {'from': 'ayer'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/reports/receivables/', {'ordering': 'email'}).data['count'], 4)
+
+
+class FastListTest(TestCase):
+    """
+    Pruebas de la ruta rápida de los listados: misma salida, byte por byte, que los serializers.
+    """
+    def setUp(self):
+        customers = Customer.objects.bulk_create([
+            Customer(name="Cliente Ñandú \u2028", email=None),
+            Customer(name="Client 2", email="client@example.com", is_active=False),
+        ])
+        order = Order.objects.create(customer=customers[0], folio="ORD-001")
+        for index in range(3):
+            remission = Remission.objects.create(order=order, folio=f"REM-{index}")
+            Sale.objects.create(remission=remission, subtotal=Decimal('10.10') * (index + 1), tax=Decimal('1.62'))
+        CreditAssignment.objects.create(remission=remission, amount=Decimal('0.01'), reason="Credit")
+
+    def serializer_response(self, url, params):
+        with mock.patch.object(ValuesListMixin, 'list', ListModelMixin.list), \
+                mock.patch.object(renderers, 'orjson', None):
+            return self.client.get(url, params)
+
+    def test_output_is_byte_compatible(self):
+        cases = [
+            ('/api/customers/', {}),
+            ('/api/orders/', {}),
+            ('/api/remissions/', {}),
+            ('/api/remissions/', {'include': 'totals'}),
+            ('/api/remissions/', {'include': 'totals', 'pagination': 'cursor', 'page_size': 2, 'ordering': '-balance'}),
+            ('/api/orders/', {'pagination': 'cursor', 'page_size': 1}),
+        ]
+        for url, params in cases:
+            with self.subTest(url=url, params=params):
+                response = self.client.get(url, params)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.content, self.serializer_response(url, params).content)
+
+    def test_sparse_fieldsets_narrow_select(self):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get('/api/remissions/', {'fields': 'folio,id', 'include': 'totals'})
+        self.assertEqual(list(response.data['results'][0]), ['id', 'folio'])
+        self.assertNotIn('created_at', captured.captured_queries[-1]['sql'])
+
+        response = self.client.get('/api/remissions/', {'fields': 'id,balance', 'include': 'totals'})
+        self.assertEqual(response.data['results'][2], {'id': Remission.objects.last().pk, 'balance': '31.91'})
+
+        response = self.client.get('/api/async/customers/', {'fields': 'name'})
+        self.assertEqual(json.loads(response.content)['results'][1], {'name': 'Client 2'})
+
+    def test_unknown_fields_are_rejected(self):
+        self.assertEqual(self.client.get('/api/customers/', {'fields': 'id,password'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/async/orders/', {'fields': 'nope'}).status_code, 400)
+
+    def test_renderer_matches_drf(self):
+        data = {
+            'amount': Decimal('10.50'),
+            'tiny': Decimal('0.00001'),
+            'huge': Decimal('1E+20'),
+            'date': timezone.localdate(),
+            'created_at': timezone.now(),
+            'text': 'línea\u2028separada',
+            1: [None, True, 1.5],
+        }
+        for payload in (data, {key: value for key, value in data.items() if key not in ('tiny', 'huge')}):
+            self.assertEqual(FastJSONRenderer().render(payload), JSONRenderer().render(payload))
+        self.assertEqual(
+            FastJSONRenderer().render(data, 'application/json; indent=2'),
+            JSONRenderer().render(data, 'application/json; indent=2')
+        )
+
+
+class RemissionSummaryCacheTest(TestCase):
+    """
+    Pruebas de la caché del resumen de remisión y de las peticiones condicionales.
+    """
+    def setUp(self):
+        cache.clear()
+        customer = Customer.objects.create(name="Test Client")
+        order = Order.objects.create(customer=customer, folio="ORD-001")
+        self.remission = Remission.objects.create(order=order, folio="REM-001")
+        self.url = f'/api/remissions/{self.remission.pk}/summary/'
+        with self.captureOnCommitCallbacks(execute=True):
+            Sale.objects.create(remission=self.remission, subtotal=Decimal('100.00'), tax=Decimal('16.00'))
+
+    def test_cached_summary_skips_database(self):
+        first = self.client.get(self.url)
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second['ETag'], first['ETag'])
+        self.assertEqual(second.data['total_sales'], Decimal('116.00'))
+
+    def test_matching_etag_returns_not_modified(self):
+        etag = self.client.get(self.url)['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH='"stale"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_sale_and_credit_changes_invalidate_summary(self):
+        etag = self.client.get(self.url)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            CreditAssignment.objects.create(remission=self.remission, amount=Decimal('16.00'), reason="Credit")
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data['balance'], Decimal('100.00'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Sale.objects.filter(remission=self.remission).first().delete()
+        self.assertEqual(self.client.get(self.url).data['sales_count'], 0)
+
+    def test_close_and_rebuild_invalidate_summary(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.remission.close()
+        self.assertIsNone(get_cached_summary(self.remission.pk)[1])
+
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Remission.objects.rebuild_totals()
+        self.assertIsNone(get_cached_summary(self.remission.pk)[1])
+
+    def test_invalidation_waits_for_commit(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks() as callbacks:
+            Sale.objects.create(remission=self.remission, subtotal=Decimal('10.00'), tax=Decimal('1.60'))
+            self.assertIsNotNone(get_cached_summary(self.remission.pk)[1])
+
+        for callback in callbacks:
+            callback()
+        self.assertIsNone(get_cached_summary(self.remission.pk)[1])
+
+    def test_stale_read_is_not_cached_after_invalidation(self):
+        # Un lector toma la llave y lee el resumen; una venta confirma antes de que lo guarde.
+        key, entry = get_cached_summary(self.remission.pk)
+        self.assertIsNone(entry)
+        stale = Remission.objects.get(pk=self.remission.pk).summary()
+        with self.captureOnCommitCallbacks(execute=True):
+            Sale.objects.create(remission=self.remission, subtotal=Decimal('10.00'), tax=Decimal('1.60'))
+        cache_summary(key, stale)
+
+        self.assertEqual(self.client.get(self.url).data['sales_count'], 2)
+
+    def test_leading_zeros_share_the_cached_summary(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.get(f'/api/remissions/0{self.remission.pk}/summary/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_unknown_remission_is_not_found(self):
+        self.assertEqual(self.client.get('/api/remissions/999/summary/').status_code, 404)
+        self.assertEqual(self.client.get('/api/remissions/abc/summary/').status_code, 404)
+
+
+class RemissionSummariesTest(TestCase):
+    """
+    Pruebas de los resúmenes de remisión en lote.
+    """
+    def setUp(self):
+        cache.clear()
+        self.customer = Customer.objects.create(name="Test Client")
+        self.order = Order.objects.create(customer=self.customer, folio="ORD-001")
+        other = Order.objects.create(customer=Customer.objects.create(name="Other"), folio="ORD-002")
+        self.remissions = [
+            Remission.objects.create(order=order, folio=f"REM-{index:03d}")
+            for index, order in enumerate([self.order, self.order, self.order, other])
+        ]
+        for index, remission in enumerate(self.remissions):
+            Sale.objects.create(remission=remission, subtotal=Decimal('100.10') * (index + 1), tax=Decimal('16.02'))
+        CreditAssignment.objects.create(remission=self.remissions[0], amount=Decimal('20.00'), reason="Credit")
+        self.remissions[1].close()
+
+    def summaries(self, **params):
+        response = self.client.get('/api/remissions/summaries/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_matches_single_summary(self):
+        ids = [remission.pk for remission in self.remissions]
+        with self.assertNumQueries(1):
+            data = self.summaries(ids=','.join(map(str, ids)))
+        self.assertEqual(list(data['results']), ids)
+        self.assertEqual(data['not_found'], [])
+
+        # Los ids que no están activos se buscan en el archivo.
+        with self.assertNumQueries(2):
+            self.assertEqual(self.summaries(ids=f'{ids[0]},999999')['not_found'], [999999])
+        for pk in ids:
+            self.assertEqual(data['results'][pk], self.client.get(f'/api/remissions/{pk}/summary/').data)
+
+    def test_filters_and_pages(self):
+        first, second, third, other = (remission.pk for remission in self.remissions)
+        data = self.summaries(customer=self.customer.pk, status='open')
+        self.assertEqual(list(data['results']), [first, third])
+        self.assertIsNone(data['next_after'])
+
+        data = self.summaries(order=self.order.pk, limit=2)
+        self.assertEqual(list(data['results']), [first, second])
+        self.assertEqual(data['next_after'], second)
+        data = self.summaries(order=self.order.pk, limit=2, after=second)
+        self.assertEqual(list(data['results']), [third])
+        self.assertIsNone(data['next_after'])
+
+    def test_invalid_parameters(self):
+        for params in ({}, {'ids': '1,x'}, {'ids': ','.join(map(str, range(1, 502)))}, {'status': 'pending'}):
+            response = self.client.get('/api/remissions/summaries/', params)
+            self.assertEqual(response.status_code, 400)
+
+
+class StreamingExportTest(TestCase):
+    """
+    Pruebas de las exportaciones en streaming.
+    """
+    def setUp(self):
+        customer = Customer.objects.create(name="Test Client")
+        order = Order.objects.create(customer=customer, folio="ORD-001")
+        self.remission = Remission.objects.create(order=order, folio="REM-001")
+        self.sale = Sale.objects.create(remission=self.remission, subtotal=Decimal('100.00'), tax=Decimal('16.00'))
+        CreditAssignment.objects.create(remission=self.remission, amount=Decimal('5.00'), reason="Credit, partial")
+
+    def read(self, response):
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_sales_csv_matches_serializer(self):
+        response = self.client.get('/api/exports/sales/', {'format': 'csv'})
+        rows = list(csv.DictReader(io.StringIO(self.read(response))))
+
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        expected = SaleSerializer(self.sale).data
+        self.assertEqual(rows, [{key: str(value) for key, value in expected.items()}])
+
+    def test_credits_ndjson(self):
+        response = self.client.get('/api/exports/credits/', {'format': 'ndjson', 'remission': self.remission.pk})
+        rows = [json.loads(line) for line in self.read(response).splitlines()]
+
+        self.assertEqual(rows[0]['amount'], '5.00')
+        self.assertEqual(rows[0]['reason'], 'Credit, partial')
+
+    def test_daily_sales_matches_report(self):
+        params = {'from': timezone.now().date(), 'to': timezone.now().date()}
+        report = self.client.get('/api/reports/daily-sales/', params).json()
+
+        response = self.client.get('/api/exports/daily-sales/', {**params, 'format': 'ndjson'})
+        rows = [json.loads(line) for line in self.read(response).splitlines()]
+        self.assertEqual(len(rows), len(report))
+        self.assertEqual(Decimal(rows[0]['total_sales']), Decimal(str(report[0]['total_sales'])))
+        self.assertEqual(rows[0]['sales_count'], report[0]['sales_count'])
+
+
+class SaleTotalTest(TestCase):
+    """
+    Pruebas del total de venta guardado como columna generada.
+    """
+    def setUp(self):
+        customer = Customer.objects.create(name="Test Client")
+        order = Order.objects.create(customer=customer, folio="ORD-001")
+        remission = Remission.objects.create(order=order, folio="REM-001")
+        self.sales = [
+            Sale.objects.create(remission=remission, subtotal=Decimal(subtotal), tax=Decimal(tax))
+            for subtotal, tax in (('0.10', '0.20'), ('100.00', '16.00'), ('50.00', '8.00'))
+        ]
+
+    def test_total_is_stored_and_refreshed(self):
+        self.assertEqual(self.sales[0].total, Decimal('0.30'))
+        self.assertEqual(Sale.objects.filter(total=Decimal('0.30')).get().pk, self.sales[0].pk)
+
+        response = self.client.patch(f'/api/sales/{self.sales[0].pk}/', {'subtotal': '1.00'}, content_type='application/json')
+        self.assertEqual(response.data['total'], '1.20')
+
+    def test_largest_sales_and_amount_filters(self):
+        response = self.client.get('/api/sales/', {'ordering': '-total', 'pagination': 'cursor', 'page_size': 2})
+        self.assertEqual([row['total'] for row in response.data['results']], ['116.00', '58.00'])
+
+        response = self.client.get('/api/sales/', {'min_total': '58', 'max_total': '100'})
+        self.assertEqual([row['id'] for row in response.data['results']], [self.sales[2].pk])
+        self.assertEqual(self.client.get('/api/sales/', {'min_total': 'mucho'}).status_code, 400)
+
+
+class ArchivedDataTest(TestCase):
+    """
+    Pruebas de las lecturas que incluyen las remisiones archivadas.
+    """
+    def setUp(self):
+        cache.clear()
+        self.customer = Customer.objects.create(name="Test Client")
+        order = Order.objects.create(customer=self.customer, folio="ORD-001")
+        created_at = timezone.now() - timedelta(days=40)
+        self.archived = Remission.objects.create(order=order, folio="REM-OLD", created_at=created_at)
+        Sale.objects.create(remission=self.archived, subtotal=Decimal('100.00'), tax=Decimal('16.00'), created_at=created_at)
+        CreditAssignment.objects.create(remission=self.archived, amount=Decimal('6.00'), reason="Credit", created_at=created_at)
+        self.archived.close()
+        self.active = Remission.objects.create(order=order, folio="REM-NEW")
+        Sale.objects.create(remission=self.active, subtotal=Decimal('50.00'), tax=Decimal('8.00'))
+        self.summary = self.client.get(f'/api/remissions/{self.archived.pk}/summary/').data
+
+        cache.clear()
+        call_command('archive_remissions', days=30, stdout=io.StringIO())
+        self.assertFalse(Remission.objects.filter(pk=self.archived.pk).exists())
+
+    def test_summary(self):
+        response = self.client.get(f'/api/remissions/{self.archived.pk}/summary/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, self.summary)
+
+        cache.clear()
+        response = async_to_sync(self.async_client.get)(f'/api/async/remissions/{self.archived.pk}/summary/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Decimal(str(response.json()['balance'])), Decimal('110.00'))
+
+        response = self.client.get(
+            '/api/remissions/summaries/', {'ids': f'{self.active.pk},{self.archived.pk}'}
+        )
+        self.assertEqual(response.data['results'][self.archived.pk], self.summary)
+        self.assertEqual(list(response.data['results']), [self.archived.pk, self.active.pk])
+
+        response = self.client.get('/api/remissions/summaries/', {'customer': self.customer.pk, 'status': 'closed'})
+        self.assertEqual(list(response.data['results']), [self.archived.pk])
+
+    def test_receivables(self):
+        response = self.client.get('/api/reports/receivables/')
+        row = response.data['results'][0]
+        self.assertEqual((row['total_sales'], row['total_credits'], row['balance']), ('174.00', '6.00', '168.00'))
+        self.assertEqual(row['open_remissions'], 1)
+
+        today = timezone.localdate().isoformat()
+        row = self.client.get('/api/reports/receivables/', {'from': today}).data['results'][0]
+        self.assertEqual(row['balance'], '58.00')
+
+    def test_exports(self):
+        response = self.client.get('/api/exports/sales/', {'format': 'csv'})
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual([row['remission'] for row in rows], [str(self.archived.pk), str(self.active.pk)])
+        self.assertEqual(rows[0]['total'], '116.00')
+
+        response = self.client.get('/api/exports/credits/', {'format': 'ndjson', 'remission': self.archived.pk})
+        self.assertEqual(json.loads(b''.join(response.streaming_content))['amount'], '6.00')
+
+    def test_archived_folio_is_taken(self):
+        response = self.client.post('/api/remissions/', {'order': self.active.order_id, 'folio': 'REM-OLD'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('folio', response.data)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'El índice de búsqueda usa FTS5 de SQLite')
+class SearchTest(TestCase):
+    """
+    Pruebas de la búsqueda sobre el índice FTS5.
+    """
+    def setUp(self):
+        self.maria = Customer.objects.create(name="María López", email="maria@example.com")
+        self.mario = Customer.objects.create(name="Mario Ruiz", email="ventas@lopez.mx")
+        self.order = Order.objects.create(customer=self.maria, folio="ORD-2024-000123")
+        self.remission = Remission.objects.create(order=self.order, folio="REM-2024-000123-A")
+
+    def search(self, **params):
+        response = self.client.get('/api/search/', params)
+        self.assertEqual(response.status_code, 200)
+        return [(row['type'], row['id']) for row in response.data['results']]
+
+    def test_partial_folio_and_type_filter(self):
+        self.assertEqual(
+            self.search(q='000123'), [('order', self.order.pk), ('remission', self.remission.pk)]
+        )
+        self.assertEqual(self.search(q='2024-000123-a'), [('remission', self.remission.pk)])
+        self.assertEqual(self.search(q='000123', type='remission'), [('remission', self.remission.pk)])
+
+    def test_ranking(self):
+        ana = Customer.objects.create(name="Ana Marino", email="ana@example.com")
+        # Primero el nombre que empieza con la búsqueda, luego la coincidencia en otra parte
+        # del nombre y al final la del correo ("María" lleva acento).
+        self.assertEqual(
+            self.search(q='mari'),
+            [('customer', self.mario.pk), ('customer', ana.pk), ('customer', self.maria.pk)]
+        )
+        self.assertEqual(self.search(q='mar ru'), [('customer', self.mario.pk)])
+        self.assertEqual(self.search(q='lopez'), [('customer', self.mario.pk)])
+
+    def test_index_follows_writes(self):
+        self.mario.name = "Mario Pérez"
+        self.mario.save()
+        self.assertEqual(self.search(q='ruiz'), [])
+        self.assertEqual(self.search(q='pérez'), [('customer', self.mario.pk)])
+
+        Remission.objects.filter(pk=self.remission.pk).delete()
+        self.assertEqual(self.search(q='REM-2024'), [])
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.client.get('/api/search/', {'q': 'ab'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/search/', {'q': 'maria', 'type': 'sale'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/search/', {'q': '"OR*'}).data['results'], [])
+
+
+class ChangesFeedTest(TestCase):
+    """
+    Pruebas del feed de cambios por cursor.
+    """
+    def setUp(self):
+        customer = Customer.objects.create(name="Cliente Feed")
+        self.order = Order.objects.create(customer=customer, folio="ORD-FEED")
+        self.remission = Remission.objects.create(order=self.order, folio="REM-FEED")
+
+    def changes(self, resource, cursor=None, limit=500):
+        params = {'resource': resource, 'limit': limit}
+        if cursor:
+            params['cursor'] = cursor
+        response = self.client.get('/api/changes/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_pages_follow_the_cursor(self):
+        sales = [
+            Sale.objects.create(remission=self.remission, subtotal=Decimal('10.00'), tax=Decimal('1.60'))
+            for _ in range(3)
+        ]
+        first = self.changes('sales', limit=2)
+        self.assertEqual([change['id'] for change in first['results']], [sales[0].pk, sales[1].pk])
+        self.assertTrue(first['has_more'])
+        self.assertEqual(first['results'][0]['op'], 'upsert')
+        self.assertEqual(first['results'][0]['record'], SaleSerializer(sales[0]).data)
+
+        second = self.changes('sales', first['next_cursor'], limit=2)
+        self.assertEqual([change['id'] for change in second['results']], [sales[2].pk])
+        self.assertFalse(second['has_more'])
+
+        # Sin cambios nuevos el cursor no avanza.
+        third = self.changes('sales', second['next_cursor'])
+        self.assertEqual(third['results'], [])
+        self.assertEqual(third['next_cursor'], second['next_cursor'])
+
+    def test_updates_and_deletes(self):
+        cursors = {resource: self.changes(resource)['next_cursor'] for resource in ('orders', 'remissions', 'sales')}
+
+        # Los totales acumulados se actualizan sin save() y aun así mueven la remisión en el feed.
+        sale = Sale.objects.create(remission=self.remission, subtotal=Decimal('10.00'), tax=Decimal('1.60'))
+        [change] = self.changes('remissions', cursors['remissions'])['results']
+        self.assertEqual(change['id'], self.remission.pk)
+        self.assertEqual(change['record']['total_sales'], '11.60')
+        cursors['remissions'] = self.changes('remissions', cursors['remissions'])['next_cursor']
+
+        Remission.objects.close_targets(ids=[self.remission.pk]).close_many([self.remission.pk])
+        [change] = self.changes('remissions', cursors['remissions'])['results']
+        self.assertEqual(change['record']['status'], 'closed')
+
+        # Un borrado en cascada deja un tombstone por cada registro.
+        deleted = (('orders', self.order.pk), ('remissions', self.remission.pk), ('sales', sale.pk))
+        self.order.delete()
+        for resource, pk in deleted:
+            changes = self.changes(resource, cursors[resource])['results']
+            self.assertEqual(changes[-1]['op'], 'delete')
+            self.assertEqual(changes[-1]['id'], pk)
+            self.assertNotIn('record', changes[-1])
+
+    def test_order_does_not_depend_on_timestamps(self):
+        cursor = self.changes('orders')['next_cursor']
+        # Una escritura con una fecha anterior al cursor (como la de una transacción que tomó
+        # su hora antes de esperar el bloqueo) sigue quedando adelante de él.
+        Order.objects.filter(pk=self.order.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+        [change] = self.changes('orders', cursor)['results']
+        self.assertEqual(change['id'], self.order.pk)
+
+    def test_saving_a_stale_instance_moves_it_forward(self):
+        for stale in (Remission.objects.get(pk=self.remission.pk), Order.objects.get(pk=self.order.pk)):
+            with self.subTest(model=type(stale).__name__):
+                # Otra escritura avanza la fila después de cargar la instancia.
+                if isinstance(stale, Remission):
+                    Sale.objects.create(remission=self.remission, subtotal=Decimal('10.00'), tax=Decimal('1.60'))
+                else:
+                    Order.objects.filter(pk=self.order.pk).update(updated_at=timezone.now())
+                model = type(stale)
+                position = model.objects.get(pk=stale.pk).change_seq
+                self.assertGreater(position, stale.change_seq)
+
+                stale.save()
+                self.assertGreater(model.objects.get(pk=stale.pk).change_seq, position)
+                entries, _, _ = changes(RESOURCES[model], encode_cursor(position))
+                self.assertIn(stale.pk, [pk for _, _, pk, deleted in entries if not deleted])
+
+    @skipUnless(connection.vendor == 'sqlite', 'Triggers de SQLite')
+    def test_update_triggers_cover_every_column(self):
+        # Una columna nueva que falte en el trigger no movería la fila en el feed al cambiar.
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT tbl_name, sql FROM sqlite_master WHERE type = 'trigger' AND name LIKE '%_change_update'")
+            triggers = dict(cursor.fetchall())
+        for model in FEEDS.values():
+            columns = {field.column for field in model._meta.concrete_fields} - {'change_seq'}
+            trigger = triggers[model._meta.db_table]
+            listed = trigger.split(' UPDATE OF ', 1)[1].split(' ON ', 1)[0]
+            self.assertEqual(set(listed.split(', ')), columns, model._meta.db_table)
+
+    def test_invalid_cursor_and_resource(self):
+        response = self.client.get('/api/changes/', {'resource': 'orders', 'cursor': 'no-es-un-cursor'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get('/api/changes/', {'resource': 'customers'})
+        self.assertEqual(response.status_code, 400)
+
+
+class JobApiTest(TestCase):
+    """
+    Pruebas de los endpoints de trabajos en segundo plano.
+    """
+    def setUp(self):
+        customer = Customer.objects.create(name="Test Client")
+        self.order = Order.objects.create(customer=customer, folio="ORD-001")
+        self.remission = Remission.objects.create(order=self.order, folio="REM-001")
+        Sale.objects.create(remission=self.remission, subtotal=Decimal('100.00'), tax=Decimal('16.00'))
+        self.results_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.results_dir.cleanup)
+        self.enterContext(self.settings(JOB_RESULTS_DIR=self.results_dir.name))
+
+    def run_next_job(self):
+        self.assertTrue(run_job(Job.objects.claim('test')))
+
+    def test_submit_status_and_result(self):
+        response = self.client.post(
+            '/api/jobs/', {'kind': 'close_remissions', 'params': {'order': self.order.pk}}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['status'], 'queued')
+        url = f'/api/jobs/{response.data["id"]}/'
+
+        self.assertEqual(self.client.get(url + 'result/').status_code, 409)
+        self.assertEqual(Remission.objects.get(pk=self.remission.pk).status, 'open')
+
+        self.run_next_job()
+        status = self.client.get(url).data
+        self.assertEqual((status['status'], status['progress'], status['progress_total']), ('succeeded', 1, 1))
+        self.assertEqual(self.client.get(url + 'result/').data['closed'], 1)
+
+    def test_params_are_validated_per_kind(self):
+        for payload in (
+            {'kind': 'unknown'},
+            {'kind': 'close_remissions', 'params': {}},
+            {'kind': 'rebuild_daily_rollup', 'params': {'date_from': '2025-02-01', 'date_to': '2025-01-01'}},
+            {'kind': 'export', 'params': {'dataset': 'daily-sales', 'format': 'csv'}},
+        ):
+            response = self.client.post('/api/jobs/', payload, content_type='application/json')
+            self.assertEqual(response.status_code, 400, payload)
+        self.assertFalse(Job.objects.exists())
+
+    def test_export_job_matches_streaming_export(self):
+        today = timezone.localdate().isoformat()
+        response = self.client.post('/api/jobs/', {
+            'kind': 'export', 'params': {'dataset': 'daily-sales', 'format': 'ndjson', 'date_from': today, 'date_to': today}
+        }, content_type='application/json')
+        self.run_next_job()
+
+        result = self.client.get(f'/api/jobs/{response.data["id"]}/result/')
+        self.assertEqual(result['Content-Disposition'], 'attachment; filename="daily-sales.ndjson"')
+        expected = self.client.get('/api/exports/daily-sales/', {'from': today, 'to': today, 'format': 'ndjson'})
+        self.assertEqual(b''.join(result.streaming_content), b''.join(expected.streaming_content))
+        self.assertEqual(Job.objects.get().result['rows'], 1)
+
+    def test_failed_job_reports_error(self):
+        job = Job.objects.submit('unknown', max_attempts=1)
+        with self.assertLogs('business.jobs', 'ERROR'):
+            run_job(Job.objects.claim('test'))
+        response = self.client.get(f'/api/jobs/{job.pk}/result/')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['status'], 'failed')
+        self.assertIn('LookupError', response.data['error'])
+
+
+class AsyncViewsTest(TestCase):
+    """
+    Pruebas de las vistas asíncronas: mismas respuestas que sus equivalentes síncronas.
+    """
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+        customers = Customer.objects.bulk_create(Customer(name=f"Client {i}") for i in range(12))
+        order = Order.objects.create(customer=customers[0], folio="ORD-001")
+        self.remission = Remission.objects.create(order=order, folio="REM-001")
+        Sale.objects.create(remission=self.remission, subtotal=Decimal('100.00'), tax=Decimal('16.00'))
+        CreditAssignment.objects.create(remission=self.remission, amount=Decimal('20.00'), reason="Credit")
+        DailySalesRollup.objects.create(
+            date=timezone.localdate() - timedelta(days=3),
+            subtotal=Decimal('50.00'), tax=Decimal('8.00'), sales_count=2
+        )
+
+    def assertSameResponse(self, path, params=None):
+        sync_response = self.client.get(f'/api{path}', params)
+        async_response = self.client.get(f'/api/async{path}', params)
+        self.assertEqual(async_response.status_code, sync_response.status_code)
+        self.assertEqual(
+            json.loads(async_response.content.decode().replace('/api/async/', '/api/')),
+            json.loads(sync_response.content)
+        )
+        return async_response
+
+    def test_lists_match_sync_views(self):
+        self.assertSameResponse('/customers/')
+        response = self.assertSameResponse('/customers/', {'page': 2})
+        self.assertIn('/api/async/customers/', json.loads(response.content)['previous'])
+        self.assertSameResponse('/customers/', {'page': 5})
+        self.assertSameResponse('/orders/')
+        self.assertSameResponse('/remissions/')
+
+    def test_summary_and_report_match_sync_views(self):
+        response = self.assertSameResponse(f'/remissions/{self.remission.pk}/summary/')
+        self.assertEqual(
+            self.client.get(f'/api/async/remissions/{self.remission.pk}/summary/',
+                            HTTP_IF_NONE_MATCH=response['ETag']).status_code,
+            304
+        )
+        self.assertSameResponse('/remissions/999/summary/')
+
+        today = timezone.localdate()
+        report = self.assertSameResponse(
+            '/reports/daily-sales/', {'from': str(today - timedelta(days=7)), 'to': str(today)}
+        )
+        self.assertEqual(len(json.loads(report.content)), 2)
+        self.assertSameResponse('/reports/daily-sales/', {'from': '2024-01-01'})
+
+    def test_async_requests_are_measured(self):
+        self.client.get('/api/async/remissions/')
+        body = self.client.get('/metrics').content.decode()
+        self.assertIn('http_requests_db_queries_total{route="async-remission-list",method="GET"} 2', body)
+
+
+async def asgi_get(application, path, query_string=''):
+    """
+    Envía un GET directamente a la aplicación ASGI y retorna (status, body).
+    """
+    communicator = ApplicationCommunicator(application, {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': query_string.encode(),
+        'root_path': '',
+        'headers': [(b'host', b'testserver')],
+        'client': ('127.0.0.1', 10000),
+        'server': ('testserver', 80),
+    })
+    await communicator.send_input({'type': 'http.request', 'body': b''})
+    start = await communicator.receive_output(10)
+    body = await communicator.receive_output(10)
+    return start['status'], body['body']
+
+
+class AsyncConcurrencyTest(TransactionTestCase):
+    """
+    Con consultas lentas, un solo proceso ASGI atiende las peticiones del reporte en paralelo,
+    mientras que un worker WSGI las atiende una tras otra.
+    """
+    REQUESTS = 10
+    QUERY_DELAY = 0.05
+
+    def slow_execute(self):
+        execute = CursorWrapper.execute
+
+        def wrapper(cursor, *args, **kwargs):
+            time.sleep(self.QUERY_DELAY)
+            return execute(cursor, *args, **kwargs)
+        return mock.patch.object(CursorWrapper, 'execute', wrapper)
+
+    def test_asgi_serves_slow_reports_concurrently(self):
+        query = 'from=2024-01-01&to=2024-01-31'
+        application = ASGIHandler()
+
+        async def concurrent_requests():
+            return await asyncio.gather(*(
+                asgi_get(application, '/api/async/reports/daily-sales/', query) for _ in range(self.REQUESTS)
+            ))
+
+        with self.slow_execute():
+            started = time.perf_counter()
+            responses = async_to_sync(concurrent_requests)()
+            asgi_elapsed = time.perf_counter() - started
+
+            started = time.perf_counter()
+            for _ in range(self.REQUESTS):
+                self.client.get(f'/api/reports/daily-sales/?{query}')
+            wsgi_elapsed = time.perf_counter() - started
+
+        self.assertEqual({status for status, body in responses}, {200})
+        self.assertGreaterEqual(wsgi_elapsed, self.REQUESTS * self.QUERY_DELAY)
+        self.assertLess(asgi_elapsed, wsgi_elapsed / 3)
+
+
+class DatabaseTuningTest(TestCase):
+    """
+    Pruebas de la configuración de SQLite y del ruteo hacia el alias de lectura.
+    """
+    @skipUnless(connection.vendor == 'sqlite', 'Pragmas de SQLite')
+    def test_pragmas_are_applied_on_connect(self):
+        with connection.cursor() as cursor:
+            pragmas = {}
+            for name in ('synchronous', 'cache_size', 'busy_timeout', 'temp_store'):
+                cursor.execute(f'PRAGMA {name}')
+                pragmas[name] = cursor.fetchone()[0]
+        self.assertEqual(pragmas, {'synchronous': 1, 'cache_size': -20000, 'busy_timeout': 5000, 'temp_store': 2})
+        self.assertEqual(connection.transaction_mode, 'IMMEDIATE')
+
+        # Las bases en memoria no admiten WAL; se verifica con un archivo.
+        with tempfile.TemporaryDirectory() as directory:
+            wrapper = DatabaseWrapper({**connection.settings_dict, 'NAME': os.path.join(directory, 'db.sqlite3')})
+            try:
+                with wrapper.cursor() as cursor:
+                    cursor.execute('PRAGMA journal_mode')
+                    self.assertEqual(cursor.fetchone()[0], 'wal')
+            finally:
+                wrapper.close()
+
+    def test_writes_stay_on_primary(self):
+        router = PrimaryReplicaRouter()
+        remission = Remission(folio="REM-001")
+        remission._state.db = 'replica'
+        self.assertEqual(router.db_for_write(Remission, instance=remission), 'default')
+        self.assertIsNone(router.db_for_read(Remission))
+        self.assertFalse(router.allow_migrate('replica', 'business'))
+        self.assertTrue(router.allow_migrate('default', 'business'))
+
+    def test_read_alias_uses_replica_when_configured(self):
+        self.assertEqual(read_alias(), 'default')
+        with mock.patch.dict(settings.DATABASES, {'replica': {}}):
+            self.assertEqual(read_alias(), 'replica')
+
+    def test_reports_read_from_read_alias(self):
+        customer = Customer.objects.create(name="Test Client")
+        order = Order.objects.create(customer=customer, folio="ORD-001")
+        remission = Remission.objects.create(order=order, folio="REM-001")
+        cache.clear()
+
+        with mock.patch('api.views.read_alias', return_value='reports'), \
+                mock.patch('api.async_views.read_alias', return_value='reports'):
+            for url in (
+                f'/api/remissions/summaries/?ids={remission.pk}',
+                '/api/reports/daily-sales/?from=2024-01-01&to=2024-01-31',
+            ):
+                with self.subTest(url=url), self.assertRaises(ConnectionDoesNotExist):
+                    self.client.get(url)
+
+            # El resumen se guarda en caché: se llena desde la base principal, no desde la réplica.
+            for url in (f'/api/remissions/{remission.pk}/summary/', f'/api/async/remissions/{remission.pk}/summary/'):
+                cache.clear()
+                self.assertEqual(self.client.get(url).status_code, 200)
+
+            # El cierre escribe y bloquea la fila en la base principal.
+            self.assertEqual(self.client.post(f'/api/remissions/{remission.pk}/close/').status_code, 400)
@@ -1,14 +1,37 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import CustomerViewSet, OrderViewSet, RemissionViewSet, DailySalesReportViewSet
+from . import async_views
+from .views import (
+    CustomerViewSet, OrderViewSet, RemissionViewSet, SaleViewSet, CreditAssignmentViewSet,
+    IngestViewSet, DailySalesReportViewSet, ReceivablesReportViewSet, ExportViewSet,
+    JobViewSet, SearchViewSet, ChangesViewSet
+)
 
 router = DefaultRouter()
 
 router.register(r'customers', CustomerViewSet)
 router.register(r'orders', OrderViewSet)
 router.register(r'remissions', RemissionViewSet)
+router.register(r'sales', SaleViewSet)
+router.register(r'credits', CreditAssignmentViewSet)
+router.register(r'ingest', IngestViewSet, basename='ingest')
 router.register(r'reports/daily-sales', DailySalesReportViewSet, basename='daily-sales')
+router.register(r'reports/receivables', ReceivablesReportViewSet, basename='receivables')
+router.register(r'exports', ExportViewSet, basename='exports')
+router.register(r'jobs', JobViewSet)
+router.register(r'search', SearchViewSet, basename='search')
+router.register(r'changes', ChangesViewSet, basename='changes')
+
+# Versiones asíncronas de los endpoints de lectura, para servir con ASGI (ver api/async_views.py).
+async_urlpatterns = [
+    path('customers/', async_views.customer_list, name='async-customer-list'),
+    path('orders/', async_views.order_list, name='async-order-list'),
+    path('remissions/', async_views.remission_list, name='async-remission-list'),
+    path('remissions/<int:pk>/summary/', async_views.remission_summary, name='async-remission-summary'),
+    path('reports/daily-sales/', async_views.daily_sales_report, name='async-daily-sales'),
+]
 
 urlpatterns = [
+    path('async/', include(async_urlpatterns)),
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -1,31 +1,89 @@
-from rest_framework import viewsets, status
+from rest_framework import mixins, serializers, viewsets, status
 from rest_framework.decorators import action
+from rest_framework.filters import OrderingFilter
 from rest_framework.response import Response
 from django.core.exceptions import ValidationError
-from django.db.models import Sum, Count
-from business.models import Customer, Order, Remission, Sale
-from .serializers import CustomerSerializer, OrderSerializer, RemissionSerializer
-from django.db.models.functions import TruncDate
+from django.db import transaction
+from django.http import FileResponse, Http404
+from django.utils.dateparse import parse_date
+from django.utils.http import parse_etags
+from business.cache import get_cached_summary, cache_summary
+from business.changes import FEEDS, changes
+from business.search import search
+from core.routers import read_alias
+from business.models import (
+    Customer, Order, Remission, ArchivedRemission, Sale, CreditAssignment, DailySalesRollup, Job
+)
+from .exports import CSVRenderer, NDJSONRenderer, export_rows, streaming_export
+from .filters import RemissionFilter, SaleFilter
+from .jobs import result_path
+from .pagination import OptionalCursorPagination
+from .rows import ValuesSerializer
+from .serializers import (
+    CustomerSerializer, CustomerReceivableSerializer, OrderSerializer, RemissionSerializer, RemissionTotalsSerializer, BulkCloseSerializer,
+    SaleSerializer, CreditAssignmentSerializer, SaleBulkSerializer, CreditAssignmentBulkSerializer,
+    IngestSerializer, JobSerializer, SearchSerializer, ChangesSerializer, RemissionSummariesSerializer,
+    BATCH_SIZE, MAX_BULK_ITEMS
+)
 
-class CustomerViewSet(viewsets.ModelViewSet):
+class ValuesListMixin:
+    """
+    Listado de sólo lectura que arma las filas desde .values() con ValuesSerializer
+    (ver api/rows.py) en lugar de instanciar modelos y serializers por fila. La salida es
+    idéntica a la del serializer de la vista; con ?fields=id,folio se limita a esos campos
+    y la consulta sólo lee sus columnas.
+    """
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        fields = request.query_params.get('fields')
+        rows = ValuesSerializer(
+            self.get_serializer_class(),
+            fields.split(',') if fields else None,
+            context=self.get_serializer_context(),
+            annotations=queryset.query.annotation_select
+        )
+        position_fields = getattr(self.paginator, 'position_fields', None)
+        queryset = rows.values(queryset, extra=position_fields(request, queryset, self) if position_fields else ())
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(rows.many(page))
+        return Response(rows.many(queryset))
+
+
+class CustomerViewSet(ValuesListMixin, viewsets.ModelViewSet):
     queryset = Customer.objects.all()
     serializer_class = CustomerSerializer
+    pagination_class = OptionalCursorPagination
     
-class OrderViewSet(viewsets.ModelViewSet):
+class OrderViewSet(ValuesListMixin, viewsets.ModelViewSet):
     """
     ViewSet para la gestión de Órdenes.
     Utiliza select_related para optimizar la carga del cliente asociado y evitar N+1.
     """
     queryset = Order.objects.select_related('customer').all()
     serializer_class = OrderSerializer
+    pagination_class = OptionalCursorPagination
     
-class RemissionViewSet(viewsets.ModelViewSet):
+class RemissionViewSet(ValuesListMixin, viewsets.ModelViewSet):
     """
     ViewSet para la gestión de Remisiones.
-    Implementa select_related y prefetch_related para optimizar las consultas y evitar N+1.
+    El serializer sólo usa columnas de la remisión, por lo que cada página es una sola consulta.
+    Con ?include=totals se agregan los totales acumulados de cada remisión, y el listado se
+    puede filtrar por estado y saldo (?status=, ?min_balance=, ?max_balance=) y ordenar con
+    ?ordering= (por ejemplo ?status=open&min_balance=0.01&ordering=-balance).
     """
-    queryset = Remission.objects.select_related('order__customer').prefetch_related('sales', 'credits').all()
+    queryset = Remission.objects.with_balance()
     serializer_class = RemissionSerializer
+    pagination_class = OptionalCursorPagination
+    filter_backends = [RemissionFilter, OrderingFilter]
+    ordering_fields = ['id', 'folio', 'status', 'created_at', 'balance']
+    ordering = ['id']
+
+    def get_serializer_class(self):
+        if 'totals' in self.request.query_params.get('include', '').split(','):
+            return RemissionTotalsSerializer
+        return super().get_serializer_class()
     
     @action(detail=True, methods=['post'])
     def close(self, request, pk=None):
@@ -35,53 +93,382 @@ class RemissionViewSet(viewsets.ModelViewSet):
             return Response({'message': 'Remisión cerrada'}, status=status.HTTP_200_OK)
         except ValidationError as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    @action(detail=False, methods=['post'], url_path='bulk-close')
+    def bulk_close(self, request):
+        """
+        Cierra en bloque una lista de remisiones o las remisiones abiertas que cumplan un filtro.
+        Retorna el resultado por id.
+        """
+        serializer = BulkCloseSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+
+        results = Remission.objects.close_targets(**params).close_many(params.get('ids'))
+        closed = sum(1 for result in results if result['status'] == 'closed')
+
+        return Response({
+            'closed': closed,
+            'failed': sum(1 for result in results if result['status'] in ('invalid', 'not_found')),
+            'results': results
+        })
         
     @action(detail=True, methods=['get'])
     def summary(self, request, pk=None):
         """
-        Genera un resumen de la remisión.
+        Genera un resumen de la remisión a partir de sus totales acumulados.
+
+        El resumen se sirve desde la caché mientras la remisión no cambie y lleva un ETag;
+        si el cliente envía If-None-Match con el mismo ETag se responde 304 sin consultar
+        la base de datos. Las remisiones archivadas conservan su resumen. Al llenar la caché
+        se lee de la base principal: una réplica atrasada dejaría guardados totales viejos.
         """
-        remission = self.get_object()
-        
-        sales_data = remission.sales.aggregate(
-            total_sales = Sum('subtotal') + Sum('tax'),
-            sales_count = Count('id')
-        )
-        
-        total_credits = remission.credits.aggregate(total=Sum('amount'))['total'] or 0
-        total_sales = sales_data['total_sales'] or 0
-        
-        return Response({
-            'total_sales': total_sales,
-            'total_credits': total_credits,
-            'balance': total_sales - total_credits,
-            'sales_count': sales_data['sales_count']
-        })
+        if not str(pk).isdigit():
+            raise Http404
+        key, entry = get_cached_summary(pk)
+        if entry is None:
+            try:
+                remission = self.get_object()
+            except Http404:
+                remission = ArchivedRemission.objects.filter(pk=pk).first()
+                if remission is None:
+                    raise
+            entry = cache_summary(key, remission.summary())
+
+        if etag_matches(request, entry['etag']):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(entry['data'])
+        response['ETag'] = entry['etag']
+        return response
+
+    @action(detail=False, methods=['get'])
+    def summaries(self, request):
+        """
+        Resúmenes de varias remisiones en una sola petición, con los mismos números que
+        summary/: ?ids=1,2,3 (hasta 500) o un filtro ?order=, ?customer=, ?status= (por ejemplo
+        ?customer=7&status=open), combinables. Se leen de los totales acumulados con una
+        consulta sobre las remisiones y, si hace falta, otra sobre las archivadas.
+
+        Retorna {"results": {id: resumen}} más "not_found" (los ids que no existen) o, con
+        filtro, "next_after": el valor de ?after= para la siguiente página (null al terminar).
+        """
+        serializer = RemissionSummariesSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+        ids = params.get('ids')
+        limit = len(ids) if ids is not None else params['limit']
+
+        remissions = []
+        for model in (Remission, ArchivedRemission):
+            # Las remisiones archivadas siempre están cerradas.
+            if model is ArchivedRemission and params.get('status') == 'open':
+                continue
+            queryset = self.summaries_queryset(model, params)
+            if ids is not None:
+                found = {remission.pk for remission in remissions}
+                if len(found) == len(ids):
+                    break
+                queryset = queryset.filter(pk__in=[pk for pk in ids if pk not in found])
+            remissions += queryset[:limit + 1]
+
+        remissions.sort(key=lambda remission: remission.pk)
+        has_more = len(remissions) > limit
+        remissions = remissions[:limit]
+
+        data = {'results': {remission.pk: remission.summary() for remission in remissions}}
+        if ids is not None:
+            data['not_found'] = [pk for pk in ids if pk not in data['results']]
+        else:
+            data['next_after'] = remissions[-1].pk if has_more else None
+        return Response(data)
+
+    def summaries_queryset(self, model, params):
+        """
+        Remisiones activas o archivadas del filtro, en orden de id y leyendo sólo sus totales.
+        """
+        queryset = model.objects.using(read_alias()).only(*Remission.TOTAL_FIELDS).order_by('pk')
+        if 'after' in params:
+            queryset = queryset.filter(pk__gt=params['after'])
+        if 'order' in params:
+            queryset = queryset.filter(order_id=params['order'])
+        if 'customer' in params:
+            # Las archivadas guardan el cliente; las activas lo toman de su orden.
+            customer = 'customer_id' if model is ArchivedRemission else 'order__customer_id'
+            queryset = queryset.filter(**{customer: params['customer']})
+        if 'status' in params:
+            queryset = queryset.filter(status=params['status'])
+        return queryset
+
+def etag_matches(request, etag):
+    """
+    Indica si el ETag coincide con el encabezado If-None-Match de la petición.
+    """
+    if_none_match = parse_etags(request.headers.get('If-None-Match', ''))
+    return etag in if_none_match or '*' in if_none_match
+
+
+class BulkCreateMixin:
+    """
+    Agrega la acción POST bulk/ para insertar un arreglo de elementos en una sola transacción.
+    """
+    bulk_serializer_class = None
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        serializer = self.bulk_serializer_class(data=request.data, many=True, max_length=MAX_BULK_ITEMS)
+        with transaction.atomic():
+            if not serializer.is_valid():
+                return Response({'errors': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+            serializer.save()
+        return Response({'created': len(serializer.instance)}, status=status.HTTP_201_CREATED)
+
+
+class SaleViewSet(BulkCreateMixin, viewsets.ModelViewSet):
+    """
+    Ventas. Acepta ?min_total=, ?max_total= y ?ordering= (id, created_at, total); las ventas
+    más grandes son ?ordering=-total. El total es una columna indexada.
+    """
+    queryset = Sale.objects.all()
+    serializer_class = SaleSerializer
+    bulk_serializer_class = SaleBulkSerializer
+    pagination_class = OptionalCursorPagination
+    filter_backends = [SaleFilter, OrderingFilter]
+    ordering_fields = ['id', 'created_at', 'total']
+    ordering = ['id']
+
+
+class CreditAssignmentViewSet(BulkCreateMixin, viewsets.ModelViewSet):
+    queryset = CreditAssignment.objects.all()
+    serializer_class = CreditAssignmentSerializer
+    bulk_serializer_class = CreditAssignmentBulkSerializer
+    pagination_class = OptionalCursorPagination
+
+
+class IngestViewSet(viewsets.ViewSet):
+    def create(self, request):
+        """
+        Carga masiva anidada de órdenes, remisiones, ventas y créditos en una sola transacción.
+        """
+        serializer = IngestSerializer(data=request.data)
+        with transaction.atomic():
+            if not serializer.is_valid():
+                return Response({'errors': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+            created = serializer.save()
+        return Response({'created': created}, status=status.HTTP_201_CREATED)
+
+
+def parse_date_range(request, required=True):
+    """
+    Lee los parámetros "from" y "to" de la petición.
+    Retorna (date_from, date_to, error); las fechas ausentes son None cuando no son obligatorias.
+    Acepta tanto peticiones de DRF como de Django (vistas asíncronas).
+    """
+    date_from = request.GET.get('from')
+    date_to = request.GET.get('to')
+
+    if required and (not date_from or not date_to):
+        return None, None, 'Los parametros "from" y "to" son necesarios para ejecutar esta acción'
+
+    try:
+        parsed_from = parse_date(date_from) if date_from else None
+        parsed_to = parse_date(date_to) if date_to else None
+    except ValueError:
+        parsed_from = parsed_to = None
+
+    if (date_from and not parsed_from) or (date_to and not parsed_to):
+        return None, None, 'Los parametros "from" y "to" deben ser fechas con formato YYYY-MM-DD'
+
+    return parsed_from, parsed_to, None
+
 
 class DailySalesReportViewSet(viewsets.ViewSet):
     def list(self, request):
         """
         Retorna un listado de ventas agrupado por fecha dentro de un rango determinado.
+        Se sirve desde el acumulado diario, agregando en vivo el día en curso.
         """
-        date_from = request.query_params.get('from')
-        date_to = request.query_params.get('to')
-        
-        if not date_from or not date_to:
-            return Response(
-                {'error': 'Los parametros "from" y "to" son necesarios para ejecutar esta acción'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-            
-        report = (
-            Sale.objects.filter(created_at__date__range=[date_from,date_to])
-            .annotate(date=TruncDate('created_at'))
-            .values('date')
-            .annotate(
-                total_sales=Sum('subtotal') + Sum('tax'),
-                total_tax=Sum('tax'),
-                sales_count=Count('id')
+        date_from, date_to, error = parse_date_range(request)
+        if error:
+            return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(DailySalesRollup.objects.using(read_alias()).report(date_from, date_to))
+
+
+class ReceivablesReportViewSet(ValuesListMixin, viewsets.GenericViewSet):
+    """
+    Cartera por cliente: remisiones abiertas, total vendido, total acreditado y saldo de todas
+    sus órdenes, calculados en una sola consulta agrupada sobre los totales acumulados de las
+    remisiones. Filtros: "from"/"to" (fecha de creación de la remisión) e "is_active".
+    Se ordena por saldo descendente por defecto (?ordering= para cambiarlo) y se pagina
+    como los demás listados.
+    """
+    serializer_class = CustomerReceivableSerializer
+    pagination_class = OptionalCursorPagination
+    filter_backends = [OrderingFilter]
+    ordering_fields = ['id', 'name', 'open_remissions', 'total_sales', 'total_credits', 'balance']
+    ordering = ['-balance', 'id']
+
+    def get_customers(self):
+        customers = Customer.objects.using(read_alias())
+        is_active = self.request.query_params.get('is_active')
+        if is_active:
+            if is_active not in ('true', 'false'):
+                raise serializers.ValidationError({'is_active': 'Debe ser "true" o "false"'})
+            customers = customers.filter(is_active=is_active == 'true')
+        return customers
+
+    def get_queryset(self):
+        date_from, date_to, error = parse_date_range(self.request, required=False)
+        if error:
+            raise serializers.ValidationError({'error': error})
+        return self.get_customers().with_receivables(date_from, date_to)
+
+    def get_count_queryset(self):
+        # Hay una fila por cliente: el total se cuenta sin los JOIN ni el GROUP BY de los totales.
+        return self.get_customers()
+
+
+class SearchViewSet(viewsets.ViewSet):
+    def list(self, request):
+        """
+        Busca clientes por nombre o correo y órdenes y remisiones (incluidas las archivadas)
+        por folio, completo o parcial, sobre el índice FTS5 de business/search.py.
+        Parámetros: "q", "type" (customer, order o remission) y "limit" (hasta 100).
+        """
+        serializer = SearchSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+
+        kinds = [params['type']] if 'type' in params else None
+        return Response({'results': search(params['q'], kinds, params['limit'], using=read_alias())})
+
+
+class ChangesViewSet(viewsets.ViewSet):
+    """
+    Feed de cambios de órdenes, remisiones (con sus totales), ventas y créditos para
+    sincronizar copias externas (ver business/changes.py).
+
+    Parámetros: "resource" (orders, remissions, sales o credits), "cursor" (el next_cursor de
+    la respuesta anterior; sin él se empieza desde el principio) y "limit" (hasta 5000). Cada
+    cambio es {"op": "upsert", "id", "changed_at", "record"} con el registro como lo entrega
+    su endpoint, o {"op": "delete", "id", "changed_at"}. Se lee del primario: una réplica
+    atrasada haría avanzar el cursor sobre cambios que todavía no tiene.
+    """
+    serializer_classes = {
+        'orders': OrderSerializer,
+        'remissions': RemissionTotalsSerializer,
+        'sales': SaleSerializer,
+        'credits': CreditAssignmentSerializer,
+    }
+
+    def list(self, request):
+        serializer = ChangesSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+        resource = params['resource']
+
+        entries, cursor, has_more = changes(resource, params.get('cursor'), params['limit'])
+
+        rows = ValuesSerializer(self.serializer_classes[resource])
+        ids = [pk for _, _, pk, deleted in entries if not deleted]
+        records = {}
+        for start in range(0, len(ids), BATCH_SIZE):
+            queryset = FEEDS[resource].objects.filter(pk__in=ids[start:start + BATCH_SIZE])
+            records.update((row['id'], rows.to_representation(row)) for row in rows.values(queryset))
+
+        timestamp = serializers.DateTimeField()
+        results = []
+        for _, changed_at, pk, deleted in entries:
+            change = {
+                'op': 'delete' if deleted else 'upsert', 'id': pk, 'changed_at': timestamp.to_representation(changed_at)
+            }
+            if not deleted:
+                if pk not in records:
+                    # Se borró después de leer el feed; su borrado llega en una página posterior.
+                    continue
+                change['record'] = records[pk]
+            results.append(change)
+
+        return Response({'results': results, 'next_cursor': cursor, 'has_more': has_more})
+
+
+class ExportViewSet(viewsets.ViewSet):
+    """
+    Exportaciones en streaming, en CSV (?format=csv) o NDJSON (?format=ndjson).
+
+    Las filas se leen con iterator(chunk_size=...) y se escriben conforme el cliente las consume,
+    por lo que la memoria se mantiene constante sin importar el número de filas.
+    """
+    renderer_classes = [CSVRenderer, NDJSONRenderer]
+
+    def export(self, request, dataset, remission_filter=True):
+        date_from, date_to, error = parse_date_range(request, required=dataset == 'daily-sales')
+        remission = request.query_params.get('remission') if remission_filter else None
+        if not error and remission and not remission.isdigit():
+            error = 'El parametro "remission" debe ser un id'
+        if error:
+            return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+
+        columns, rows = export_rows(dataset, date_from, date_to, remission)
+        return streaming_export(request.accepted_renderer.format, dataset, columns, rows)
+
+    @action(detail=False)
+    def sales(self, request):
+        """
+        Ventas, opcionalmente filtradas por rango de fechas ("from", "to") y remisión.
+        """
+        return self.export(request, 'sales')
+
+    @action(detail=False)
+    def credits(self, request):
+        """
+        Créditos, opcionalmente filtrados por rango de fechas ("from", "to") y remisión.
+        """
+        return self.export(request, 'credits')
+
+    @action(detail=False, url_path='daily-sales')
+    def daily_sales(self, request):
+        """
+        Reporte de ventas por día, con las mismas columnas que /api/reports/daily-sales/.
+        """
+        return self.export(request, 'daily-sales', remission_filter=False)
+
+
+class JobViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, mixins.ListModelMixin, viewsets.GenericViewSet):
+    """
+    Trabajos en segundo plano: POST encola un trabajo ({"kind": ..., "params": {...}}) y
+    responde 202 de inmediato; GET /api/jobs/{id}/ muestra su estado y avance, y
+    GET /api/jobs/{id}/result/ su resultado. Los ejecuta el comando run_jobs.
+    """
+    queryset = Job.objects.order_by('-pk')
+    serializer_class = JobSerializer
+
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        response.status_code = status.HTTP_202_ACCEPTED
+        return response
+
+    @action(detail=True)
+    def result(self, request, pk=None):
+        """
+        Resultado del trabajo terminado: el JSON que regresó o, en las exportaciones, el archivo.
+        Mientras no termine (o si falló) responde 409 con su estado.
+        """
+        job = self.get_object()
+        if job.status != Job.SUCCEEDED:
+            detail = {'status': job.status}
+            if job.status == Job.FAILED:
+                detail['error'] = job.error
+            return Response(detail, status=status.HTTP_409_CONFLICT)
+
+        if job.kind == 'export':
+            path = result_path(job, job.result['format'])
+            if not path.exists():
+                return Response({'detail': 'El archivo del resultado ya no existe'}, status=status.HTTP_410_GONE)
+            return FileResponse(
+                open(path, 'rb'),
+                as_attachment=True,
+                filename=f'{job.params["dataset"]}.{job.result["format"]}'
             )
-            .order_by('date')
-        )
-        
-        return Response(report)
\ No newline at end of file
+        return Response(job.result)
@@ -0,0 +1,23 @@
+"""
+Utilidades compartidas por los comandos de medición bench y loadtest.
+"""
+from django.conf import settings
+
+
+def percentile(timings, percent):
+    """
+    Percentil por rango más cercano de una lista de tiempos ya ordenada.
+    """
+    index = min(len(timings) - 1, max(0, round(percent / 100 * len(timings)) - 1))
+    return timings[index]
+
+
+def allowed_host():
+    """
+    Host de las peticiones en proceso: el primero de ALLOWED_HOSTS, o localhost, que Django
+    acepta con ALLOWED_HOSTS vacío y DEBUG activo.
+    """
+    for host in settings.ALLOWED_HOSTS:
+        if host != '*':
+            return host.lstrip('.')
+    return 'localhost'
@@ -0,0 +1,113 @@
+"""
+Caché de los resúmenes de remisión.
+
+Cada resumen se guarda junto con su ETag bajo una llave con tres partes: una generación global
+(para invalidar todos los resúmenes de una vez, por ejemplo tras reconstruir los totales, sin
+recorrer las remisiones), el id de la remisión y la versión actual de esa remisión.
+
+Invalidar un resumen no lo borra: al confirmar la transacción que modificó la remisión se le
+asigna una versión nueva. El lector toma la llave (con la versión vigente) antes de leer la
+base y guarda el resumen bajo esa misma llave; si una escritura confirma entre su lectura y su
+escritura en la caché, el valor anterior queda guardado con la versión vieja, que ya nadie
+consulta, en lugar de volver a ocupar el lugar del resumen invalidado.
+"""
+import hashlib
+import json
+import uuid
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+GENERATION_KEY = 'remission-summary:generation'
+
+
+def summary_cache():
+    return caches[getattr(settings, 'SUMMARY_CACHE_ALIAS', 'default')]
+
+
+def version_key(remission_id):
+    return f'remission-summary:version:{int(remission_id)}'
+
+
+def new_version():
+    return uuid.uuid4().hex
+
+
+def summary_key(cache, remission_id):
+    generation = cache.get_or_set(GENERATION_KEY, 1, timeout=None)
+    version = cache.get_or_set(version_key(remission_id), new_version, timeout=summary_timeout())
+    return f'remission-summary:{generation}:{int(remission_id)}:{version}'
+
+
+async def asummary_key(cache, remission_id):
+    generation = await cache.aget_or_set(GENERATION_KEY, 1, timeout=None)
+    version = await cache.aget_or_set(version_key(remission_id), new_version, timeout=summary_timeout())
+    return f'remission-summary:{generation}:{int(remission_id)}:{version}'
+
+
+def summary_entry(data):
+    digest = hashlib.sha1(json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True).encode()).hexdigest()
+    return {'etag': f'"{digest}"', 'data': data}
+
+
+def summary_timeout():
+    return getattr(settings, 'SUMMARY_CACHE_TIMEOUT', 300)
+
+
+def get_cached_summary(remission_id):
+    """
+    Retorna (key, entry): entry es {'etag': ..., 'data': ...} o None si el resumen no está en
+    caché. En ese caso el resumen se lee después y se guarda con cache_summary(key, data).
+    """
+    cache = summary_cache()
+    key = summary_key(cache, remission_id)
+    return key, cache.get(key)
+
+
+def cache_summary(key, data):
+    entry = summary_entry(data)
+    summary_cache().set(key, entry, timeout=summary_timeout())
+    return entry
+
+
+async def aget_cached_summary(remission_id):
+    cache = summary_cache()
+    key = await asummary_key(cache, remission_id)
+    return key, await cache.aget(key)
+
+
+async def acache_summary(key, data):
+    entry = summary_entry(data)
+    await summary_cache().aset(key, entry, timeout=summary_timeout())
+    return entry
+
+
+def invalidate_summaries(remission_ids):
+    """
+    Asigna una versión nueva a las remisiones indicadas al confirmar la transacción actual.
+    """
+    remission_ids = list(remission_ids)
+
+    def bump():
+        summary_cache().set_many(
+            {version_key(remission_id): new_version() for remission_id in remission_ids},
+            timeout=summary_timeout()
+        )
+
+    if remission_ids:
+        transaction.on_commit(bump)
+
+
+def invalidate_all_summaries():
+    """
+    Invalida todos los resúmenes cambiando de generación al confirmar la transacción actual.
+    """
+    def bump():
+        cache = summary_cache()
+        try:
+            cache.incr(GENERATION_KEY)
+        except ValueError:
+            cache.set(GENERATION_KEY, 2, timeout=None)
+
+    transaction.on_commit(bump)
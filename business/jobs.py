@@ -0,0 +1,145 @@
+"""
+Trabajos en segundo plano.
+
+Las operaciones pesadas se registran con @register('tipo') y se encolan con
+Job.objects.submit('tipo', params). El comando run_jobs toma los trabajos de la tabla y los
+ejecuta en un pool de hilos. Cada trabajo recibe su Job (para reportar el avance con
+job.set_progress) y sus parámetros, y regresa un resultado serializable a JSON.
+
+Un trabajo que falla se reintenta hasta max_attempts veces, así que debe poder repetirse
+sin efectos duplicados.
+"""
+import logging
+import time
+import traceback
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import Max, Min
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from business.models import Job, Remission, Sale, ArchivedSale, DailySalesRollup, sale_date
+
+logger = logging.getLogger(__name__)
+
+# Tipo de trabajo -> función que lo ejecuta.
+JOBS = {}
+
+
+def register(kind):
+    def decorator(function):
+        JOBS[kind] = function
+        return function
+    return decorator
+
+
+def execute(job):
+    """
+    Ejecuta un trabajo tomado con Job.objects.claim() y regresa los cambios para su fila.
+    Si falla y le quedan intentos, vuelve a la cola con una espera exponencial; si no, queda
+    como fallido con el traceback en error.
+    """
+    function = JOBS.get(job.kind)
+    try:
+        if function is None:
+            raise LookupError(f'Tipo de trabajo desconocido: {job.kind}')
+        result = function(job, **job.params)
+    except Exception:
+        logger.exception('Job %s (%s) failed on attempt %s of %s', job.pk, job.kind, job.attempts, job.max_attempts)
+        now, error = timezone.now(), traceback.format_exc()
+        if function is not None and job.attempts < job.max_attempts:
+            delay = timedelta(seconds=settings.JOB_RETRY_DELAY * 2 ** (job.attempts - 1))
+            return {'status': Job.QUEUED, 'worker': '', 'run_after': now + delay, 'error': error}
+        return {'status': Job.FAILED, 'finished_at': now, 'error': error}
+
+    return {'status': Job.SUCCEEDED, 'result': result, 'error': '', 'finished_at': timezone.now()}
+
+
+def finish(job, changes):
+    """
+    Guarda el resultado de execute() con el último avance. Retorna True si el trabajo terminó bien.
+    """
+    # Si el trabajo se volvió a encolar (por ejemplo, por dejar de reportarse), este intento ya no lo actualiza.
+    Job.objects.filter(pk=job.pk, status=Job.RUNNING, attempts=job.attempts).update(
+        progress=job.progress, progress_total=job.progress_total, **changes
+    )
+    return changes['status'] == Job.SUCCEEDED
+
+
+def run_job(job):
+    return finish(job, execute(job))
+
+
+def pause_between_batches():
+    """
+    Suelta el bloqueo de escritura de SQLite un momento entre lotes: sin la pausa el trabajo
+    lo vuelve a tomar de inmediato y las demás escrituras agotan su busy_timeout esperando.
+    """
+    time.sleep(settings.JOB_BATCH_PAUSE)
+
+
+def parse_dates(date_from, date_to):
+    return parse_date(date_from) if date_from else None, parse_date(date_to) if date_to else None
+
+
+@register('close_remissions')
+def close_remissions(job, ids=None, order=None, customer=None, created_before=None, batch_size=500):
+    """
+    Cierre masivo con los mismos parámetros que /api/remissions/bulk-close/.
+    Cada lote se cierra en su propia transacción, así que las demás escrituras no esperan
+    a que termine el trabajo completo. Sólo se reportan por id las remisiones que fallaron.
+    """
+    remissions = Remission.objects.close_targets(
+        ids, order, customer, parse_datetime(created_before) if created_before else None
+    )
+    if ids is None:
+        ids = remissions.order_by('pk').values_list('pk', flat=True)
+    ids = sorted(set(ids))
+    job.set_progress(0, len(ids))
+
+    counts = {'closed': 0, 'already_closed': 0}
+    failures = []
+    for start in range(0, len(ids), batch_size):
+        for result in remissions.close_many(ids[start:start + batch_size], batch_size=batch_size):
+            if result['status'] in counts:
+                counts[result['status']] += 1
+            else:
+                failures.append(result)
+        job.set_progress(min(start + batch_size, len(ids)))
+        pause_between_batches()
+
+    return {**counts, 'failed': len(failures), 'failures': failures}
+
+
+@register('rebuild_daily_rollup')
+def rebuild_daily_rollup(job, date_from=None, date_to=None, days_per_batch=31):
+    """
+    Reconstruye el acumulado diario por bloques de días (ver DailySalesRollup.objects.rebuild).
+    Sin rango se reconstruye desde el primer hasta el último día con ventas (activas o
+    archivadas) o acumulado.
+    """
+    date_from, date_to = parse_dates(date_from, date_to)
+    if date_from is None or date_to is None:
+        bounds = [
+            model.objects.aggregate(first=Min('created_at'), last=Max('created_at'))
+            for model in (Sale, ArchivedSale)
+        ]
+        rollups = DailySalesRollup.objects.aggregate(first=Min('date'), last=Max('date'))
+        firsts = [sale_date(sales['first']) for sales in bounds if sales['first']] + [rollups['first']]
+        lasts = [sale_date(sales['last']) for sales in bounds if sales['last']] + [rollups['last']]
+        firsts, lasts = [day for day in firsts if day], [day for day in lasts if day]
+        if not firsts:
+            return {'days': 0}
+        date_from = date_from or min(firsts)
+        date_to = date_to or max(lasts)
+
+    total = max((date_to - date_from).days + 1, 0)
+    job.set_progress(0, total)
+    rebuilt = 0
+    for offset in range(0, total, days_per_batch):
+        start = date_from + timedelta(days=offset)
+        end = min(start + timedelta(days=days_per_batch - 1), date_to)
+        rebuilt += DailySalesRollup.objects.rebuild(start, end)
+        job.set_progress(min(offset + days_per_batch, total))
+        pause_between_batches()
+
+    return {'days': rebuilt}
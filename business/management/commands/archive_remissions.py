@@ -0,0 +1,45 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from business.jobs import pause_between_batches
+from business.models import Remission, ArchivedRemission
+
+
+class Command(BaseCommand):
+    """
+    Comando para mover al archivo las remisiones cerradas antiguas.
+
+    Mueve por lotes, cada uno en su propia transacción, las remisiones cerradas creadas hace
+    más de --days días y sin ventas ni créditos desde entonces, junto con sus ventas y
+    créditos. El mínimo es un día porque el reporte diario agrega el día en curso desde las
+    ventas activas.
+    """
+    help = 'Move closed remissions older than --days, with their sales and credits, to the archive tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, required=True, help='Archive closed remissions older than this many days')
+        parser.add_argument('--batch-size', type=int, default=500, help='Remissions moved per transaction')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the remissions that would be archived')
+
+    def handle(self, *args, **options):
+        if options['days'] < 1:
+            raise CommandError('--days must be at least 1')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        remissions = Remission.objects.archivable(timezone.now() - timedelta(days=options['days']))
+        if options['dry_run']:
+            self.stdout.write(f'{remissions.count()} remission(s) would be archived.')
+            return
+
+        archived = last = 0
+        while True:
+            ids = list(remissions.filter(pk__gt=last).order_by('pk').values_list('pk', flat=True)[:options['batch_size']])
+            if not ids:
+                break
+            archived += ArchivedRemission.objects.archive(ids)
+            last = ids[-1]
+            self.stdout.write(f'Archived {archived} remission(s)...')
+            pause_between_batches()
+
+        self.stdout.write(self.style.SUCCESS(f'Archived {archived} remission(s).'))
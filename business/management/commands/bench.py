@@ -0,0 +1,295 @@
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from api.renderers import FastJSONRenderer
+from api.rows import ValuesSerializer
+from api.serializers import RemissionTotalsSerializer
+from business.benchmarking import allowed_host, percentile
+from business.models import Remission
+
+# Máximo de consultas SQL permitidas por operación, sin importar el tamaño de los datos.
+QUERY_BUDGETS = {
+    'remission_summary': 1,
+    'remission_close': 4,
+    'daily_sales_report': 2,
+    'customers_list': 2,
+    'orders_list': 2,
+    'remissions_list': 2,
+    'remissions_list_cursor': 1,
+    'remissions_worklist': 2,
+    'remission_rows_serializer': 1,
+    'remission_rows_values': 1,
+    'receivables_report': 2,
+    'receivables_report_cursor': 1,
+}
+
+# Filas por operación al comparar el serializer de DRF con la ruta de .values().
+ROWS_PER_PAGE = 1000
+
+# Control de transacciones que CaptureQueriesContext también registra.
+TRANSACTION_STATEMENTS = ('BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE SAVEPOINT')
+
+
+class Command(BaseCommand):
+    """
+    Comando para medir las operaciones principales de la API y del negocio.
+
+    Por cada tamaño crea una base de datos de prueba aislada, la puebla con el comando seed
+    y ejecuta cada operación varias veces, midiendo latencia (p50/p95/p99), número de consultas
+    SQL y recorridos completos de tabla. SQLite no reporta filas examinadas, por lo que los
+    recorridos se obtienen del EXPLAIN de cada consulta (SCAN sin índice).
+
+    Los resultados se guardan en JSON; con --baseline se comparan contra una corrida anterior y
+    el comando falla si se excede un presupuesto de consultas o un umbral de latencia.
+    """
+    help = 'Benchmark API endpoints and business operations against seeded datasets'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,10000', help='Comma-separated dataset sizes, in orders')
+        parser.add_argument('--repeat', type=int, default=20, help='Runs per operation')
+        parser.add_argument('--seed', type=int, default=1, help='Seed for the generated datasets')
+        parser.add_argument('--output', help='Write results as JSON to this file')
+        parser.add_argument('--baseline', help='JSON results of a previous run to compare against')
+        parser.add_argument(
+            '--max-regression',
+            type=float,
+            default=0.25,
+            help='Allowed p95 latency increase over the baseline (0.25 = 25%%)'
+        )
+        parser.add_argument('--max-p95-ms', type=float, help='Fail if any operation p95 exceeds this latency')
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',')]
+        except ValueError:
+            raise CommandError('--sizes must be a comma-separated list of integers')
+
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as baseline_file:
+                baseline = json.load(baseline_file)
+
+        results = {}
+        for size in sizes:
+            self.stdout.write(f'Dataset with {size} orders...')
+            results[str(size)] = self.run_size(size, options)
+
+        report = {
+            'created_at': timezone.now().isoformat(),
+            'vendor': connection.vendor,
+            'repeat': options['repeat'],
+            'results': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w') as output_file:
+                json.dump(report, output_file, indent=2)
+
+        failures = self.find_regressions(results, baseline, options)
+        if failures:
+            raise CommandError('Benchmark regressions:\n' + '\n'.join(failures))
+        self.stdout.write(self.style.SUCCESS('Benchmark completed within budgets.'))
+
+    @contextmanager
+    def database(self, size):
+        """
+        Base de datos vacía para un tamaño: una base de prueba aparte, en un archivo, que se
+        destruye al terminar para volver a la original (también si la original es la base de
+        las pruebas). Una base SQLite en memoria ya es desechable y Django no cierra su
+        conexión para abrir otra encima, así que sólo se vacía con flush.
+        """
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            call_command('flush', interactive=False, verbosity=0)
+            yield
+            return
+        # create_test_db regresa el nombre de la base de prueba; destroy_test_db necesita el original.
+        old_name, old_test_name = connection.settings_dict['NAME'], connection.settings_dict['TEST']['NAME']
+        if connection.vendor == 'sqlite':
+            # Una base en archivo: las bases en memoria de SQLite sobreviven a destroy_test_db.
+            connection.settings_dict['TEST']['NAME'] = os.path.join(tempfile.gettempdir(), f'bench_{size}.sqlite3')
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            yield
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            connection.settings_dict['TEST']['NAME'] = old_test_name
+
+    def run_size(self, size, options):
+        with self.database(size):
+            today = timezone.localdate()
+            call_command(
+                'seed',
+                customers=max(size // 20, 10),
+                orders=size,
+                sales_per_remission='1-9',
+                seed=options['seed'],
+                date_from=str(today - timedelta(days=365)),
+                date_to=str(today),
+                batch_size=5000,
+                stdout=StringIO()
+            )
+            self.rng = random.Random(options['seed'])
+            self.client = Client(HTTP_HOST=allowed_host())
+            self.date_range = {'from': str(today - timedelta(days=365)), 'to': str(today)}
+            self.remission_ids = list(Remission.objects.values_list('pk', flat=True))
+            self.open_ids = list(Remission.objects.filter(status='open').values_list('pk', flat=True))
+            self.used_ids = []
+
+            results = {}
+            for name in QUERY_BUDGETS:
+                reason = self.unavailable(name)
+                if reason:
+                    self.stdout.write(f'  {name:<24} skipped: {reason}')
+                    continue
+                results[name] = self.measure(
+                    getattr(self, f'op_{name}'), options['repeat'], getattr(self, f'before_{name}', None)
+                )
+                self.stdout.write(
+                    f"  {name:<24} p50={results[name]['p50_ms']:8.2f}ms "
+                    f"p95={results[name]['p95_ms']:8.2f}ms queries={results[name]['queries']} "
+                    f"full_scans={results[name]['full_scans']}"
+                )
+            return results
+
+    def unavailable(self, name):
+        """
+        Motivo para omitir una operación que no tiene datos con qué medirse, o None.
+        """
+        if name == 'remission_summary' and not self.remission_ids:
+            return 'no remissions'
+        if name == 'remission_close' and not self.open_ids:
+            return 'no open remissions'
+        return None
+
+    def measure(self, operation, repeat, prepare=None):
+        """
+        Ejecuta la operación repeat veces. prepare corre antes de cada ejecución, fuera de la
+        medición y del conteo de consultas.
+        """
+        timings, queries, full_scans = [], 0, 0
+        for run in range(repeat):
+            if prepare is not None:
+                prepare()
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                operation()
+                timings.append((time.perf_counter() - started) * 1000)
+
+            statements = [
+                query['sql'] for query in captured.captured_queries
+                if not query['sql'].startswith(TRANSACTION_STATEMENTS)
+            ]
+            queries = max(queries, len(statements))
+            if run == 0:
+                full_scans = sum(self.full_scans(sql) for sql in statements)
+
+        timings.sort()
+        return {
+            'runs': repeat,
+            'mean_ms': statistics.fmean(timings),
+            'p50_ms': percentile(timings, 50),
+            'p95_ms': percentile(timings, 95),
+            'p99_ms': percentile(timings, 99),
+            'queries': queries,
+            'full_scans': full_scans,
+        }
+
+    @staticmethod
+    def full_scans(sql):
+        """
+        Recorridos completos de tabla según EXPLAIN QUERY PLAN (sólo SQLite).
+        """
+        if connection.vendor != 'sqlite' or not sql.lstrip().upper().startswith('SELECT'):
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            plan = [row[-1] for row in cursor.fetchall()]
+        return sum(1 for step in plan if step.startswith('SCAN ') and ' USING ' not in step)
+
+    def find_regressions(self, results, baseline, options):
+        failures = []
+        for size, operations in results.items():
+            for name, result in operations.items():
+                if result['queries'] > QUERY_BUDGETS[name]:
+                    failures.append(
+                        f'{name} ({size}): {result["queries"]} queries, budget is {QUERY_BUDGETS[name]}'
+                    )
+                if options['max_p95_ms'] is not None and result['p95_ms'] > options['max_p95_ms']:
+                    failures.append(f'{name} ({size}): p95 {result["p95_ms"]:.2f}ms over {options["max_p95_ms"]}ms')
+
+                previous = (baseline or {}).get('results', {}).get(size, {}).get(name)
+                if previous and result['p95_ms'] > previous['p95_ms'] * (1 + options['max_regression']):
+                    failures.append(
+                        f'{name} ({size}): p95 {result["p95_ms"]:.2f}ms vs baseline {previous["p95_ms"]:.2f}ms'
+                    )
+        return failures
+
+    def get(self, url, params=None):
+        response = self.client.get(url, params or {})
+        if response.status_code != 200:
+            raise CommandError(f'GET {url} returned {response.status_code}')
+        return response
+
+    def op_remission_summary(self):
+        self.get(f'/api/remissions/{self.rng.choice(self.remission_ids)}/summary/')
+
+    def before_remission_close(self):
+        # Con más ejecuciones que remisiones abiertas, se reabren las que ya se cerraron.
+        if not self.open_ids:
+            Remission.objects.filter(pk__in=self.used_ids).update(status='open')
+            self.open_ids, self.used_ids = self.used_ids[::-1], []
+
+    def op_remission_close(self):
+        self.used_ids.append(self.open_ids.pop())
+        remission = Remission.objects.get(pk=self.used_ids[-1])
+        try:
+            remission.close()
+        except ValidationError:
+            pass
+
+    def op_daily_sales_report(self):
+        self.get('/api/reports/daily-sales/', self.date_range)
+
+    def op_customers_list(self):
+        self.get('/api/customers/')
+
+    def op_orders_list(self):
+        self.get('/api/orders/')
+
+    def op_remissions_list(self):
+        self.get('/api/remissions/')
+
+    def op_remissions_list_cursor(self):
+        self.get('/api/remissions/', {'pagination': 'cursor', 'page_size': 1000})
+
+    def op_remission_rows_serializer(self):
+        remissions = Remission.objects.order_by('pk')[:ROWS_PER_PAGE]
+        JSONRenderer().render(RemissionTotalsSerializer(remissions, many=True).data)
+
+    def op_remission_rows_values(self):
+        rows = ValuesSerializer(RemissionTotalsSerializer)
+        FastJSONRenderer().render(rows.many(rows.values(Remission.objects.order_by('pk')[:ROWS_PER_PAGE])))
+
+    def op_remissions_worklist(self):
+        self.get('/api/remissions/', {
+            'status': 'open', 'min_balance': '0.01', 'ordering': '-balance', 'include': 'totals'
+        })
+
+    def op_receivables_report(self):
+        self.get('/api/reports/receivables/', {'is_active': 'true'})
+
+    def op_receivables_report_cursor(self):
+        self.get('/api/reports/receivables/', {'pagination': 'cursor', 'page_size': 1000})
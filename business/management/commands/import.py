@@ -0,0 +1,406 @@
+import csv
+import json
+import os
+import time
+from collections import namedtuple
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from business.jobs import pause_between_batches
+from business.management.commands.seed import insert_rows
+from business.models import (
+    Customer, Order, Remission, Sale, CreditAssignment, DailySalesRollup, ArchivedRemission,
+    ImportCheckpoint, sale_date
+)
+
+CENT = Decimal('0.01')
+
+# Folios consultados por consulta al resolver los que no están en caché.
+LOOKUP_CHUNK = 500
+
+# Entradas por caché de búsqueda; al rebasarlo se vacía y los folios se vuelven a consultar.
+LOOKUP_CACHE_SIZE = 500_000
+
+Record = namedtuple('Record', [
+    'line', 'type', 'customer', 'customer_name', 'customer_email', 'order', 'remission', 'status',
+    'subtotal', 'tax', 'amount', 'reason', 'created_at'
+])
+
+
+class RowError(Exception):
+    pass
+
+
+class Source:
+    """
+    Lee el archivo en binario línea por línea, llevando el offset en bytes y el número de línea
+    de lo ya leído, para guardarlos en el punto de control al confirmar cada lote.
+    """
+    def __init__(self, file, offset, line):
+        self.file = file
+        self.offset = offset
+        self.line = line
+        file.seek(offset)
+
+    def lines(self):
+        for raw in self.file:
+            self.offset += len(raw)
+            self.line += 1
+            yield raw.decode('utf-8')
+
+
+def read_csv(file, checkpoint):
+    """
+    Filas de un CSV con encabezado como (línea, dict, offset). csv.reader pide las líneas una
+    por una, así que el offset al recibir una fila es el final de esa fila.
+    """
+    header = file.readline()
+    fieldnames = next(csv.reader([header.decode('utf-8-sig')]))
+    source = Source(file, checkpoint.offset or len(header), checkpoint.line or 1)
+    for row in csv.DictReader(source.lines(), fieldnames=fieldnames):
+        yield source.line, row, source.offset
+
+
+def read_ndjson(file, checkpoint):
+    source = Source(file, checkpoint.offset, checkpoint.line)
+    for text in source.lines():
+        if not text.strip():
+            continue
+        try:
+            row = json.loads(text)
+        except ValueError as error:
+            raise CommandError(f'Line {source.line}: invalid JSON ({error})')
+        yield source.line, row, source.offset
+
+
+READERS = {'csv': read_csv, 'ndjson': read_ndjson}
+
+
+class Command(BaseCommand):
+    """
+    Comando para importar ventas y créditos históricos desde un archivo CSV o NDJSON.
+
+    Cada fila es una venta o un crédito (columna type) con los folios de su orden y remisión y
+    su fecha original (created_at), que se conserva. Los clientes, órdenes y remisiones que no
+    existen se crean con la primera fila que los menciona; las columnas del cliente y status
+    sólo se usan al crearlos. Los folios se resuelven con cachés en memoria y una consulta por
+    bloque de folios nuevos. Las filas de una remisión que ya estaba cerrada antes de empezar
+    el archivo se rechazan, salvo con --allow-closed.
+
+    El archivo se lee en streaming y se importa por lotes de --batch-size filas, cada uno en
+    su transacción: ventas y créditos con executemany, remisiones nuevas con sus totales ya
+    calculados, totales de remisiones existentes y acumulado diario con un UPDATE por
+    remisión y por día. El avance (offset en bytes) se guarda en ImportCheckpoint en la misma
+    transacción, así que al repetir el comando se continúa tras el último lote confirmado.
+    """
+    help = 'Import historical sales and credits from a CSV or NDJSON file, resuming after failures'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV (with header) or NDJSON file')
+        parser.add_argument('--format', choices=sorted(READERS), help='File format (default: from the extension)')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows imported per transaction')
+        parser.add_argument(
+            '--remission-status', choices=['open', 'closed'], default='closed',
+            help='Status of created remissions when a row has no status'
+        )
+        parser.add_argument(
+            '--allow-closed', action='store_true',
+            help='Add sales and credits to remissions that were already closed before the import'
+        )
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Ignore the checkpoint and import the file from the beginning'
+        )
+
+    def handle(self, *args, **options):
+        path = os.path.abspath(options['path'])
+        file_format = options['format'] or os.path.splitext(path)[1].lstrip('.').lower()
+        if file_format == 'jsonl':
+            file_format = 'ndjson'
+        if file_format not in READERS:
+            raise CommandError('Unknown file format; use --format csv or --format ndjson')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+        if not os.path.isfile(path):
+            raise CommandError(f'File not found: {path}')
+
+        checkpoint, _ = ImportCheckpoint.objects.get_or_create(source=path)
+        if options['restart']:
+            checkpoint.offset = checkpoint.line = checkpoint.rows = 0
+            checkpoint.completed_at = None
+            checkpoint.save()
+        elif checkpoint.completed_at:
+            raise CommandError(f'{path} was already imported; use --restart to import it again')
+        elif checkpoint.offset > os.path.getsize(path):
+            raise CommandError(f'{path} is shorter than its checkpoint; use --restart to import it again')
+        elif checkpoint.rows:
+            self.stdout.write(f'Resuming after {checkpoint.rows} row(s), at line {checkpoint.line}.')
+        if not checkpoint.rows:
+            checkpoint.last_remission_id = Remission.objects.aggregate(last=Max('pk'))['last'] or 0
+            checkpoint.save(update_fields=['last_remission_id'])
+
+        self.status = options['remission_status']
+        self.allow_closed = options['allow_closed']
+        self.customers, self.orders, self.remissions = {}, {}, {}
+        started, imported = time.perf_counter(), 0
+        with open(path, 'rb') as file:
+            batch = []
+            for line, row, offset in READERS[file_format](file, checkpoint):
+                batch.append(self.parse(line, row))
+                if len(batch) >= options['batch_size']:
+                    imported += self.import_batch(batch, checkpoint, offset, line)
+                    batch = []
+                    self.stdout.write(
+                        f'Imported {checkpoint.rows} row(s) ({imported / (time.perf_counter() - started):.0f} rows/s)...'
+                    )
+                    pause_between_batches()
+            if batch:
+                imported += self.import_batch(batch, checkpoint, offset, line)
+
+        checkpoint.completed_at = timezone.now()
+        checkpoint.save(update_fields=['completed_at'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {imported} row(s) in {time.perf_counter() - started:.1f}s ({checkpoint.rows} in total).'
+        ))
+
+    def parse(self, line, row):
+        """
+        Valida una fila y la convierte en Record. Los errores detienen la importación; los
+        lotes anteriores ya quedaron confirmados y el comando se puede repetir tras corregir.
+        """
+        try:
+            kind = (row.get('type') or '').strip().lower()
+            if kind not in ('sale', 'credit'):
+                raise RowError('type must be "sale" or "credit"')
+            order, remission = self.text(row, 'order', required=True), self.text(row, 'remission', required=True)
+            status = self.text(row, 'status').lower() or self.status
+            if status not in ('open', 'closed'):
+                raise RowError('status must be "open" or "closed"')
+            name, email = self.text(row, 'customer_name'), self.text(row, 'customer_email')
+
+            if kind == 'sale':
+                subtotal, tax, amount = self.amount(row, 'subtotal'), self.amount(row, 'tax', default='0'), None
+            else:
+                subtotal = tax = None
+                amount = self.amount(row, 'amount')
+                if amount <= 0:
+                    raise RowError('amount must be greater than zero')
+
+            return Record(
+                line, kind, email or name, name, email or None, order, remission, status,
+                subtotal, tax, amount, self.text(row, 'reason'), self.datetime(row)
+            )
+        except RowError as error:
+            raise CommandError(f'Line {line}: {error}')
+
+    @staticmethod
+    def text(row, column, required=False):
+        value = row.get(column)
+        value = '' if value is None else str(value).strip()
+        if required and not value:
+            raise RowError(f'{column} is required')
+        return value
+
+    @staticmethod
+    def amount(row, column, default=None):
+        value = row.get(column)
+        if value in (None, ''):
+            if default is None:
+                raise RowError(f'{column} is required')
+            value = default
+        try:
+            amount = Decimal(str(value))
+        except InvalidOperation:
+            raise RowError(f'{column} is not a number: {value}')
+        if not amount.is_finite() or amount < 0 or amount != amount.quantize(CENT):
+            raise RowError(f'{column} must be a non-negative amount with up to 2 decimals: {value}')
+        return amount
+
+    @staticmethod
+    def datetime(row):
+        value = str(row.get('created_at') or '').strip()
+        try:
+            # fromisoformat es mucho más rápido; parse_datetime acepta además otras variantes.
+            parsed = datetime.fromisoformat(value)
+        except ValueError:
+            try:
+                parsed = parse_datetime(value)
+            except ValueError:
+                parsed = None
+        if parsed is None:
+            raise RowError(f'created_at must be an ISO 8601 date or datetime: {value}')
+        return parsed if timezone.is_aware(parsed) else timezone.make_aware(parsed)
+
+    def import_batch(self, records, checkpoint, offset, line):
+        # Totales del lote por remisión: las nuevas se crean con ellos, a las existentes se suman.
+        totals, days = {}, {}
+        for record in records:
+            subtotal, tax, count, credited = totals.get(record.remission, (0, 0, 0, 0))
+            if record.type == 'sale':
+                totals[record.remission] = (subtotal + record.subtotal, tax + record.tax, count + 1, credited)
+                day = sale_date(record.created_at)
+                day_subtotal, day_tax, day_count = days.get(day, (0, 0, 0))
+                days[day] = (day_subtotal + record.subtotal, day_tax + record.tax, day_count + 1)
+            else:
+                totals[record.remission] = (subtotal, tax, count, credited + record.amount)
+
+        with transaction.atomic():
+            created = self.resolve_remissions(records, totals)
+            remission_ids = self.remissions
+            if not self.allow_closed:
+                self.check_closed(records, created, checkpoint.last_remission_id)
+            now = timezone.now()
+            insert_rows(Sale, ['remission', 'subtotal', 'tax', 'created_at', 'updated_at'], (
+                (remission_ids[record.remission], record.subtotal, record.tax, record.created_at, now)
+                for record in records if record.type == 'sale'
+            ))
+            insert_rows(CreditAssignment, ['remission', 'amount', 'reason', 'created_at', 'updated_at'], (
+                (remission_ids[record.remission], record.amount, record.reason, record.created_at, now)
+                for record in records if record.type == 'credit'
+            ))
+
+            for folio, (subtotal, tax, count, credited) in totals.items():
+                if folio in created:
+                    continue
+                if count:
+                    Remission.objects.apply_sales_delta(remission_ids[folio], subtotal, tax, count)
+                if credited:
+                    Remission.objects.apply_credits_delta(remission_ids[folio], credited)
+            for day, (subtotal, tax, count) in days.items():
+                DailySalesRollup.objects.apply_delta(day, subtotal, tax, count)
+
+            checkpoint.offset, checkpoint.line = offset, line
+            checkpoint.rows += len(records)
+            checkpoint.updated_at = timezone.now()
+            checkpoint.save(update_fields=['offset', 'line', 'rows', 'updated_at'])
+        return len(records)
+
+    def resolve_remissions(self, records, totals):
+        """
+        Resuelve el id de cada remisión del lote y crea, con sus totales, las que no existen.
+        Regresa los folios creados.
+        """
+        if len(self.remissions) > LOOKUP_CACHE_SIZE:
+            self.remissions.clear()
+        missing = {record.remission for record in records} - self.remissions.keys()
+        self.remissions.update(self.lookup(Remission.objects.all(), 'folio', missing))
+
+        new = [record for record in records if record.remission not in self.remissions]
+        archived = self.lookup(ArchivedRemission.objects.all(), 'folio', {record.remission for record in new})
+        if archived:
+            record = next(record for record in new if record.remission in archived)
+            raise CommandError(f'Line {record.line}: remission {record.remission} is archived')
+
+        first = {}
+        for record in new:
+            if record.remission not in first or record.created_at < first[record.remission].created_at:
+                first[record.remission] = record
+        if not first:
+            return set()
+
+        self.resolve_orders(new)
+        remissions = Remission.objects.bulk_create(
+            [
+                Remission(
+                    order_id=self.orders[record.order], folio=folio, status=record.status,
+                    created_at=record.created_at,
+                    **dict(zip(Remission.TOTAL_FIELDS, totals[folio]))
+                )
+                for folio, record in first.items()
+            ],
+            batch_size=LOOKUP_CHUNK
+        )
+        self.remissions.update((remission.folio, remission.pk) for remission in remissions)
+        return set(first)
+
+    def check_closed(self, records, created, last_remission_id):
+        """
+        Rechaza las filas de remisiones cerradas que ya existían antes de empezar el archivo.
+        Las que creó la importación (con id mayor a last_remission_id) nacen cerradas por
+        defecto y siguen recibiendo las filas del archivo.
+        """
+        existing = {
+            self.remissions[record.remission] for record in records
+            if record.remission not in created and self.remissions[record.remission] <= last_remission_id
+        }
+        closed = self.lookup(Remission.objects.filter(status='closed'), 'pk', existing)
+        if closed:
+            record = next(record for record in records if self.remissions[record.remission] in closed)
+            raise CommandError(
+                f'Line {record.line}: remission {record.remission} is closed; use --allow-closed to add to it'
+            )
+
+    def resolve_orders(self, records):
+        if len(self.orders) > LOOKUP_CACHE_SIZE:
+            self.orders.clear()
+        missing = {record.order for record in records} - self.orders.keys()
+        self.orders.update(self.lookup(Order.objects.all(), 'folio', missing))
+
+        first = {}
+        for record in records:
+            if record.order in self.orders:
+                continue
+            if record.order not in first or record.created_at < first[record.order].created_at:
+                first[record.order] = record
+        if not first:
+            return
+
+        self.resolve_customers(first.values())
+        orders = Order.objects.bulk_create(
+            [
+                Order(customer_id=self.customers[record.customer], folio=folio, created_at=record.created_at)
+                for folio, record in first.items()
+            ],
+            batch_size=LOOKUP_CHUNK
+        )
+        self.orders.update((order.folio, order.pk) for order in orders)
+
+    def resolve_customers(self, records):
+        """
+        Resuelve a los clientes por correo (o por nombre si no tienen correo) y crea los que
+        no existen. Si varios clientes coinciden se usa el más antiguo.
+        """
+        if len(self.customers) > LOOKUP_CACHE_SIZE:
+            self.customers.clear()
+        for record in records:
+            if not record.customer:
+                raise CommandError(f'Line {record.line}: customer_email or customer_name is required for a new order')
+
+        missing = {record.customer for record in records} - self.customers.keys()
+        emails = {record.customer_email for record in records if record.customer in missing and record.customer_email}
+        names = {record.customer_name for record in records if record.customer in missing and not record.customer_email}
+        for field, values, queryset in (
+            ('email', emails, Customer.objects.all()),
+            ('name', names, Customer.objects.filter(email__isnull=True)),
+        ):
+            found = self.lookup(queryset.order_by('-pk'), field, values)
+            self.customers.update(found)
+
+        new = {}
+        for record in records:
+            if record.customer not in self.customers:
+                new.setdefault(record.customer, record)
+        customers = Customer.objects.bulk_create(
+            [Customer(name=record.customer_name or record.customer_email, email=record.customer_email)
+             for record in new.values()],
+            batch_size=LOOKUP_CHUNK
+        )
+        self.customers.update(zip(new, (customer.pk for customer in customers)))
+
+    @staticmethod
+    def lookup(queryset, field, values):
+        """
+        {valor: id} de las filas cuyo field está en values, con una consulta por bloque. Si
+        varias filas coinciden queda la última según el orden del queryset.
+        """
+        values = sorted(values)
+        found = {}
+        for start in range(0, len(values), LOOKUP_CHUNK):
+            found.update(
+                queryset.filter(**{f'{field}__in': values[start:start + LOOKUP_CHUNK]}).values_list(field, 'pk')
+            )
+        return found
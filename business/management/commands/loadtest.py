@@ -0,0 +1,475 @@
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+from collections import Counter, defaultdict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from datetime import timedelta
+from io import BytesIO
+from urllib.parse import urlencode, urlsplit
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.core.signals import got_request_exception
+from django.core.wsgi import get_wsgi_application
+from django.db import OperationalError
+from django.utils import timezone
+from business.benchmarking import allowed_host, percentile
+
+DEFAULT_MIX = 'sale_write=30,summary=40,close=5,daily_report=15,receivables=10'
+
+# Operaciones que necesitan una remisión abierta; se omiten cuando ya no quedan.
+OPEN_OPERATIONS = ('sale_write', 'close')
+
+# Remisiones (las más recientes) que se cargan como universo de ids.
+ID_POOL_SIZE = 5000
+
+# Excepciones no manejadas de la petición en curso (ver store_exception).
+request_errors = ContextVar('request_errors')
+
+Sample = namedtuple('Sample', ['operation', 'offset', 'latency_ms', 'status', 'error'])
+
+
+def classify(exception):
+    """
+    Tipo de error de una excepción: 'lock' si SQLite no obtuvo el bloqueo, 'server' si no.
+    """
+    if isinstance(exception, OperationalError) and 'locked' in str(exception):
+        return 'lock'
+    return 'server'
+
+
+def store_exception(sender, **kwargs):
+    # La señal se emite mientras se maneja la excepción, en el contexto de la petición.
+    errors = request_errors.get(None)
+    if errors is not None:
+        errors.append(sys.exc_info()[1])
+
+
+class InProcessTransport:
+    """
+    Base de los transportes que llaman a la aplicación de Django en el mismo proceso, como lo
+    haría el servidor. Las excepciones no manejadas de cada petición se reciben con la señal
+    got_request_exception en una lista propia de la petición (request_errors).
+    """
+    def __init__(self):
+        self.host = allowed_host()
+
+    def outcome(self, status, content, errors):
+        if errors:
+            return status, content, classify(errors[0])
+        return status, content, 'server' if status >= 500 else None
+
+    async def close(self):
+        pass
+
+
+class ASGITransport(InProcessTransport):
+    """
+    Envía las peticiones a la aplicación ASGI con un scope HTTP mínimo.
+    """
+    def __init__(self):
+        super().__init__()
+        self.app = get_asgi_application()
+
+    async def request(self, method, path, body=None):
+        path, _, query = path.partition('?')
+        payload = (body or '').encode()
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': method,
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'query_string': query.encode(),
+            'root_path': '',
+            'server': (self.host, 80),
+            'client': ('127.0.0.1', 0),
+            'headers': [
+                (b'host', self.host.encode()),
+                (b'content-type', b'application/json'),
+                (b'content-length', str(len(payload)).encode()),
+            ],
+        }
+        messages = [{'type': 'http.request', 'body': payload, 'more_body': False}]
+        response = {'status': None, 'body': []}
+
+        async def receive():
+            if messages:
+                return messages.pop()
+            # El cliente no se desconecta: Django cancela esta espera al terminar la respuesta.
+            await asyncio.Future()
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                response['status'] = message['status']
+            elif message['type'] == 'http.response.body':
+                response['body'].append(message.get('body', b''))
+
+        errors = []
+        token = request_errors.set(errors)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            request_errors.reset(token)
+        return self.outcome(response['status'], b''.join(response['body']), errors)
+
+
+class WSGITransport(InProcessTransport):
+    """
+    Envía las peticiones a la aplicación WSGI, cada una en un hilo del pool (como un servidor
+    WSGI con un hilo por petición concurrente).
+    """
+    def __init__(self):
+        super().__init__()
+        self.app = get_wsgi_application()
+
+    async def request(self, method, path, body=None):
+        errors = []
+        token = request_errors.set(errors)
+        try:
+            # to_thread copia el contexto, así que el hilo ve la lista de esta petición.
+            status, content = await asyncio.to_thread(self.call, method, path, body)
+        finally:
+            request_errors.reset(token)
+        return self.outcome(status, content, errors)
+
+    def call(self, method, path, body):
+        path, _, query = path.partition('?')
+        payload = (body or '').encode()
+        environ = {
+            'REQUEST_METHOD': method,
+            'SCRIPT_NAME': '',
+            'PATH_INFO': path,
+            'QUERY_STRING': query,
+            'SERVER_NAME': self.host,
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'REMOTE_ADDR': '127.0.0.1',
+            'HTTP_HOST': self.host,
+            'CONTENT_TYPE': 'application/json',
+            'CONTENT_LENGTH': str(len(payload)),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': BytesIO(payload),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        status = []
+        result = self.app(environ, lambda line, headers, exc_info=None: status.append(int(line.split()[0])))
+        try:
+            content = b''.join(result)
+        finally:
+            # Como el servidor: close() emite request_finished y libera la conexión a la base.
+            result.close()
+        return status[0], content
+
+
+class HTTPTransport:
+    """
+    Cliente HTTP/1.1 mínimo sobre asyncio con una conexión persistente, para un servidor en
+    localhost. Los errores de bloqueo sólo se distinguen si la respuesta 500 incluye el
+    mensaje de la excepción (DEBUG activo).
+    """
+    def __init__(self, url):
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.prefix = parts.path.rstrip('/')
+        self.reader = self.writer = None
+
+    async def request(self, method, path, body=None):
+        reused = self.writer is not None
+        if not reused:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            status, content = await self.exchange(method, path, body)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            await self.close()
+            if not reused:
+                raise
+            # El servidor cerró la conexión inactiva: se reintenta una vez con otra.
+            return await self.request(method, path, body)
+
+        error = None
+        if status >= 500:
+            error = 'lock' if b'database is locked' in content else 'server'
+        return status, content, error
+
+    async def exchange(self, method, path, body):
+        payload = (body or '').encode()
+        lines = [
+            f'{method} {self.prefix}{path} HTTP/1.1',
+            f'Host: {self.host}:{self.port}',
+            f'Content-Length: {len(payload)}',
+        ]
+        if body is not None:
+            lines.append('Content-Type: application/json')
+        self.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode() + payload)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionResetError('Connection closed by the server')
+        status = int(status_line.split()[1])
+        headers = {}
+        while (line := await self.reader.readline()) not in (b'\r\n', b'\n', b''):
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if method == 'HEAD' or status in (204, 304) or status < 200:
+            content = b''
+        elif headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while size := int((await self.reader.readline()).split(b';')[0], 16):
+                chunks.append(await self.reader.readexactly(size))
+                await self.reader.readline()
+            await self.reader.readline()
+            content = b''.join(chunks)
+        elif 'content-length' in headers:
+            content = await self.reader.readexactly(int(headers['content-length']))
+        else:
+            content = await self.reader.read()
+            headers['connection'] = 'close'
+
+        if headers.get('connection', '').lower() == 'close':
+            await self.close()
+        return status, content
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+
+class Workload:
+    """
+    Elige la siguiente operación según la mezcla de tráfico y arma su petición.
+    """
+    def __init__(self, mix, open_ids, remission_ids, rng):
+        self.mix = mix
+        self.open_ids = open_ids
+        self.remission_ids = remission_ids
+        self.rng = rng
+        today = timezone.localdate()
+        self.date_range = urlencode({'from': str(today - timedelta(days=30)), 'to': str(today)})
+
+    def next(self):
+        operations = [name for name in self.mix if self.open_ids or name not in OPEN_OPERATIONS]
+        if not operations:
+            return None
+        name = self.rng.choices(operations, weights=[self.mix[name] for name in operations])[0]
+        return (name, *getattr(self, f'op_{name}')())
+
+    def op_sale_write(self):
+        subtotal = round(self.rng.uniform(1, 1000), 2)
+        body = {
+            'remission': self.rng.choice(self.open_ids),
+            'subtotal': f'{subtotal:.2f}',
+            'tax': f'{subtotal * 0.16:.2f}',
+        }
+        return 'POST', '/api/sales/', json.dumps(body)
+
+    def op_summary(self):
+        return 'GET', f'/api/remissions/{self.rng.choice(self.remission_ids)}/summary/', None
+
+    def op_close(self):
+        # Se saca del universo antes de enviarla: no se cierra dos veces ni recibe más ventas.
+        index = self.rng.randrange(len(self.open_ids))
+        self.open_ids[index], self.open_ids[-1] = self.open_ids[-1], self.open_ids[index]
+        return 'POST', f'/api/remissions/{self.open_ids.pop()}/close/', None
+
+    def op_daily_report(self):
+        return 'GET', f'/api/reports/daily-sales/?{self.date_range}', None
+
+    def op_receivables(self):
+        return 'GET', '/api/reports/receivables/', None
+
+
+def summarize(samples, elapsed):
+    """
+    Rendimiento, latencias y errores de un conjunto de muestras en elapsed segundos.
+    """
+    latencies = sorted(sample.latency_ms for sample in samples)
+    errors = Counter(sample.error for sample in samples if sample.error)
+    statuses = Counter(str(sample.status) for sample in samples if sample.status is not None)
+    return {
+        'requests': len(samples),
+        'throughput_rps': len(samples) / elapsed if elapsed else 0.0,
+        'latency_ms': {
+            'mean': statistics.fmean(latencies),
+            'p50': percentile(latencies, 50),
+            'p95': percentile(latencies, 95),
+            'p99': percentile(latencies, 99),
+            'max': latencies[-1],
+        } if latencies else None,
+        'errors': sum(errors.values()),
+        'error_rate': sum(errors.values()) / len(samples) if samples else 0.0,
+        'lock_errors': errors['lock'],
+        'connection_errors': errors['connection'],
+        'status_codes': dict(sorted(statuses.items())),
+    }
+
+
+class Command(BaseCommand):
+    """
+    Comando para generar carga concurrente sobre la API.
+
+    Varios clientes asyncio envían peticiones sin pausa durante --duration segundos, eligiendo
+    cada operación según --mix: registrar ventas, consultar resúmenes, cerrar remisiones y
+    pedir el reporte diario y la cartera. La aplicación se ejecuta en el mismo proceso (ASGI o
+    WSGI, sobre la base de datos configurada) o se llama por HTTP con --url.
+
+    Se reportan en JSON el rendimiento, las latencias p50/p95/p99, los errores (respuestas 5xx,
+    separando los bloqueos de SQLite) y los códigos de estado, en total, por operación y por
+    intervalos de --interval segundos. Las respuestas 4xx, como una venta sobre una remisión que
+    otro cliente acaba de cerrar, se cuentan en los códigos de estado pero no como errores.
+    Las ventas y los cierres modifican la base de datos.
+    """
+    help = 'Run a concurrent traffic mix against the API and report throughput, latency and errors as JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--target', choices=['asgi', 'wsgi'], default='asgi',
+            help='In-process handler to drive when --url is not given'
+        )
+        parser.add_argument('--url', help='Base URL of a running server, e.g. http://localhost:8000')
+        parser.add_argument('--concurrency', type=int, default=10, help='Concurrent clients')
+        parser.add_argument('--duration', type=float, default=30, help='Seconds to generate load')
+        parser.add_argument('--interval', type=float, default=1, help='Seconds per time series bucket')
+        parser.add_argument('--mix', default=DEFAULT_MIX, help='Comma-separated operation=weight pairs')
+        parser.add_argument('--seed', type=int, default=1, help='Seed for the traffic generator')
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+
+    def handle(self, *args, **options):
+        mix = self.parse_mix(options['mix'])
+        if options['concurrency'] < 1:
+            raise CommandError('--concurrency must be at least 1')
+        if options['duration'] <= 0 or options['interval'] <= 0:
+            raise CommandError('--duration and --interval must be positive')
+        if options['url'] and urlsplit(options['url']).scheme != 'http':
+            raise CommandError('--url must be an http:// URL')
+
+        got_request_exception.connect(store_exception)
+        try:
+            report = asyncio.run(self.run(mix, options))
+        finally:
+            got_request_exception.disconnect(store_exception)
+
+        overall = report['overall']
+        if options['output']:
+            with open(options['output'], 'w') as output_file:
+                json.dump(report, output_file, indent=2)
+            if not overall['requests']:
+                raise CommandError('No requests were sent: no operation in --mix had remissions to work on')
+            self.stdout.write(
+                f"{overall['requests']} requests, {overall['throughput_rps']:.1f} req/s, "
+                f"p95={overall['latency_ms']['p95']:.2f}ms, {overall['errors']} error(s) "
+                f"({overall['lock_errors']} lock)"
+            )
+        else:
+            self.stdout.write(json.dumps(report, indent=2))
+            if not overall['requests']:
+                raise CommandError('No requests were sent: no operation in --mix had remissions to work on')
+
+    def parse_mix(self, value):
+        mix = {}
+        for pair in value.split(','):
+            name, _, weight = pair.partition('=')
+            name = name.strip()
+            if not hasattr(Workload, f'op_{name}'):
+                raise CommandError(f'Unknown operation in --mix: {name}')
+            try:
+                mix[name] = float(weight)
+            except ValueError:
+                raise CommandError(f'Invalid weight for {name} in --mix: {weight}')
+            if mix[name] < 0:
+                raise CommandError(f'Invalid weight for {name} in --mix: {weight}')
+        if not any(mix.values()):
+            raise CommandError('--mix needs at least one operation with a positive weight')
+        return {name: weight for name, weight in mix.items() if weight}
+
+    def transport(self, options):
+        if options['url']:
+            return HTTPTransport(options['url'])
+        if options['target'] == 'wsgi':
+            return WSGITransport()
+        return ASGITransport()
+
+    async def run(self, mix, options):
+        if not options['url'] and options['target'] == 'wsgi':
+            asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(options['concurrency']))
+
+        loader = self.transport(options)
+        try:
+            open_ids = await self.load_ids(loader, {'status': 'open'})
+            remission_ids = await self.load_ids(loader, {})
+        finally:
+            await loader.close()
+        if not remission_ids:
+            raise CommandError('There are no remissions to load; populate the database with seed first')
+
+        workload = Workload(mix, open_ids, remission_ids, random.Random(options['seed']))
+        samples = []
+        started = time.perf_counter()
+        deadline = started + options['duration']
+
+        async def client():
+            transport = self.transport(options)
+            try:
+                while time.perf_counter() < deadline:
+                    request = workload.next()
+                    if request is None:
+                        break
+                    name, method, path, body = request
+                    sent = time.perf_counter()
+                    try:
+                        status, _, error = await transport.request(method, path, body)
+                    except (OSError, asyncio.IncompleteReadError, ValueError):
+                        status, error = None, 'connection'
+                    samples.append(Sample(name, sent - started, (time.perf_counter() - sent) * 1000, status, error))
+            finally:
+                await transport.close()
+
+        await asyncio.gather(*(client() for _ in range(options['concurrency'])))
+        elapsed = time.perf_counter() - started
+        return self.report(samples, elapsed, mix, options)
+
+    async def load_ids(self, transport, params):
+        query = urlencode({
+            **params, 'pagination': 'cursor', 'page_size': ID_POOL_SIZE, 'ordering': '-id', 'fields': 'id'
+        })
+        status, content, _ = await transport.request('GET', f'/api/remissions/?{query}')
+        if status != 200:
+            raise CommandError(f'Loading remission ids returned {status}')
+        return [row['id'] for row in json.loads(content)['results']]
+
+    def report(self, samples, elapsed, mix, options):
+        by_operation = defaultdict(list)
+        buckets = defaultdict(list)
+        for sample in samples:
+            by_operation[sample.operation].append(sample)
+            buckets[int(sample.offset // options['interval'])].append(sample)
+
+        timeseries = []
+        for index in range(max(buckets, default=-1) + 1):
+            # El último intervalo puede ser más corto que --interval.
+            width = min(options['interval'], elapsed - index * options['interval'])
+            timeseries.append({'start_s': index * options['interval'], **summarize(buckets[index], width)})
+
+        return {
+            'created_at': timezone.now().isoformat(),
+            'target': options['url'] or options['target'],
+            'concurrency': options['concurrency'],
+            'duration_s': options['duration'],
+            'elapsed_s': elapsed,
+            'mix': mix,
+            'overall': summarize(samples, elapsed),
+            'operations': {name: summarize(by_operation[name], elapsed) for name in mix},
+            'timeseries': timeseries,
+        }
@@ -0,0 +1,100 @@
+import json
+import os
+from glob import glob
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    """
+    Comando para consultar las capturas de ProfilingMiddleware (core/profiling.py).
+
+    Sin argumentos lista las capturas de PROFILING_DIR, de la más reciente a la más antigua,
+    con su duración, consultas SQL y tiempo en serializers. Con un id resume esa captura: las
+    funciones con más tiempo acumulado y las consultas más lentas con su plan. --clear borra
+    todas las capturas.
+    """
+    help = 'List request profiling captures, or summarize one by id'
+
+    def add_arguments(self, parser):
+        parser.add_argument('id', nargs='?', help='Capture to summarize')
+        parser.add_argument('--limit', type=int, default=20, help='Captures to list')
+        parser.add_argument('--path', help='Only list captures whose path contains this text')
+        parser.add_argument(
+            '--sort', choices=['created', 'duration', 'sql'], default='created', help='Order of the list'
+        )
+        parser.add_argument('--top', type=int, default=15, help='Functions and queries shown in a summary')
+        parser.add_argument('--clear', action='store_true', help='Delete every capture')
+
+    def handle(self, *args, **options):
+        directory = settings.PROFILING_DIR
+        if options['clear']:
+            files = glob(os.path.join(directory, '*.json')) + glob(os.path.join(directory, '*.prof'))
+            for path in files:
+                os.remove(path)
+            self.stdout.write(f'Deleted {len(files)} file(s).')
+        elif options['id']:
+            self.summarize(self.load(os.path.join(directory, f"{options['id']}.json")), directory, options['top'])
+        else:
+            self.list(directory, options)
+
+    def load(self, path):
+        try:
+            with open(path) as capture_file:
+                return json.load(capture_file)
+        except FileNotFoundError:
+            raise CommandError(f'Capture not found: {os.path.basename(path)[:-5]}')
+
+    def list(self, directory, options):
+        captures = [self.load(path) for path in glob(os.path.join(directory, '*.json'))]
+        if options['path']:
+            captures = [capture for capture in captures if options['path'] in capture['path']]
+        key = {
+            'created': lambda capture: capture['id'],
+            'duration': lambda capture: capture['duration_ms'],
+            'sql': lambda capture: capture['sql']['duration_ms'],
+        }[options['sort']]
+        captures.sort(key=key, reverse=True)
+
+        if not captures:
+            self.stdout.write(f'No captures in {directory}.')
+            return
+        self.stdout.write(
+            f"{'id':<24} {'status':>6} {'total':>10} {'sql':>10} {'queries':>7} {'serializer':>10}  request"
+        )
+        for capture in captures[:options['limit']]:
+            query = f"?{capture['query_string']}" if capture['query_string'] else ''
+            self.stdout.write(
+                f"{capture['id']:<24} {capture['status']:>6} {capture['duration_ms']:>8.1f}ms "
+                f"{capture['sql']['duration_ms']:>8.1f}ms {capture['sql']['count']:>7} "
+                f"{capture['serializer_ms']:>8.1f}ms  {capture['method']} {capture['path']}{query}"
+            )
+
+    def summarize(self, capture, directory, top):
+        query = f"?{capture['query_string']}" if capture['query_string'] else ''
+        self.stdout.write(f"{capture['method']} {capture['path']}{query} -> {capture['status']}")
+        self.stdout.write(
+            f"  view={capture['view']} trigger={capture['trigger']} created_at={capture['created_at']}"
+        )
+        self.stdout.write(
+            f"  total={capture['duration_ms']:.1f}ms sql={capture['sql']['duration_ms']:.1f}ms "
+            f"({capture['sql']['count']} queries) serializer={capture['serializer_ms']:.1f}ms "
+            f"render={capture['render_ms']:.1f}ms"
+        )
+        self.stdout.write(f"  cProfile stats: {os.path.join(directory, capture['id'] + '.prof')}")
+
+        self.stdout.write('\nFunctions by cumulative time:')
+        for function in capture['functions'][:top]:
+            self.stdout.write(
+                f"  {function['cumulative_ms']:>9.1f}ms {function['own_ms']:>9.1f}ms "
+                f"{function['calls']:>8}  {function['function']}"
+            )
+
+        statements = sorted(capture['sql']['statements'], key=lambda statement: -statement['duration_ms'])
+        self.stdout.write('\nSlowest queries:')
+        for statement in statements[:top]:
+            self.stdout.write(f"  {statement['duration_ms']:.1f}ms [{statement['alias']}] {statement['sql']}")
+            if statement['params']:
+                self.stdout.write(f"    params: {statement['params']}")
+            for step in statement.get('explain', []):
+                self.stdout.write(f'    {step}')
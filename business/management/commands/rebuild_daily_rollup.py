@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+from business.models import DailySalesRollup
+
+class Command(BaseCommand):
+    """
+    Comando para reconstruir el acumulado diario de ventas.
+
+    Vuelve a agregar las ventas por día y reemplaza las filas del acumulado,
+    ya sea completo o sólo dentro de un rango de fechas.
+    """
+    help = 'Backfill or rebuild the daily sales rollup table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='date_from', help='First date to rebuild (YYYY-MM-DD)')
+        parser.add_argument('--to', dest='date_to', help='Last date to rebuild (YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        dates = {}
+        for option in ('date_from', 'date_to'):
+            value = options[option]
+            if value:
+                try:
+                    dates[option] = parse_date(value)
+                except ValueError:
+                    dates[option] = None
+                if dates[option] is None:
+                    raise CommandError(f'Invalid date: {value}')
+
+        days = DailySalesRollup.objects.rebuild(dates.get('date_from'), dates.get('date_to'))
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt daily rollup for {days} day(s).'))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from business.models import Remission
+
+class Command(BaseCommand):
+    """
+    Comando para reparar los totales acumulados de las remisiones.
+
+    Recalcula ventas, impuestos, número de ventas y créditos de cada remisión
+    a partir de sus registros, útil tras cargas masivas o correcciones manuales.
+    """
+    help = 'Rebuild the running sales/credit totals stored on each remission'
+
+    def add_arguments(self, parser):
+        parser.add_argument('ids', nargs='*', type=int, help='Remission ids to rebuild (default: all)')
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only report remissions whose totals are out of sync, without modifying them'
+        )
+
+    def handle(self, *args, **options):
+        remissions = Remission.objects.all()
+        if options['ids']:
+            remissions = remissions.filter(pk__in=options['ids'])
+
+        if options['check']:
+            out_of_sync = list(remissions.out_of_sync().values_list('pk', flat=True))
+            for pk in out_of_sync:
+                self.stdout.write(f'Remission {pk} out of sync')
+            self.stdout.write(f'{len(out_of_sync)} remission(s) out of sync.')
+            return
+
+        updated = remissions.rebuild_totals()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt totals for {updated} remission(s).'))
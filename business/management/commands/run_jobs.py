@@ -0,0 +1,94 @@
+import os
+import signal
+import socket
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connections
+from business.jobs import execute, finish
+from business.models import Job
+
+
+class Command(BaseCommand):
+    """
+    Worker de los trabajos en segundo plano (ver business/jobs.py).
+
+    Toma trabajos de la tabla Job y los ejecuta en un pool de hilos de --concurrency lugares,
+    sin rebasar JOB_MAX_RUNNING entre todos los workers. En cada vuelta guarda el avance de
+    sus trabajos (que también sirve de heartbeat) y regresa a la cola los de workers que
+    dejaron de responder. Con SIGTERM o Ctrl+C deja de tomar trabajos y espera a que terminen
+    los que están en curso.
+    """
+    help = 'Run queued background jobs (bulk close, rollup rebuild, exports)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int, default=settings.JOB_MAX_RUNNING,
+            help='Jobs this worker runs at once (JOB_MAX_RUNNING still caps all workers together)'
+        )
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds between checks for new jobs')
+        parser.add_argument('--burst', action='store_true', help='Exit once no job is ready or running')
+
+    def handle(self, *args, **options):
+        concurrency = max(options['concurrency'], 1)
+        worker = f'{socket.gethostname()}:{os.getpid()}'
+        self.stopping = threading.Event()
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, lambda *args: self.stopping.set())
+
+        self.stdout.write(f'Worker {worker} running up to {concurrency} job(s).')
+        running = {}
+        last_requeue = 0
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            try:
+                while True:
+                    for future in [future for future in running if future.done()]:
+                        job = running.pop(future)
+                        if future.exception():
+                            # El trabajo queda en ejecución sin heartbeat; se reencola al volverse obsoleto.
+                            self.stderr.write(f'Job {job.pk} could not be saved: {future.exception()}')
+                        else:
+                            self.stdout.write(f'Job {job.pk} {"done" if future.result() else "failed"}.')
+
+                    claimed = False
+                    try:
+                        Job.objects.save_progress(running.values())
+                        if time.monotonic() - last_requeue >= settings.JOB_STALE_AFTER / 5:
+                            Job.objects.requeue_stale()
+                            last_requeue = time.monotonic()
+
+                        while not self.stopping.is_set() and len(running) < concurrency:
+                            job = Job.objects.claim(worker)
+                            if job is None:
+                                break
+                            self.stdout.write(f'Job {job.pk} ({job.kind}) started, attempt {job.attempts}.')
+                            running[pool.submit(self.run_in_thread, job)] = job
+                            claimed = True
+                    except OperationalError as e:
+                        # Otra conexión retuvo el bloqueo de escritura más que busy_timeout; se reintenta en la siguiente vuelta.
+                        self.stderr.write(f'Database busy: {e}')
+
+                    if not running and (self.stopping.is_set() or (options['burst'] and not claimed)):
+                        break
+                    if running:
+                        wait(running, timeout=options['poll_interval'], return_when=FIRST_COMPLETED)
+                    elif not claimed:
+                        self.stopping.wait(options['poll_interval'])
+            except KeyboardInterrupt:
+                self.stopping.set()
+                self.stdout.write('Stopping, waiting for running jobs...')
+
+        self.stdout.write(self.style.SUCCESS(f'Worker {worker} stopped.'))
+
+    @staticmethod
+    def run_in_thread(job):
+        changes = execute(job)
+        # Se cierran las conexiones del hilo (y cualquier lectura que el trabajo haya dejado
+        # abierta) antes de guardar el resultado con una conexión nueva.
+        connections.close_all()
+        try:
+            return finish(job, changes)
+        finally:
+            connections.close_all()
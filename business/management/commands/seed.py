@@ -1,75 +1,278 @@
+import math
 import random
+from datetime import datetime, time, timedelta
 from decimal import Decimal
-from django.core.management.base import BaseCommand
+from functools import partial
+from multiprocessing import Pool
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 from faker import Faker
-from business.models import Customer, Order, Remission, Sale, CreditAssignment
+from business.models import Customer, Order, Remission, Sale, CreditAssignment, DailySalesRollup, sale_date
+
+CENT = Decimal('0.01')
+TAX_RATE = Decimal('0.16')
+
+CREDIT_REASONS = [
+    'Devolución de mercancía',
+    'Descuento por pronto pago',
+    'Ajuste de precio',
+    'Bonificación comercial',
+    'Mercancía dañada',
+]
+
+
+def generate_chunk(spec):
+    """
+    Genera las filas de un bloque de órdenes como tuplas simples.
+
+    Cada bloque usa su propio generador aleatorio derivado de la semilla y del número
+    de bloque, de modo que el resultado es el mismo sin importar cuántos procesos
+    participen en la generación.
+    """
+    rng = random.Random(f"{spec['seed']}-{spec['chunk']}")
+    start, span = spec['start'], spec['span']
+    min_sales, max_sales = spec['sales_per_remission']
+
+    orders, remissions, sales, credits, days = [], [], [], [], {}
+    for index in range(spec['first_order'], spec['first_order'] + spec['orders']):
+        position = rng.random()
+        if spec['distribution'] == 'recent':
+            # Densidad creciente hacia el final del rango.
+            position = math.sqrt(position)
+        created_at = start + timedelta(seconds=position * span)
+
+        orders.append((rng.choice(spec['customer_ids']), f"ORD-{spec['tag']}-{index:09d}", created_at))
+
+        for number in range(spec['remissions_per_order']):
+            remission_index = len(remissions)
+            subtotal_sum = tax_sum = Decimal('0.00')
+            sales_count = rng.randint(min_sales, max_sales)
+
+            for _ in range(sales_count):
+                subtotal = Decimal(rng.randint(1000, 50000)) * CENT
+                tax = (subtotal * TAX_RATE).quantize(CENT)
+                sold_at = created_at + timedelta(seconds=rng.randint(0, 3600))
+                sales.append((remission_index, subtotal, tax, sold_at))
+                subtotal_sum += subtotal
+                tax_sum += tax
+
+                day = sale_date(sold_at)
+                day_subtotal, day_tax, day_count = days.get(day, (0, 0, 0))
+                days[day] = (day_subtotal + subtotal, day_tax + tax, day_count + 1)
+
+            credits_total = Decimal('0.00')
+            if sales_count and rng.random() < spec['credit_ratio']:
+                ceiling = int((subtotal_sum + tax_sum) * Decimal('1.2') * 100)
+                credits_total = Decimal(rng.randint(500, max(ceiling, 500))) * CENT
+                credits.append((remission_index, credits_total, rng.choice(CREDIT_REASONS), created_at))
+
+            remissions.append((
+                len(orders) - 1, f"REM-{spec['tag']}-{index:09d}-{number}", created_at,
+                subtotal_sum, tax_sum, sales_count, credits_total
+            ))
+
+    return orders, remissions, sales, credits, days
+
+
+def insert_rows(model, field_names, rows):
+    """
+    Inserta filas con executemany, sin instanciar modelos. Es la ruta para ventas y créditos,
+    que son el grueso del volumen y cuyos ids no se necesitan después.
+    """
+    ops = connection.ops
+    fields = [model._meta.get_field(name) for name in field_names]
+    adapters = []
+    for field in fields:
+        if field.get_internal_type() == 'DecimalField':
+            adapters.append(partial(
+                ops.adapt_decimalfield_value, max_digits=field.max_digits, decimal_places=field.decimal_places
+            ))
+        elif field.get_internal_type() == 'DateTimeField':
+            adapters.append(ops.adapt_datetimefield_value)
+        else:
+            adapters.append(None)
+
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        ops.quote_name(model._meta.db_table),
+        ', '.join(ops.quote_name(field.column) for field in fields),
+        ', '.join(['%s'] * len(fields))
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, [
+            [adapt(value) if adapt else value for adapt, value in zip(adapters, row)]
+            for row in rows
+        ])
 
-fake = Faker()
 
 class Command(BaseCommand):
     """
     Comando para poblar la base de datos con datos.
-    
-    Genera una estructura jerárquica de Clientes, Órdenes, Remisiones, Ventas y Créditos
-    utilizando la librería Faker para asegurar datos realistas y variabilidad en las fechas,
-    lo que permite validar correctamente los reportes diarios.
+
+    Genera una estructura jerárquica de Clientes, Órdenes, Remisiones, Ventas y Créditos.
+    Los volúmenes, el rango y la distribución de fechas son configurables y, con --seed,
+    los datos son reproducibles. Las filas se generan por bloques (opcionalmente en varios
+    procesos) y se insertan por lotes con executemany y su fecha original, sin instanciar
+    modelos. Las remisiones se crean con sus totales acumulados ya calculados y el acumulado
+    diario se actualiza una vez por día en cada lote.
     """
     help = 'Seed database with random data'
-    
-    def handle(self, *args, **kwargs):
-        self.stdout.write('Seeding database...')
-        
-        customers = []
-        for _ in range(50):
-            c = Customer.objects.create(
-                name=fake.name(),
-                email=fake.email(),
-                is_active=True
-            )
-            customers.append(c)
-            
-        for i in range(100):
-            customer = random.choice(customers)
-            order = Order.objects.create(
-                customer=customer,
-                folio=f"ORD-{fake.unique.bothify(text='####??')}"
-            )
-            
-            remission = Remission.objects.create(
-                order=order,
-                folio=f"REM-{fake.unique.bothify(text='####??')}",
-                status='open'
-            )
-        
-            current_date = fake.date_time_between(
-                start_date='-30d', 
-                end_date='now', 
-                tzinfo=timezone.get_current_timezone()
-            )
-            
-            total_sales_amount = Decimal('0.00')
-            for _ in range(random.randint(1,3)):
-                subtotal = Decimal(random.uniform(10.0,500.0)).quantize(Decimal('0.00'))
-                tax = (subtotal * Decimal('0.16')).quantize(Decimal('0.00'))
-                
-                sale = Sale.objects.create(
-                    remission=remission,
-                    subtotal=subtotal,
-                    tax=tax
-                )
-                
-                sale.created_at = current_date
-                sale.save()
-                
-                total_sales_amount += (subtotal + tax)
-                
-            if random.random() > 0.5:
-                amount = Decimal(random.uniform(5.0, float(total_sales_amount) * 1.2)).quantize(Decimal('0.00'))
-                CreditAssignment.objects.create(
-                    remission=remission,
-                    amount=amount,
-                    reason=fake.sentence()
+
+    def add_arguments(self, parser):
+        parser.add_argument('--customers', type=int, default=50, help='Number of customers')
+        parser.add_argument('--orders', type=int, default=100, help='Number of orders')
+        parser.add_argument('--remissions-per-order', type=int, default=1)
+        parser.add_argument('--sales-per-remission', default='1-3', help='Range of sales per remission, e.g. 1-3')
+        parser.add_argument('--credit-ratio', type=float, default=0.5, help='Share of remissions with a credit')
+        parser.add_argument('--from', dest='date_from', help='First date for generated records (YYYY-MM-DD)')
+        parser.add_argument('--to', dest='date_to', help='Last date for generated records (YYYY-MM-DD)')
+        parser.add_argument(
+            '--distribution',
+            choices=['uniform', 'recent'],
+            default='uniform',
+            help='How records are spread over the date range'
+        )
+        parser.add_argument('--seed', type=int, help='Random seed for reproducible data (use with --from/--to)')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Orders generated and inserted per batch')
+        parser.add_argument('--workers', type=int, default=0, help='Processes used to generate rows (0 = in-process)')
+
+    def handle(self, *args, **options):
+        try:
+            min_sales, max_sales = (int(value) for value in options['sales_per_remission'].split('-'))
+        except ValueError:
+            raise CommandError('--sales-per-remission must look like MIN-MAX, e.g. 1-3')
+        if min_sales < 0 or max_sales < min_sales:
+            raise CommandError('--sales-per-remission must be a non-negative range')
+
+        start, end = self.get_date_range(options)
+        seed = options['seed'] if options['seed'] is not None else random.randrange(10 ** 9)
+        tag = f'{seed:x}'.upper()
+
+        if Order.objects.filter(folio__startswith=f'ORD-{tag}-').exists():
+            raise CommandError(f'Data for seed {seed} already exists; use a different --seed')
+
+        self.stdout.write(f'Seeding database (seed={seed})...')
+
+        customer_ids = self.create_customers(options['customers'], seed)
+
+        batch_size = options['batch_size']
+        specs = [
+            {
+                'seed': seed,
+                'tag': tag,
+                'chunk': chunk,
+                'first_order': first_order,
+                'orders': min(batch_size, options['orders'] - first_order),
+                'customer_ids': customer_ids,
+                'remissions_per_order': options['remissions_per_order'],
+                'sales_per_remission': (min_sales, max_sales),
+                'credit_ratio': options['credit_ratio'],
+                'distribution': options['distribution'],
+                'start': start,
+                'span': (end - start).total_seconds(),
+            }
+            for chunk, first_order in enumerate(range(0, options['orders'], batch_size))
+        ]
+
+        totals = {'orders': 0, 'remissions': 0, 'sales': 0, 'credits': 0}
+        if options['workers'] > 0:
+            with Pool(options['workers']) as pool:
+                for rows in pool.imap(generate_chunk, specs):
+                    self.insert_chunk(rows, totals)
+        else:
+            for spec in specs:
+                self.insert_chunk(generate_chunk(spec), totals)
+        self.reset_sequences()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Database seeding completed successfully: {len(customer_ids)} customers, {totals['orders']} orders, "
+            f"{totals['remissions']} remissions, {totals['sales']} sales, {totals['credits']} credits."
+        ))
+
+    def get_date_range(self, options):
+        tz = timezone.get_current_timezone()
+        now = timezone.now()
+        dates = {}
+        for option in ('date_from', 'date_to'):
+            if options[option]:
+                try:
+                    dates[option] = parse_date(options[option])
+                except ValueError:
+                    dates[option] = None
+                if dates[option] is None:
+                    raise CommandError(f'Invalid date: {options[option]}')
+
+        start = (
+            timezone.make_aware(datetime.combine(dates['date_from'], time.min), tz)
+            if 'date_from' in dates else now - timedelta(days=30)
+        )
+        end = (
+            min(timezone.make_aware(datetime.combine(dates['date_to'], time.max), tz), now)
+            if 'date_to' in dates else now
+        )
+        if end <= start:
+            raise CommandError('The date range is empty')
+        return start, end
+
+    def create_customers(self, count, seed):
+        fake = Faker()
+        fake.seed_instance(seed)
+        customers = Customer.objects.bulk_create(
+            (Customer(name=fake.name(), email=fake.email(), is_active=True) for _ in range(count)),
+            batch_size=1000
+        )
+        return [customer.pk for customer in customers]
+
+    def insert_chunk(self, rows, totals):
+        """
+        Inserta un bloque generado. Los ids de órdenes y remisiones se asignan a partir del
+        máximo actual (el comando asume acceso exclusivo a esas tablas mientras corre).
+        """
+        orders_rows, remission_rows, sale_rows, credit_rows, days = rows
+
+        with transaction.atomic():
+            order_base = (Order.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+            remission_base = (Remission.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+            # Las filas insertadas sin los modelos también entran al feed de cambios.
+            now = timezone.now()
+
+            insert_rows(Order, ['id', 'customer', 'folio', 'created_at', 'updated_at'], (
+                (order_base + index, customer_id, folio, created_at, now)
+                for index, (customer_id, folio, created_at) in enumerate(orders_rows)
+            ))
+            insert_rows(
+                Remission, ['id', 'order', 'folio', 'status', 'created_at', 'updated_at', *Remission.TOTAL_FIELDS], (
+                    (remission_base + index, order_base + order_index, folio, 'open', created_at, now, *remission_totals)
+                    for index, (order_index, folio, created_at, *remission_totals) in enumerate(remission_rows)
                 )
-   
-        self.stdout.write(self.style.SUCCESS(f'Database seeding completed successfully.'))
\ No newline at end of file
+            )
+            insert_rows(Sale, ['remission', 'subtotal', 'tax', 'created_at', 'updated_at'], (
+                (remission_base + index, subtotal, tax, created_at, now)
+                for index, subtotal, tax, created_at in sale_rows
+            ))
+            insert_rows(CreditAssignment, ['remission', 'amount', 'reason', 'created_at', 'updated_at'], (
+                (remission_base + index, amount, reason, created_at, now)
+                for index, amount, reason, created_at in credit_rows
+            ))
+
+            for day, (subtotal, tax, count) in days.items():
+                DailySalesRollup.objects.apply_delta(day, subtotal, tax, count)
+
+        totals['orders'] += len(orders_rows)
+        totals['remissions'] += len(remission_rows)
+        totals['sales'] += len(sale_rows)
+        totals['credits'] += len(credit_rows)
+        self.stdout.write(f"  {totals['orders']} orders, {totals['sales']} sales inserted")
+
+    def reset_sequences(self):
+        """
+        Ajusta las secuencias de ids tras insertar con ids explícitos (como hace loaddata).
+        """
+        statements = connection.ops.sequence_reset_sql(no_style(), [Order, Remission])
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
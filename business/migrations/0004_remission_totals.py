@@ -0,0 +1,54 @@
+# Generated by Django 5.2.11 on 2026-10-18 06:22
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_totals(apps, schema_editor):
+    Remission = apps.get_model('business', 'Remission')
+    Sale = apps.get_model('business', 'Sale')
+    CreditAssignment = apps.get_model('business', 'CreditAssignment')
+
+    sales = Sale.objects.filter(remission=OuterRef('pk')).order_by().values('remission')
+    credits = CreditAssignment.objects.filter(remission=OuterRef('pk')).order_by().values('remission')
+    zero = Value(Decimal('0.00'), output_field=models.DecimalField(max_digits=14, decimal_places=2))
+
+    Remission.objects.update(
+        sales_subtotal=Coalesce(Subquery(sales.annotate(value=Sum('subtotal')).values('value')), zero),
+        sales_tax=Coalesce(Subquery(sales.annotate(value=Sum('tax')).values('value')), zero),
+        sales_count=Coalesce(Subquery(sales.annotate(value=Count('id')).values('value')), Value(0)),
+        credits_total=Coalesce(Subquery(credits.annotate(value=Sum('amount')).values('value')), zero)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('business', '0003_remission_created_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='remission',
+            name='credits_total',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='remission',
+            name='sales_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='remission',
+            name='sales_subtotal',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='remission',
+            name='sales_tax',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=14),
+        ),
+        migrations.RunPython(backfill_totals, migrations.RunPython.noop),
+    ]
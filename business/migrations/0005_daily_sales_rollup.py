@@ -0,0 +1,43 @@
+# Generated by Django 5.2.11 on 2026-10-18 06:23
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_rollup(apps, schema_editor):
+    Sale = apps.get_model('business', 'Sale')
+    DailySalesRollup = apps.get_model('business', 'DailySalesRollup')
+
+    days = (
+        Sale.objects.annotate(date=TruncDate('created_at'))
+        .values('date')
+        .annotate(day_subtotal=Sum('subtotal'), day_tax=Sum('tax'), day_count=Count('id'))
+        .order_by('date')
+    )
+    DailySalesRollup.objects.bulk_create(
+        DailySalesRollup(date=day['date'], subtotal=day['day_subtotal'], tax=day['day_tax'], sales_count=day['day_count'])
+        for day in days
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('business', '0004_remission_totals'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('subtotal', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=16)),
+                ('tax', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=16)),
+                ('sales_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(backfill_rollup, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.11 on 2026-10-18 06:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('business', '0005_daily_sales_rollup'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='creditassignment',
+            name='remission',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='credits', to='business.remission'),
+        ),
+        migrations.AlterField(
+            model_name='sale',
+            name='remission',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='sales', to='business.remission'),
+        ),
+        migrations.AddIndex(
+            model_name='creditassignment',
+            index=models.Index(fields=['remission', 'created_at'], name='credit_remission_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='remission',
+            index=models.Index(fields=['status'], name='remission_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['remission', 'created_at'], name='sale_remission_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['created_at'], name='sale_created_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.11 on 2026-10-18 06:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('business', '0007_created_at_default'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='remission',
+            name='order',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='remissions', to='business.order'),
+        ),
+        migrations.AddIndex(
+            model_name='remission',
+            index=models.Index(fields=['order', 'status', 'created_at', 'sales_subtotal', 'sales_tax', 'credits_total'], name='remission_order_totals_idx'),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.11 on 2026-10-18 07:03
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('business', '0009_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedRemission',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('folio', models.CharField(max_length=50, unique=True)),
+                ('status', models.CharField(choices=[('open', 'Open'), ('closed', 'Closed')], max_length=10)),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('sales_subtotal', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('sales_tax', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('sales_count', models.PositiveIntegerField()),
+                ('credits_total', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('customer', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='archived_remissions', to='business.customer')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_remissions', to='business.order')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedCreditAssignment',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('reason', models.CharField(max_length=255)),
+                ('created_at', models.DateTimeField()),
+                ('remission', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='credits', to='business.archivedremission')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedSale',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('subtotal', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('tax', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('created_at', models.DateTimeField()),
+                ('remission', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='sales', to='business.archivedremission')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='archivedremission',
+            index=models.Index(fields=['customer', 'created_at', 'sales_subtotal', 'sales_tax', 'credits_total'], name='archived_customer_totals_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedcreditassignment',
+            index=models.Index(fields=['remission', 'created_at'], name='archived_credit_remission_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedsale',
+            index=models.Index(fields=['remission', 'created_at'], name='archived_sale_remission_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedsale',
+            index=models.Index(fields=['created_at'], name='archived_sale_created_idx'),
+        ),
+    ]
@@ -0,0 +1,67 @@
+from django.db import migrations
+
+# Índice de búsqueda: tabla virtual FTS5 con tokenizador trigram (coincidencias por subcadena,
+# sin distinguir mayúsculas). El rowid codifica el registro: id * 4 + tipo, con los tipos
+# 0 = cliente, 1 = orden, 2 = remisión y 3 = remisión archivada. Los triggers la mantienen
+# sincronizada en cualquier escritura, incluidas las que no pasan por el ORM.
+SOURCES = [
+    # (tabla, tipo, columnas indexadas, título, detalle)
+    ('business_customer', 0, ['name', 'email'], 'name', "coalesce({row}.email, '')"),
+    ('business_order', 1, ['folio'], 'folio', "''"),
+    ('business_remission', 2, ['folio'], 'folio', "''"),
+    ('business_archivedremission', 3, ['folio'], 'folio', "''"),
+]
+
+
+def statements():
+    yield "CREATE VIRTUAL TABLE business_search USING fts5(title, detail, tokenize='trigram')"
+    for table, kind, columns, title, detail in SOURCES:
+        changed = ' OR '.join(f'old.{column} IS NOT new.{column}' for column in columns)
+        values = f"{{row}}.id * 4 + {kind}, {{row}}.{title}, {detail}"
+        yield (
+            f"CREATE TRIGGER {table}_search_insert AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO business_search (rowid, title, detail) VALUES ({values.format(row='new')}); END"
+        )
+        yield (
+            # Sólo cuando cambia una columna indexada, no en cada actualización de totales.
+            f"CREATE TRIGGER {table}_search_update AFTER UPDATE OF {', '.join(columns)} ON {table} "
+            f"WHEN {changed} BEGIN "
+            f"DELETE FROM business_search WHERE rowid = old.id * 4 + {kind}; "
+            f"INSERT INTO business_search (rowid, title, detail) VALUES ({values.format(row='new')}); END"
+        )
+        yield (
+            f"CREATE TRIGGER {table}_search_delete AFTER DELETE ON {table} BEGIN "
+            f"DELETE FROM business_search WHERE rowid = old.id * 4 + {kind}; END"
+        )
+        yield (
+            f"INSERT INTO business_search (rowid, title, detail) "
+            f"SELECT {values.format(row=table)} FROM {table}"
+        )
+
+
+def create_index(apps, schema_editor):
+    # FTS5 sólo existe en SQLite.
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in statements():
+        schema_editor.execute(sql)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for table, *source in SOURCES:
+        for event in ('insert', 'update', 'delete'):
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {table}_search_{event}')
+    schema_editor.execute('DROP TABLE IF EXISTS business_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('business', '0010_archive'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.11 on 2026-10-18 07:12
+
+import django.db.models.expressions
+import django.db.models.functions.math
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('business', '0011_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedsale',
+            name='total',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.math.Round(django.db.models.expressions.CombinedExpression(models.F('subtotal'), '+', models.F('tax')), 2), output_field=models.DecimalField(decimal_places=2, max_digits=13)),
+        ),
+        migrations.AddField(
+            model_name='sale',
+            name='total',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.math.Round(django.db.models.expressions.CombinedExpression(models.F('subtotal'), '+', models.F('tax')), 2), output_field=models.DecimalField(decimal_places=2, max_digits=13)),
+        ),
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['total'], name='sale_total_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.11 on 2026-10-18 07:24
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('business', '0012_sale_total'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=500, unique=True)),
+                ('offset', models.BigIntegerField(default=0)),
+                ('line', models.PositiveBigIntegerField(default=0)),
+                ('rows', models.PositiveBigIntegerField(default=0)),
+                ('started_at', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
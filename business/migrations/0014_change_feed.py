@@ -0,0 +1,86 @@
+# Generated by Django 5.2.11 on 2026-10-18 07:31
+
+from importlib import import_module
+import django.utils.timezone
+from django.db import migrations, models
+
+search = import_module('business.migrations.0011_search')
+
+# Tablas que SQLite rehace al agregar updated_at (una columna NOT NULL). Al borrar la tabla
+# original se borran sus triggers, así que los del índice de búsqueda se vuelven a crear.
+REBUILT_TABLES = ('business_order', 'business_remission')
+TABLES = ('business_order', 'business_remission', 'business_sale', 'business_creditassignment')
+
+
+def create_search_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in search.statements():
+        if sql.startswith('CREATE TRIGGER') and any(f' ON {table} ' in sql for table in REBUILT_TABLES):
+            schema_editor.execute(sql.replace('CREATE TRIGGER', 'CREATE TRIGGER IF NOT EXISTS', 1))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('business', '0013_import_checkpoint'),
+    ]
+
+    operations = [
+        # Al revertir, RemoveField también rehace las tablas.
+        migrations.RunPython(migrations.RunPython.noop, create_search_triggers),
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resource', models.CharField(max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='creditassignment',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='remission',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='sale',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        # Las filas existentes entran al feed en el orden en que se crearon.
+        migrations.RunSQL(
+            [f'UPDATE {table} SET updated_at = created_at' for table in TABLES], migrations.RunSQL.noop
+        ),
+        migrations.RunPython(create_search_triggers, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='creditassignment',
+            index=models.Index(fields=['updated_at', 'id'], name='credit_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['updated_at', 'id'], name='order_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='remission',
+            index=models.Index(fields=['updated_at', 'id'], name='remission_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['updated_at', 'id'], name='sale_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['resource', 'deleted_at', 'object_id'], name='tombstone_resource_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+from django.db import migrations
+from django.db.models.functions import Round
+
+ROUNDED_FIELDS = ('sales_subtotal', 'sales_tax', 'credits_total')
+
+
+def round_totals(apps, schema_editor):
+    # SQLite suma los decimales como números de punto flotante: los totales que se llenaron o
+    # acumularon sin redondear (0004 y los incrementos anteriores) se redondean a centavos.
+    for name in ('Remission', 'ArchivedRemission'):
+        model = apps.get_model('business', name)
+        model.objects.update(**{field: Round(field, 2) for field in ROUNDED_FIELDS})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('business', '0014_change_feed'),
+    ]
+
+    operations = [
+        migrations.RunPython(round_totals, migrations.RunPython.noop),
+    ]
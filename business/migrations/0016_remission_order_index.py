@@ -0,0 +1,21 @@
+# Generated by Django 5.2.11 on 2026-10-18 07:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('business', '0015_round_remission_totals'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='remission',
+            name='remission_order_totals_idx',
+        ),
+        migrations.AddIndex(
+            model_name='remission',
+            index=models.Index(fields=['order', 'status', 'created_at'], name='remission_order_status_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.11 on 2026-10-18 07:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('business', '0016_remission_order_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importcheckpoint',
+            name='last_remission_id',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,147 @@
+# Generated by Django 5.2.11 on 2026-10-18 07:59
+
+from django.db import migrations, models
+
+# Tablas del feed de cambios (ver business/changes.py) y la columna con su última modificación,
+# que ordena las filas existentes al numerarlas.
+TABLES = {
+    'business_order': 'updated_at',
+    'business_remission': 'updated_at',
+    'business_sale': 'updated_at',
+    'business_creditassignment': 'updated_at',
+    'business_tombstone': 'deleted_at',
+}
+SEQUENCE = 'business_changesequence'
+
+
+def statements():
+    # El UPSERT crea la fila del contador si no existe (por ejemplo, tras un flush). Los
+    # triggers corren dentro de la escritura, con el bloqueo de SQLite ya tomado, así que el
+    # contador crece en el mismo orden en que se confirman las transacciones. Una migración
+    # que rehaga alguna de estas tablas borra sus triggers y debe volver a crearlos.
+    next_value = (
+        f"INSERT INTO {SEQUENCE} (id, value) VALUES (1, 1) ON CONFLICT (id) DO UPDATE SET value = value + 1; "
+    )
+    for table in TABLES:
+        assign = f"UPDATE {table} SET change_seq = (SELECT value FROM {SEQUENCE} WHERE id = 1) WHERE id = new.id; "
+        yield f"CREATE TRIGGER {table}_change_insert AFTER INSERT ON {table} BEGIN {next_value}{assign}END"
+        if table != 'business_tombstone':
+            yield (
+                f"CREATE TRIGGER {table}_change_update AFTER UPDATE ON {table} "
+                f"WHEN new.change_seq IS old.change_seq BEGIN {next_value}{assign}END"
+            )
+
+
+def number_existing_rows(apps, schema_editor):
+    # Las filas existentes entran al feed en el orden de su última modificación.
+    last = 0
+    for table, changed_at in TABLES.items():
+        schema_editor.execute(
+            f"UPDATE {table} SET change_seq = numbered.seq FROM ("
+            f"SELECT id, {last} + row_number() OVER (ORDER BY {changed_at}, id) AS seq FROM {table}"
+            f") AS numbered WHERE {table}.id = numbered.id"
+        )
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(f'SELECT count(*) FROM {table}')
+            last += cursor.fetchone()[0]
+    schema_editor.execute(f'INSERT INTO {SEQUENCE} (id, value) VALUES (1, %s)', [last])
+
+
+def create_triggers(apps, schema_editor):
+    # Como el índice de búsqueda, sólo en SQLite.
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in statements():
+        schema_editor.execute(sql)
+
+
+def drop_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for table in TABLES:
+        for event in ('insert', 'update'):
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {table}_change_{event}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('business', '0017_import_checkpoint_last_remission'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RemoveIndex(
+            model_name='creditassignment',
+            name='credit_updated_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='order',
+            name='order_updated_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='remission',
+            name='remission_updated_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='sale',
+            name='sale_updated_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='tombstone',
+            name='tombstone_resource_idx',
+        ),
+        migrations.AddField(
+            model_name='creditassignment',
+            name='change_seq',
+            field=models.BigIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='change_seq',
+            field=models.BigIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='remission',
+            name='change_seq',
+            field=models.BigIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='sale',
+            name='change_seq',
+            field=models.BigIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='tombstone',
+            name='change_seq',
+            field=models.BigIntegerField(editable=False, null=True),
+        ),
+        migrations.RunPython(number_existing_rows, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='creditassignment',
+            index=models.Index(fields=['change_seq'], name='credit_change_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['change_seq'], name='order_change_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='remission',
+            index=models.Index(fields=['change_seq'], name='remission_change_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['change_seq'], name='sale_change_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['resource', 'change_seq'], name='tombstone_change_idx'),
+        ),
+        migrations.RunPython(create_triggers, drop_triggers),
+    ]
@@ -0,0 +1,60 @@
+from importlib import import_module
+from django.db import migrations
+
+change_sequence = import_module('business.migrations.0018_change_sequence')
+
+TABLES = [table for table in change_sequence.TABLES if table != 'business_tombstone']
+
+
+def update_trigger(table, columns):
+    # Sin WHEN: el trigger se dispara en cada UPDATE que escriba alguna columna distinta de
+    # change_seq, aunque traiga un change_seq viejo (save() escribe el valor en memoria). Su
+    # propio UPDATE sólo escribe change_seq, así que no lo vuelve a disparar.
+    next_value = (
+        f"INSERT INTO {change_sequence.SEQUENCE} (id, value) VALUES (1, 1) "
+        f"ON CONFLICT (id) DO UPDATE SET value = value + 1; "
+    )
+    assign = (
+        f"UPDATE {table} SET change_seq = (SELECT value FROM {change_sequence.SEQUENCE} WHERE id = 1) "
+        f"WHERE id = new.id; "
+    )
+    return (
+        f"CREATE TRIGGER {table}_change_update AFTER UPDATE OF {', '.join(columns)} ON {table} "
+        f"BEGIN {next_value}{assign}END"
+    )
+
+
+def recreate_update_triggers(apps, schema_editor):
+    # Una migración que agregue columnas a estas tablas debe volver a crear el trigger con ellas.
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    for table in TABLES:
+        with connection.cursor() as cursor:
+            columns = [
+                column.name for column in connection.introspection.get_table_description(cursor, table)
+                if column.name != 'change_seq'
+            ]
+        schema_editor.execute(f'DROP TRIGGER IF EXISTS {table}_change_update')
+        schema_editor.execute(update_trigger(table, columns))
+
+
+def restore_update_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for table in TABLES:
+        schema_editor.execute(f'DROP TRIGGER IF EXISTS {table}_change_update')
+    for sql in change_sequence.statements():
+        if '_change_update ' in sql:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('business', '0018_change_sequence'),
+    ]
+
+    operations = [
+        migrations.RunPython(recreate_update_triggers, restore_update_triggers),
+    ]
@@ -1,71 +1,397 @@
-from django.db import models, transaction
-from django.db.models import Sum
+from django.db import connection, models, transaction, IntegrityError
+from django.db.models import Sum, Count, Exists, F, Func, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Round, TruncDate
 from django.core.validators import MinValueValidator
+from django.utils import timezone
+from datetime import datetime, time, timedelta
 from decimal import Decimal
 from django.core.exceptions import ValidationError
+from django.conf import settings
+from business.cache import invalidate_summaries, invalidate_all_summaries
+
+class RoundedDecimalField(models.DecimalField):
+    """
+    Campo de salida para expresiones decimales calculadas en la base de datos. SQLite las
+    regresa como números de punto flotante, así que se redondean a los decimales del campo.
+    """
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return Decimal(value).quantize(Decimal(1).scaleb(-self.decimal_places))
+
+
+class CustomerQuerySet(models.QuerySet):
+    def with_receivables(self, date_from=None, date_to=None):
+        """
+        Agrega a cada cliente sus remisiones abiertas, total vendido, total acreditado y saldo,
+        en una sola consulta agrupada sobre los totales acumulados de sus remisiones.
+        Con date_from/date_to sólo cuentan las remisiones creadas en ese rango; los clientes
+        sin remisiones aparecen con ceros.
+        """
+        remissions = Q()
+        archived = ArchivedRemission.objects.filter(customer=OuterRef('pk')).order_by()
+        if date_from:
+            remissions &= Q(orders__remissions__created_at__gte=day_range(date_from, date_from)[0])
+            archived = archived.filter(created_at__gte=day_range(date_from, date_from)[0])
+        if date_to:
+            remissions &= Q(orders__remissions__created_at__lt=day_range(date_to, date_to)[1])
+            archived = archived.filter(created_at__lt=day_range(date_to, date_to)[1])
+
+        # Se suman las columnas por separado y se combinan las sumas, así SQLite calcula cada
+        # suma una sola vez por grupo. Sin remisiones en el rango las sumas son NULL.
+        zero = Value(Decimal('0.00'))
+        subtotal, tax, credits = (
+            Coalesce(Sum(f'orders__remissions__{field}', filter=remissions), zero)
+            for field in ('sales_subtotal', 'sales_tax', 'credits_total')
+        )
+
+        def archived_sum(*fields):
+            # Las remisiones archivadas (todas cerradas) se suman con una subconsulta sobre el
+            # índice archived_customer_totals_idx. SUM se escribe con Func para que la subconsulta
+            # no lleve GROUP BY: siempre regresa una fila y la consulta principal no agrupa por ella.
+            total = Func(F(fields[0]), function='SUM')
+            for field in fields[1:]:
+                total += Func(F(field), function='SUM')
+            return Subquery(
+                archived.annotate(value=Coalesce(total, zero)).values('value'),
+                output_field=models.DecimalField(max_digits=16, decimal_places=2)
+            )
+
+        def money(expression):
+            # Se redondea a centavos porque SQLite suma los decimales como números de punto flotante.
+            return Round(expression, 2, output_field=RoundedDecimalField(max_digits=16, decimal_places=2))
+
+        return self.alias(
+            archived_sales=archived_sum('sales_subtotal', 'sales_tax'),
+            archived_credits=archived_sum('credits_total')
+        ).annotate(
+            open_remissions=Count('orders__remissions', filter=remissions & Q(orders__remissions__status='open')),
+            total_sales=money(subtotal + tax + F('archived_sales')),
+            total_credits=money(credits + F('archived_credits')),
+            balance=money(subtotal + tax + F('archived_sales') - credits - F('archived_credits'))
+        )
+
 
 class Customer(models.Model):
     name = models.CharField(max_length=255)
     email = models.EmailField(blank=True, null=True)
     is_active = models.BooleanField(default=True)
+
+    objects = CustomerQuerySet.as_manager()
     
 class Order(models.Model):
     customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name='orders')
     folio = models.CharField(max_length=50, unique=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Posición en el feed de cambios; la asignan triggers de SQLite (ver business/changes.py).
+    change_seq = models.BigIntegerField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['change_seq'], name='order_change_idx'),
+        ]
+
+class RemissionQuerySet(models.QuerySet):
+    """
+    Operaciones sobre los totales acumulados de las remisiones.
+    """
+    def apply_sales_delta(self, remission_id, subtotal, tax, count):
+        """
+        Suma (o resta) los importes de una venta a los totales acumulados de la remisión.
+        """
+        invalidate_summaries([remission_id])
+        # Se redondea a centavos porque SQLite suma los decimales como números de punto flotante.
+        return self.filter(pk=remission_id).update(
+            sales_subtotal=Round(F('sales_subtotal') + subtotal, 2),
+            sales_tax=Round(F('sales_tax') + tax, 2),
+            sales_count=F('sales_count') + count,
+            updated_at=timezone.now()
+        )
+
+    def apply_credits_delta(self, remission_id, amount):
+        """
+        Suma (o resta) el monto de un crédito al total acumulado de la remisión.
+        """
+        invalidate_summaries([remission_id])
+        return self.filter(pk=remission_id).update(
+            credits_total=Round(F('credits_total') + amount, 2),
+            updated_at=timezone.now()
+        )
+
+    def with_balance(self):
+        """
+        Agrega el alias "balance" (ventas más impuestos menos créditos, desde los totales
+        acumulados) para filtrar y ordenar sin agregar ventas ni créditos.
+        """
+        # Se redondea a centavos porque SQLite opera los decimales como números de punto flotante.
+        return self.alias(balance=Round(
+            F('sales_subtotal') + F('sales_tax') - F('credits_total'), 2,
+            output_field=RoundedDecimalField(max_digits=14, decimal_places=2)
+        ))
+
+    def apply_sales(self, sales):
+        """
+        Suma a los totales de cada remisión las ventas insertadas en bloque (un UPDATE por remisión).
+        """
+        deltas = {}
+        for sale in sales:
+            values = sale.tracked_values()
+            subtotal, tax, count = deltas.get(values['remission_id'], (0, 0, 0))
+            deltas[values['remission_id']] = (subtotal + values['subtotal'], tax + values['tax'], count + 1)
+
+        for remission_id, (subtotal, tax, count) in deltas.items():
+            self.apply_sales_delta(remission_id, subtotal, tax, count)
+
+    def apply_credits(self, credits):
+        """
+        Suma al total de créditos de cada remisión los créditos insertados en bloque.
+        """
+        deltas = {}
+        for credit in credits:
+            values = credit.tracked_values()
+            deltas[values['remission_id']] = deltas.get(values['remission_id'], 0) + values['amount']
+
+        for remission_id, amount in deltas.items():
+            self.apply_credits_delta(remission_id, amount)
+
+    def _computed_totals(self):
+        """
+        Subconsultas que recalculan los totales directamente desde ventas y créditos.
+        """
+        sales = Sale.objects.filter(remission=OuterRef('pk')).order_by().values('remission')
+        credits = CreditAssignment.objects.filter(remission=OuterRef('pk')).order_by().values('remission')
+        zero = Value(Decimal('0.00'), output_field=models.DecimalField(max_digits=14, decimal_places=2))
+
+        # Se redondea a centavos porque SQLite suma los decimales como números de punto flotante.
+        return {
+            'sales_subtotal': Round(Coalesce(Subquery(sales.annotate(value=Sum('subtotal')).values('value')), zero), 2),
+            'sales_tax': Round(Coalesce(Subquery(sales.annotate(value=Sum('tax')).values('value')), zero), 2),
+            'sales_count': Coalesce(Subquery(sales.annotate(value=Count('id')).values('value')), Value(0)),
+            'credits_total': Round(Coalesce(Subquery(credits.annotate(value=Sum('amount')).values('value')), zero), 2)
+        }
+
+    def out_of_sync(self):
+        """
+        Remisiones cuyos totales acumulados no coinciden con sus ventas y créditos.
+        """
+        computed = {f'computed_{name}': expression for name, expression in self._computed_totals().items()}
+        return self.annotate(**computed).exclude(
+            **{name: F(f'computed_{name}') for name in Remission.TOTAL_FIELDS}
+        )
+
+    def rebuild_totals(self):
+        """
+        Recalcula los totales acumulados en una sola sentencia UPDATE. Las remisiones
+        recalculadas vuelven a aparecer en el feed de cambios.
+        """
+        invalidate_all_summaries()
+        return self.update(updated_at=timezone.now(), **self._computed_totals())
+
+    def close_targets(self, ids=None, order=None, customer=None, created_before=None):
+        """
+        Remisiones que abarca un cierre masivo: las de la lista de ids o, sin ids, todas las
+        abiertas; en ambos casos acotadas por orden, cliente y fecha de creación.
+        """
+        remissions = self.all()
+        if ids is None:
+            remissions = remissions.filter(status='open')
+        if order is not None:
+            remissions = remissions.filter(order_id=order)
+        if customer is not None:
+            remissions = remissions.filter(order__customer_id=customer)
+        if created_before is not None:
+            remissions = remissions.filter(created_at__lt=created_before)
+        return remissions
+
+    def archivable(self, older_than):
+        """
+        Remisiones cerradas que pueden moverse al archivo: creadas antes de older_than y sin
+        ventas ni créditos desde entonces.
+        """
+        return self.filter(status='closed', created_at__lt=older_than).exclude(
+            Exists(Sale.objects.filter(remission=OuterRef('pk'), created_at__gte=older_than))
+        ).exclude(
+            Exists(CreditAssignment.objects.filter(remission=OuterRef('pk'), created_at__gte=older_than))
+        )
+
+    def close_many(self, ids=None, batch_size=500):
+        """
+        Cierra en bloque las remisiones indicadas (o todas las del queryset).
+
+        Las filas se bloquean por lotes en orden de id (para que cierres concurrentes no
+        se crucen), se validan con las mismas reglas que Remission.close() sobre los totales
+        acumulados y se cierran con un UPDATE por lote.
+
+        Retorna un reporte por id con el estado 'closed', 'already_closed', 'invalid' o 'not_found'.
+        """
+        fields = ('pk', 'status') + Remission.TOTAL_FIELDS
+        results = {}
+
+        with transaction.atomic():
+            if ids is None:
+                ids = list(self.order_by('pk').values_list('pk', flat=True))
+            ids = sorted(set(ids))
+
+            for start in range(0, len(ids), batch_size):
+                chunk = ids[start:start + batch_size]
+                rows = self.select_for_update().filter(pk__in=chunk).order_by('pk').values_list(*fields)
+
+                to_close = []
+                for pk, status, subtotal, tax, count, credits in rows:
+                    if status == 'closed':
+                        results[pk] = {'id': pk, 'status': 'already_closed'}
+                        continue
+                    try:
+                        Remission.validate_close(count, subtotal + tax, credits)
+                    except ValidationError as e:
+                        results[pk] = {'id': pk, 'status': 'invalid', 'error': e.messages[0]}
+                        continue
+                    to_close.append(pk)
+
+                Remission.objects.filter(pk__in=to_close).update(status='closed', updated_at=timezone.now())
+                invalidate_summaries(to_close)
+                for pk in to_close:
+                    results[pk] = {'id': pk, 'status': 'closed'}
+
+                for pk in chunk:
+                    results.setdefault(pk, {'id': pk, 'status': 'not_found'})
+
+        return [results[pk] for pk in ids]
+
 
 class Remission(models.Model):
     """
     Modelo que gestiona las remisiones de una orden.
     Maneja los estados 'open' y 'closed' y aplica las reglas de validación de cierre.
+
+    Los totales de ventas y créditos se mantienen acumulados en la propia fila
+    (ver business/signals.py), por lo que el cierre y el resumen no necesitan
+    volver a agregar las ventas.
     """
     STATUS_CHOICES = [
         ('open', 'Open'),
         ('closed', 'Closed'),
     ]
     
-    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='remissions')
+    # El índice remission_order_status_idx cubre las búsquedas por orden.
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='remissions', db_index=False)
     folio = models.CharField(max_length=50, unique=True)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='open')
-    created_at = models.DateTimeField(auto_now_add=True)
-    
-    def close(self):
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+    change_seq = models.BigIntegerField(null=True, editable=False)
+
+    sales_subtotal = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'), editable=False)
+    sales_tax = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'), editable=False)
+    sales_count = models.PositiveIntegerField(default=0, editable=False)
+    credits_total = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'), editable=False)
+
+    TOTAL_FIELDS = ('sales_subtotal', 'sales_tax', 'sales_count', 'credits_total')
+
+    objects = RemissionQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status'], name='remission_status_idx'),
+            # Sin los totales: se reescribirían en el índice con cada venta o crédito.
+            models.Index(fields=['order', 'status', 'created_at'], name='remission_order_status_idx'),
+            models.Index(fields=['change_seq'], name='remission_change_idx'),
+        ]
+
+    @property
+    def total_sales(self):
+        return self.sales_subtotal + self.sales_tax
+
+    @property
+    def balance(self):
+        return self.total_sales - self.credits_total
+
+    def save(self, **kwargs):
         """
-        Ejecuta el cierre de la remisión de forma atómica.
-        
-        Reglas de validación:
+        Al actualizar una remisión existente no se escriben los totales acumulados ni
+        change_seq, para no pisar con valores en memoria los incrementos hechos por otras
+        transacciones.
+        """
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in (*self.TOTAL_FIELDS, 'change_seq')
+            ]
+        super().save(**kwargs)
+
+    @staticmethod
+    def validate_close(sales_count, total_sales, total_credits):
+        """
+        Reglas de validación del cierre:
         1. Requiere al menos una venta asociada.
         2. El total de créditos no debe exceder el total de ventas.
         """
-        with transaction.atomic():
-            sales_data = self.sales.aggregate(
-                total_subtotal = Sum('subtotal'),
-                total_tax = Sum('tax')
+        if sales_count == 0:
+            raise ValidationError("No es posible cerrar una remisión si no tiene al menos 1 venta")
+
+        if total_credits > total_sales:
+            raise ValidationError(
+                f"No es posible cerrar la remisión debido a que la suma de créditos ({total_credits}) "
+                f"excede del total vendido ({total_sales})"
             )
-        
-            total_sales = (sales_data['total_subtotal'] or 0) + (sales_data['total_tax'] or 0)
-            total_credits = self.credits.aggregate(total=Sum('amount'))['total'] or 0
-            sales_count = self.sales.count()
-            
-            if sales_count == 0:
-                raise ValidationError("No es posible cerrar una remisión si no tiene al menos 1 venta")
-            
-            if total_credits > total_sales:
-                raise ValidationError(
-                    f"No es posible cerrar la remisión debido a que la suma de créditos ({total_credits}) "
-                    f"excede del total vendido ({total_sales})"
-                )
-                
+
+    def close(self):
+        """
+        Ejecuta el cierre de la remisión de forma atómica.
+
+        Bloquea la fila de la remisión y valida contra los totales acumulados,
+        por lo que el cierre es una lectura de una sola fila.
+        """
+        with transaction.atomic():
+            locked = Remission.objects.select_for_update().get(pk=self.pk)
+            for field in self.TOTAL_FIELDS:
+                setattr(self, field, getattr(locked, field))
+
+            self.validate_close(self.sales_count, self.total_sales, self.credits_total)
+
             self.status = 'closed'
-            self.save()
+            self.save(update_fields=['status', 'updated_at'])
+            invalidate_summaries([self.pk])
+
+    def summary(self):
+        """
+        Resumen de la remisión a partir de los totales acumulados. Los importes en cero se
+        regresan como el entero 0, igual que cuando el resumen agregaba ventas y créditos.
+        """
+        total_sales = self.total_sales or 0
+        total_credits = self.credits_total or 0
+        return {
+            'total_sales': total_sales,
+            'total_credits': total_credits,
+            'balance': total_sales - total_credits,
+            'sales_count': self.sales_count
+        }
     
+class SaleQuerySet(models.QuerySet):
+    def bulk_create_tracked(self, sales, batch_size=None):
+        """
+        Inserta ventas con bulk_create y, en la misma transacción, actualiza los totales
+        de sus remisiones y el acumulado diario (bulk_create no dispara señales).
+        """
+        with transaction.atomic():
+            created = self.bulk_create(sales, batch_size=batch_size)
+            for sale in created:
+                sale._tracked = sale.tracked_values()
+            Remission.objects.apply_sales(created)
+            DailySalesRollup.objects.apply_sales(created)
+        return created
+
+
 class Sale(models.Model):
     """
     Registra las ventas individuales asociadas a una remisión.
     Asegura que los montos de subtotal e impuestos no sean negativos.
-    El total se calcula como la suma de subtotal e impuestos para mantener la consistencia de los datos.
+    El total (subtotal más impuestos) es una columna generada que calcula y guarda la base de
+    datos, así que siempre es consistente y se puede filtrar, ordenar e indexar.
     """
-    remission = models.ForeignKey(Remission, on_delete=models.CASCADE, related_name='sales')
+    # El índice compuesto (remission, created_at) cubre las búsquedas por remisión.
+    remission = models.ForeignKey(Remission, on_delete=models.CASCADE, related_name='sales', db_index=False)
     subtotal = models.DecimalField(
         max_digits=12,
         decimal_places=2,
@@ -76,19 +402,557 @@ class Sale(models.Model):
         decimal_places=2,
         validators=[MinValueValidator(Decimal('0.00'))]              
     )
-    created_at = models.DateTimeField(auto_now_add=True)
-    
-    @property
-    def total(self):
-        return self.subtotal + self.tax
+    # Se usa default en lugar de auto_now_add para que bulk_create conserve fechas históricas.
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+    change_seq = models.BigIntegerField(null=True, editable=False)
+    # Se redondea a centavos porque SQLite suma los decimales como números de punto flotante;
+    # así los filtros por monto comparan contra el mismo valor que muestra la API.
+    total = models.GeneratedField(
+        expression=Round(F('subtotal') + F('tax'), 2),
+        output_field=models.DecimalField(max_digits=13, decimal_places=2),
+        db_persist=True
+    )
+
+    objects = SaleQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['remission', 'created_at'], name='sale_remission_created_idx'),
+            models.Index(fields=['created_at'], name='sale_created_idx'),
+            models.Index(fields=['total'], name='sale_total_idx'),
+            models.Index(fields=['change_seq'], name='sale_change_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._tracked = instance.tracked_values()
+        return instance
+
+    def tracked_values(self):
+        """
+        Valores ya persistidos que alimentan los totales de la remisión y el acumulado diario.
+        """
+        created_at = self.__dict__.get('created_at')
+        return {
+            'remission_id': self.__dict__.get('remission_id'),
+            'date': sale_date(created_at) if created_at else None,
+            'subtotal': self._meta.get_field('subtotal').to_python(self.__dict__.get('subtotal')),
+            'tax': self._meta.get_field('tax').to_python(self.__dict__.get('tax'))
+        }
+
+    def save(self, **kwargs):
+        updating = not self._state.adding
+        # El post_save que actualiza los totales corre dentro de la misma transacción.
+        with transaction.atomic():
+            super().save(**kwargs)
+        if updating:
+            # El INSERT regresa el total calculado, el UPDATE no: se vuelve a leer al usarlo.
+            self.__dict__.pop('total', None)
     
+class CreditAssignmentQuerySet(models.QuerySet):
+    def bulk_create_tracked(self, credits, batch_size=None):
+        """
+        Inserta créditos con bulk_create y actualiza en la misma transacción el total
+        de créditos de sus remisiones.
+        """
+        with transaction.atomic():
+            created = self.bulk_create(credits, batch_size=batch_size)
+            for credit in created:
+                credit._tracked = credit.tracked_values()
+            Remission.objects.apply_credits(created)
+        return created
+
+
 class CreditAssignment(models.Model):
-    remission = models.ForeignKey(Remission,on_delete=models.CASCADE, related_name='credits')
+    # El índice compuesto (remission, created_at) cubre las búsquedas por remisión.
+    remission = models.ForeignKey(Remission, on_delete=models.CASCADE, related_name='credits', db_index=False)
     amount = models.DecimalField(
         max_digits=12,
         decimal_places=2,
         validators=[MinValueValidator(Decimal('0.01'))]
     )
     reason = models.CharField(max_length=255)
-    created_at = models.DateTimeField(auto_now_add=True)
-    
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+    change_seq = models.BigIntegerField(null=True, editable=False)
+
+    objects = CreditAssignmentQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['remission', 'created_at'], name='credit_remission_created_idx'),
+            models.Index(fields=['change_seq'], name='credit_change_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._tracked = instance.tracked_values()
+        return instance
+
+    def tracked_values(self):
+        """
+        Valores ya persistidos que alimentan los totales de la remisión.
+        """
+        return {
+            'remission_id': self.__dict__.get('remission_id'),
+            'amount': self._meta.get_field('amount').to_python(self.__dict__.get('amount'))
+        }
+
+    def save(self, **kwargs):
+        # El post_save que actualiza los totales corre dentro de la misma transacción.
+        with transaction.atomic():
+            super().save(**kwargs)
+
+
+def sale_date(value):
+    """
+    Fecha de una venta en la zona horaria del proyecto, la misma que usa TruncDate en el reporte.
+    """
+    return timezone.localdate(value, timezone.get_default_timezone())
+
+
+def day_range(date_from, date_to):
+    """
+    Rango semiabierto [inicio de date_from, inicio del día siguiente a date_to) en la zona
+    horaria del proyecto. Filtrar created_at con este rango permite usar sus índices,
+    a diferencia de created_at__date, que aplica una conversión sobre la columna.
+    """
+    tz = timezone.get_default_timezone()
+    start = timezone.make_aware(datetime.combine(date_from, time.min), tz)
+    end = timezone.make_aware(datetime.combine(date_to + timedelta(days=1), time.min), tz)
+    return start, end
+
+
+class DailySalesRollupQuerySet(models.QuerySet):
+    def apply_sales(self, sales):
+        """
+        Suma al acumulado de cada día las ventas insertadas en bloque (un UPDATE por día).
+        """
+        deltas = {}
+        for sale in sales:
+            values = sale.tracked_values()
+            subtotal, tax, count = deltas.get(values['date'], (0, 0, 0))
+            deltas[values['date']] = (subtotal + values['subtotal'], tax + values['tax'], count + 1)
+
+        for date, (subtotal, tax, count) in deltas.items():
+            self.apply_delta(date, subtotal, tax, count)
+
+    def apply_delta(self, date, subtotal, tax, count):
+        """
+        Suma (o resta) los importes de una venta al acumulado de su día, creando la fila si no existe.
+        """
+        changes = {
+            'subtotal': F('subtotal') + subtotal,
+            'tax': F('tax') + tax,
+            'sales_count': F('sales_count') + count
+        }
+        if self.filter(date=date).update(**changes):
+            return
+        try:
+            with transaction.atomic():
+                self.create(date=date, subtotal=subtotal, tax=tax, sales_count=count)
+        except IntegrityError:
+            # Otra transacción creó la fila del día entre el UPDATE y el INSERT.
+            self.filter(date=date).update(**changes)
+
+    def rebuild(self, date_from=None, date_to=None):
+        """
+        Reconstruye el acumulado diario desde las ventas (activas y archivadas), opcionalmente
+        sólo en un rango de fechas.
+        """
+        rollups = self.all()
+        if date_from:
+            rollups = rollups.filter(date__gte=date_from)
+        if date_to:
+            rollups = rollups.filter(date__lte=date_to)
+
+        # Las ventas archivadas siguen contando en el reporte.
+        days = {}
+        for model in (Sale, ArchivedSale):
+            sales = model.objects.all()
+            if date_from:
+                sales = sales.filter(created_at__gte=day_range(date_from, date_from)[0])
+            if date_to:
+                sales = sales.filter(created_at__lt=day_range(date_to, date_to)[1])
+            for day in (
+                sales.annotate(date=TruncDate('created_at'))
+                .values('date')
+                .annotate(day_subtotal=Sum('subtotal'), day_tax=Sum('tax'), day_count=Count('id'))
+                .order_by()
+            ):
+                subtotal, tax, count = days.get(day['date'], (0, 0, 0))
+                days[day['date']] = (
+                    subtotal + day['day_subtotal'], tax + day['day_tax'], count + day['day_count']
+                )
+
+        with transaction.atomic():
+            rollups.delete()
+            created = self.bulk_create(
+                DailySalesRollup(date=date, subtotal=subtotal, tax=tax, sales_count=count)
+                for date, (subtotal, tax, count) in sorted(days.items())
+            )
+        return len(created)
+
+    def report(self, date_from, date_to):
+        """
+        Reporte de ventas por día entre dos fechas (inclusive).
+        """
+        return list(self.iter_report(date_from, date_to))
+
+    def iter_report(self, date_from, date_to, chunk_size=2000):
+        """
+        Genera las filas del reporte diario sin materializarlas.
+
+        Los días anteriores a hoy se leen del acumulado; el día en curso se agrega
+        en vivo desde las ventas para reflejar también las escrituras que no pasan por señales.
+        """
+        days, today = self._report_querysets(date_from, date_to)
+        for date, subtotal, tax, sales_count in days.iterator(chunk_size=chunk_size):
+            yield {'date': date, 'total_sales': subtotal + tax, 'total_tax': tax, 'sales_count': sales_count}
+        if today is not None:
+            yield from today
+
+    async def areport(self, date_from, date_to):
+        """
+        Versión asíncrona de report() para las vistas servidas con ASGI.
+        """
+        days, today = self._report_querysets(date_from, date_to)
+        rows = [
+            {'date': date, 'total_sales': subtotal + tax, 'total_tax': tax, 'sales_count': sales_count}
+            async for date, subtotal, tax, sales_count in days
+        ]
+        if today is not None:
+            rows += [row async for row in today]
+        return rows
+
+    def _report_querysets(self, date_from, date_to):
+        """
+        Consultas del reporte: días cerrados desde el acumulado y, si el rango lo incluye,
+        el día en curso agregado desde las ventas (None si no aplica).
+        """
+        today = sale_date(timezone.now())
+
+        # Los totales se suman en Python sobre los Decimal ya leídos para no arrastrar
+        # el redondeo de punto flotante que SQLite aplicaría a subtotal + tax.
+        days = (
+            self.filter(date__range=[date_from, min(date_to, today - timedelta(days=1))], sales_count__gt=0)
+            .order_by('date')
+            .values_list('date', 'subtotal', 'tax', 'sales_count')
+        )
+        if not date_from <= today <= date_to:
+            return days, None
+
+        start, end = day_range(today, today)
+        return days, (
+            Sale.objects.using(self.db).filter(created_at__gte=start, created_at__lt=end)
+            .annotate(date=TruncDate('created_at'))
+            .values('date')
+            .annotate(
+                total_sales=Sum('total'),
+                total_tax=Sum('tax'),
+                sales_count=Count('id')
+            )
+            .order_by('date')
+        )
+
+
+class DailySalesRollup(models.Model):
+    """
+    Acumulado diario de ventas que respalda el reporte de ventas por día.
+    Se mantiene de forma incremental al registrar ventas (ver business/signals.py).
+    """
+    date = models.DateField(unique=True)
+    subtotal = models.DecimalField(max_digits=16, decimal_places=2, default=Decimal('0.00'))
+    tax = models.DecimalField(max_digits=16, decimal_places=2, default=Decimal('0.00'))
+    sales_count = models.PositiveIntegerField(default=0)
+
+    objects = DailySalesRollupQuerySet.as_manager()
+
+
+class ArchivedRemissionQuerySet(models.QuerySet):
+    def archive(self, ids):
+        """
+        Mueve al archivo las remisiones cerradas indicadas junto con sus ventas y créditos,
+        en una sola transacción y conservando sus ids. Retorna cuántas remisiones se movieron.
+
+        Las filas se copian con INSERT ... SELECT y se borran sin pasar por los modelos, así
+        que no se disparan las señales: los totales de la remisión viajan con ella y el
+        acumulado diario no cambia, porque el reporte sigue contando las ventas archivadas.
+        Tampoco se registran borrados en el feed de cambios: los registros siguen existiendo.
+        """
+        ops = connection.ops
+
+        def table(model):
+            return ops.quote_name(model._meta.db_table)
+
+        def columns(model):
+            # Las columnas generadas (como el total de la venta) las calcula la base de datos.
+            return ', '.join(
+                ops.quote_name(field.column) for field in model._meta.concrete_fields if not field.generated
+            )
+
+        with transaction.atomic():
+            # Se vuelve a revisar el estado dentro de la transacción de escritura.
+            ids = list(
+                Remission.objects.select_for_update()
+                .filter(pk__in=ids, status='closed')
+                .values_list('pk', flat=True)
+            )
+            if not ids:
+                return 0
+
+            placeholders = ', '.join(['%s'] * len(ids))
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'INSERT INTO {table(ArchivedRemission)} ({columns(ArchivedRemission)}) '
+                    f'SELECT r.id, r.order_id, o.customer_id, r.folio, r.status, r.created_at, %s, '
+                    f'r.sales_subtotal, r.sales_tax, r.sales_count, r.credits_total '
+                    f'FROM {table(Remission)} r INNER JOIN {table(Order)} o ON o.id = r.order_id '
+                    f'WHERE r.id IN ({placeholders})',
+                    [timezone.now(), *ids]
+                )
+                for source, target in ((Sale, ArchivedSale), (CreditAssignment, ArchivedCreditAssignment)):
+                    cursor.execute(
+                        f'INSERT INTO {table(target)} ({columns(target)}) '
+                        f'SELECT {columns(target)} FROM {table(source)} WHERE remission_id IN ({placeholders})',
+                        ids
+                    )
+
+            for model in (CreditAssignment, Sale):
+                model.objects.filter(remission_id__in=ids)._raw_delete(connection.alias)
+            Remission.objects.filter(pk__in=ids)._raw_delete(connection.alias)
+        return len(ids)
+
+
+class ArchivedRemission(models.Model):
+    """
+    Remisión cerrada movida al archivo (ver el comando archive_remissions), con sus totales
+    acumulados. Conserva el id original y el cliente de la orden, para que la cartera por
+    cliente la sume sin unir con las órdenes.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='archived_remissions')
+    customer = models.ForeignKey(
+        Customer, on_delete=models.CASCADE, related_name='archived_remissions', db_index=False
+    )
+    folio = models.CharField(max_length=50, unique=True)
+    status = models.CharField(max_length=10, choices=Remission.STATUS_CHOICES)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    sales_subtotal = models.DecimalField(max_digits=14, decimal_places=2)
+    sales_tax = models.DecimalField(max_digits=14, decimal_places=2)
+    sales_count = models.PositiveIntegerField()
+    credits_total = models.DecimalField(max_digits=14, decimal_places=2)
+
+    objects = ArchivedRemissionQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Incluye los totales para que la cartera por cliente se calcule sólo con índices.
+            models.Index(
+                fields=['customer', 'created_at', 'sales_subtotal', 'sales_tax', 'credits_total'],
+                name='archived_customer_totals_idx'
+            ),
+        ]
+
+    # Mismos totales y resumen que una remisión activa.
+    total_sales = Remission.total_sales
+    balance = Remission.balance
+    summary = Remission.summary
+
+
+class ArchivedSale(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    # El índice compuesto (remission, created_at) cubre las búsquedas por remisión.
+    remission = models.ForeignKey(ArchivedRemission, on_delete=models.CASCADE, related_name='sales', db_index=False)
+    subtotal = models.DecimalField(max_digits=12, decimal_places=2)
+    tax = models.DecimalField(max_digits=12, decimal_places=2)
+    created_at = models.DateTimeField()
+    total = models.GeneratedField(
+        expression=Round(F('subtotal') + F('tax'), 2),
+        output_field=models.DecimalField(max_digits=13, decimal_places=2),
+        db_persist=True
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['remission', 'created_at'], name='archived_sale_remission_idx'),
+            models.Index(fields=['created_at'], name='archived_sale_created_idx'),
+        ]
+
+
+class ArchivedCreditAssignment(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    # El índice compuesto (remission, created_at) cubre las búsquedas por remisión.
+    remission = models.ForeignKey(
+        ArchivedRemission, on_delete=models.CASCADE, related_name='credits', db_index=False
+    )
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    reason = models.CharField(max_length=255)
+    created_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['remission', 'created_at'], name='archived_credit_remission_idx'),
+        ]
+
+
+class JobQuerySet(models.QuerySet):
+    """
+    Cola de trabajos en segundo plano guardada en la base de datos (ver business/jobs.py).
+    """
+    def submit(self, kind, params=None, max_attempts=None):
+        """
+        Encola un trabajo; lo ejecuta el primer worker (run_jobs) con un lugar disponible.
+        """
+        return self.create(
+            kind=kind,
+            params=params or {},
+            max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS
+        )
+
+    def claim(self, worker, max_running=None):
+        """
+        Toma el siguiente trabajo pendiente para el worker, o None si no hay trabajos listos
+        o ya se alcanzó el máximo de trabajos en ejecución (JOB_MAX_RUNNING).
+
+        La lectura y el UPDATE ocurren en una transacción de escritura (BEGIN IMMEDIATE en
+        SQLite), así que dos workers no pueden tomar el mismo trabajo ni rebasar el máximo.
+        """
+        max_running = max_running or settings.JOB_MAX_RUNNING
+        now = timezone.now()
+        ready = self.filter(status=Job.QUEUED, run_after__lte=now)
+        # Sin trabajos listos no se abre la transacción de escritura.
+        if not ready.exists():
+            return None
+
+        with transaction.atomic():
+            if self.filter(status=Job.RUNNING).count() >= max_running:
+                return None
+            pk = ready.order_by('run_after', 'pk').values_list('pk', flat=True).first()
+            if pk is None:
+                return None
+            self.filter(pk=pk).update(
+                status=Job.RUNNING,
+                worker=worker,
+                attempts=F('attempts') + 1,
+                started_at=now,
+                heartbeat_at=now
+            )
+        return self.get(pk=pk)
+
+    def requeue_stale(self, now=None):
+        """
+        Regresa a la cola los trabajos cuyo worker dejó de reportarse (por ejemplo, si el
+        proceso terminó a la mitad). Cuentan como un intento fallido.
+        """
+        now = now or timezone.now()
+        stale = self.filter(status=Job.RUNNING, heartbeat_at__lt=now - timedelta(seconds=settings.JOB_STALE_AFTER))
+        stale.filter(attempts__gte=F('max_attempts')).update(
+            status=Job.FAILED, error='El worker dejó de responder', finished_at=now
+        )
+        return stale.update(status=Job.QUEUED, worker='', run_after=now)
+
+    def save_progress(self, jobs):
+        """
+        Guarda el avance de los trabajos en ejecución y renueva su heartbeat (lo llama el worker).
+        """
+        now = timezone.now()
+        for job in jobs:
+            self.filter(pk=job.pk, status=Job.RUNNING).update(
+                progress=job.progress, progress_total=job.progress_total, heartbeat_at=now
+            )
+
+
+class Job(models.Model):
+    """
+    Trabajo en segundo plano: una operación pesada (cierre masivo, reconstrucción del
+    acumulado, reportes y exportaciones) que se ejecuta fuera de la petición.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=50)
+    params = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    progress = models.PositiveIntegerField(default=0)
+    progress_total = models.PositiveIntegerField(null=True, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=1)
+    worker = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+    run_after = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    objects = JobQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='job_status_run_after_idx'),
+        ]
+
+    def set_progress(self, progress, total=None):
+        """
+        Registra el avance del trabajo (y su total, si se conoce). El worker lo guarda desde su
+        propia conexión: la del trabajo puede tener una lectura abierta (como en las
+        exportaciones) y SQLite no permite convertirla en escritura mientras otro escribe.
+        """
+        self.progress = progress
+        if total is not None:
+            self.progress_total = total
+
+
+class ImportCheckpoint(models.Model):
+    """
+    Avance del comando import por archivo. Se guarda en la misma transacción que cada lote,
+    así que tras una falla la importación continúa justo después del último lote confirmado.
+    """
+    source = models.CharField(max_length=500, unique=True)
+    offset = models.BigIntegerField(default=0)
+    line = models.PositiveBigIntegerField(default=0)
+    rows = models.PositiveBigIntegerField(default=0)
+    # Id de remisión más alto al empezar el archivo: las de id mayor las creó la importación.
+    last_remission_id = models.PositiveBigIntegerField(default=0)
+    started_at = models.DateTimeField(default=timezone.now, editable=False)
+    updated_at = models.DateTimeField(default=timezone.now)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+
+class Tombstone(models.Model):
+    """
+    Registro de un borrado para el feed de cambios (ver business/changes.py): el recurso
+    ('orders', 'remissions', 'sales' o 'credits'), el id borrado y cuándo se borró.
+    """
+    resource = models.CharField(max_length=20)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+    change_seq = models.BigIntegerField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['resource', 'change_seq'], name='tombstone_change_idx'),
+        ]
+
+
+class ChangeSequence(models.Model):
+    """
+    Contador del feed de cambios: una sola fila que los triggers incrementan con cada fila
+    escrita de órdenes, remisiones, ventas, créditos y tombstones (ver business/changes.py).
+    """
+    value = models.BigIntegerField(default=0)
@@ -0,0 +1,87 @@
+"""
+Búsqueda de clientes (nombre o correo), órdenes y remisiones (folio).
+
+El índice es la tabla virtual FTS5 business_search con tokenizador trigram, creada por la
+migración 0011_search. Sus triggers la actualizan en cada escritura (incluidas las de seed y
+del archivo de remisiones), así que no hay que sincronizarla desde el código. Cada fila
+guarda un título (nombre o folio) y un detalle (correo), y su rowid es id * 4 + tipo.
+
+Con el tokenizador trigram cada término de al menos tres caracteres se busca como subcadena
+usando el índice, lo que cubre prefijos y folios parciales. Los términos más cortos sólo
+filtran las filas ya encontradas.
+"""
+from django.db import connections
+
+SEARCH_TABLE = 'business_search'
+
+# Tipo expuesto en la API -> valores de rowid % 4 en el índice (3 = remisión archivada).
+KINDS = {'customer': (0,), 'order': (1,), 'remission': (2, 3)}
+KIND_NAMES = {0: 'customer', 1: 'order', 2: 'remission', 3: 'remission'}
+
+# Longitud mínima de un término para usar el índice (un trigrama).
+MIN_TERM_LENGTH = 3
+
+# Coincidencias que se ordenan por relevancia. Una búsqueda muy poco selectiva (por ejemplo,
+# "REM", presente en todos los folios de remisión) sólo ordena las primeras, así que su
+# costo no crece con el tamaño de las tablas.
+MAX_CANDIDATES = 2000
+
+# Peso de cada columna en bm25: un término en el nombre o folio pesa más que en el correo.
+TITLE_WEIGHT = 10.0
+DETAIL_WEIGHT = 1.0
+
+
+def split_terms(query):
+    """
+    Separa la búsqueda en términos que usan el índice y términos cortos que sólo filtran.
+    """
+    terms = query.split()
+    return (
+        [term for term in terms if len(term) >= MIN_TERM_LENGTH],
+        [term for term in terms if len(term) < MIN_TERM_LENGTH]
+    )
+
+
+def like_pattern(value, prefix_only=False):
+    escaped = value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'{escaped}%' if prefix_only else f'%{escaped}%'
+
+
+def search(query, kinds=None, limit=20, using='default'):
+    """
+    Busca en el índice y regresa hasta limit resultados como dicts con type, id, title y
+    detail. Primero van los títulos que empiezan con la búsqueda; después, por relevancia
+    (bm25). Requiere al menos un término de MIN_TERM_LENGTH caracteres.
+    """
+    indexed, short = split_terms(query)
+    # Cada término va entre comillas para que FTS5 no interprete operadores ni comodines.
+    conditions = [f'{SEARCH_TABLE} MATCH %s']
+    params = [' '.join('"{}"'.format(term.replace('"', '""')) for term in indexed)]
+    if kinds:
+        values = [value for kind in kinds for value in KINDS[kind]]
+        conditions.append(f"rowid %% 4 IN ({', '.join(['%s'] * len(values))})")
+        params += values
+    for term in short:
+        conditions.append("(title LIKE %s ESCAPE '\\' OR detail LIKE %s ESCAPE '\\')")
+        params += [like_pattern(term)] * 2
+
+    prefix = ' '.join(query.split())
+    select = f'SELECT rowid, title, detail FROM {SEARCH_TABLE} WHERE {" AND ".join(conditions)}'
+    with connections[using].cursor() as cursor:
+        # Sin ORDER BY, FTS5 recorre las coincidencias en orden de rowid y se detiene en el LIMIT.
+        cursor.execute(f'{select} LIMIT %s', [*params, MAX_CANDIDATES + 1])
+        rows = cursor.fetchall()
+        if len(rows) > MAX_CANDIDATES:
+            # Demasiadas coincidencias para ordenarlas: sólo se adelantan los prefijos.
+            rows = sorted(rows, key=lambda row: not row[1].lower().startswith(prefix.lower()))[:limit]
+        else:
+            cursor.execute(
+                f"{select} ORDER BY title LIKE %s ESCAPE '\\' DESC, bm25({SEARCH_TABLE}, %s, %s), rowid LIMIT %s",
+                [*params, like_pattern(prefix, prefix_only=True), TITLE_WEIGHT, DETAIL_WEIGHT, limit]
+            )
+            rows = cursor.fetchall()
+
+    return [
+        {'type': KIND_NAMES[rowid % 4], 'id': rowid // 4, 'title': title, 'detail': detail}
+        for rowid, title, detail in rows
+    ]
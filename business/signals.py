@@ -0,0 +1,102 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from business.cache import invalidate_summaries
+from business.changes import RESOURCES
+from business.models import Remission, Sale, CreditAssignment, DailySalesRollup, Tombstone
+
+
+def apply_sale(values, sign):
+    """
+    Suma (sign=1) o descuenta (sign=-1) una venta de los totales de su remisión y de su día.
+    """
+    subtotal, tax = sign * values['subtotal'], sign * values['tax']
+    Remission.objects.apply_sales_delta(values['remission_id'], subtotal, tax, sign)
+    DailySalesRollup.objects.apply_delta(values['date'], subtotal, tax, sign)
+
+
+@receiver(post_save, sender=Sale)
+def track_sale_saved(sender, instance, created, raw=False, **kwargs):
+    """
+    Mantiene los totales de la remisión y el acumulado diario al crear o modificar una venta.
+    Si la venta cambió de remisión o de fecha, se descuenta de la anterior y se suma a la nueva.
+    """
+    if raw:
+        return
+
+    previous = getattr(instance, '_tracked', None)
+    current = instance.tracked_values()
+
+    if previous and previous['remission_id'] is not None:
+        subtotal = current['subtotal'] - previous['subtotal']
+        tax = current['tax'] - previous['tax']
+
+        if previous['remission_id'] == current['remission_id']:
+            Remission.objects.apply_sales_delta(current['remission_id'], subtotal, tax, 0)
+        else:
+            Remission.objects.apply_sales_delta(previous['remission_id'], -previous['subtotal'], -previous['tax'], -1)
+            Remission.objects.apply_sales_delta(current['remission_id'], current['subtotal'], current['tax'], 1)
+
+        if previous['date'] == current['date']:
+            DailySalesRollup.objects.apply_delta(current['date'], subtotal, tax, 0)
+        else:
+            DailySalesRollup.objects.apply_delta(previous['date'], -previous['subtotal'], -previous['tax'], -1)
+            DailySalesRollup.objects.apply_delta(current['date'], current['subtotal'], current['tax'], 1)
+    else:
+        apply_sale(current, 1)
+
+    instance._tracked = current
+
+
+@receiver(post_delete, sender=Sale)
+def track_sale_deleted(sender, instance, **kwargs):
+    apply_sale(getattr(instance, '_tracked', None) or instance.tracked_values(), -1)
+
+
+@receiver(post_save, sender=CreditAssignment)
+def track_credit_saved(sender, instance, created, raw=False, **kwargs):
+    """
+    Mantiene el total de créditos de la remisión al crear o modificar un crédito.
+    """
+    if raw:
+        return
+
+    previous = getattr(instance, '_tracked', None)
+    current = instance.tracked_values()
+
+    if previous and previous['remission_id'] is not None:
+        if previous['remission_id'] == current['remission_id']:
+            Remission.objects.apply_credits_delta(
+                current['remission_id'], current['amount'] - previous['amount']
+            )
+            instance._tracked = current
+            return
+
+        Remission.objects.apply_credits_delta(previous['remission_id'], -previous['amount'])
+
+    Remission.objects.apply_credits_delta(current['remission_id'], current['amount'])
+    instance._tracked = current
+
+
+@receiver(post_delete, sender=CreditAssignment)
+def track_credit_deleted(sender, instance, **kwargs):
+    previous = getattr(instance, '_tracked', None) or instance.tracked_values()
+    Remission.objects.apply_credits_delta(previous['remission_id'], -previous['amount'])
+
+
+@receiver(post_delete, sender=Remission)
+def track_remission_deleted(sender, instance, **kwargs):
+    invalidate_summaries([instance.pk])
+
+
+def track_deleted(sender, instance, **kwargs):
+    """
+    Deja un Tombstone por cada orden, remisión, venta o crédito borrado (también en los
+    borrados en cascada), para que el feed de cambios entregue el borrado.
+    """
+    Tombstone.objects.using(instance._state.db).create(resource=RESOURCES[sender], object_id=instance.pk)
+
+
+# Se conecta sólo a estos modelos: un receptor sin sender impediría los borrados rápidos
+# (sin cargar filas) de todos los demás.
+for model in RESOURCES:
+    post_delete.connect(track_deleted, sender=model, dispatch_uid=f'track_deleted_{model.__name__}')
@@ -1,9 +1,25 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from unittest import skipUnless
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 from datetime import timedelta
 from decimal import Decimal
-from business.models import Customer, Order, Remission, Sale, CreditAssignment
+from business.jobs import JOBS, run_job
+from business.management.commands.bench import QUERY_BUDGETS
+from business.models import (
+    Customer, Order, Remission, Sale, CreditAssignment, DailySalesRollup, Job, day_range,
+    ArchivedRemission, ArchivedSale, ArchivedCreditAssignment, ImportCheckpoint
+)
 
 class BusinessLogicTest(TestCase):
     """
@@ -50,4 +66,590 @@ class BusinessLogicTest(TestCase):
         response = self.client.get(url, {'from': yesterday.date(), 'to': timezone.now().date()})
         
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(len(response.data), 2) 
\ No newline at end of file
+        self.assertEqual(len(response.data), 2) 
+
+class RemissionTotalsTest(TestCase):
+    """
+    Pruebas de los totales acumulados que mantiene cada remisión.
+    """
+    def setUp(self):
+        self.customer = Customer.objects.create(name="Test Client", is_active=True)
+        self.order = Order.objects.create(customer=self.customer, folio="ORD-001")
+        self.remission = Remission.objects.create(order=self.order, folio="REM-001", status='open')
+        cache.clear()
+
+    def test_totals_follow_sale_and_credit_changes(self):
+        sale = Sale.objects.create(remission=self.remission, subtotal=Decimal('100.00'), tax=Decimal('16.00'))
+        Sale.objects.create(remission=self.remission, subtotal=Decimal('50.00'), tax=Decimal('8.00'))
+        credit = CreditAssignment.objects.create(remission=self.remission, amount=Decimal('30.00'), reason="Credit")
+
+        sale.subtotal = Decimal('200.00')
+        sale.save()
+        credit.delete()
+
+        self.remission.refresh_from_db()
+        self.assertEqual(self.remission.sales_subtotal, Decimal('250.00'))
+        self.assertEqual(self.remission.sales_tax, Decimal('24.00'))
+        self.assertEqual(self.remission.sales_count, 2)
+        self.assertEqual(self.remission.credits_total, Decimal('0.00'))
+        self.assertFalse(Remission.objects.out_of_sync().exists())
+
+    def test_sale_moved_between_remissions(self):
+        other = Remission.objects.create(order=self.order, folio="REM-002", status='open')
+        sale = Sale.objects.create(remission=self.remission, subtotal=Decimal('100.00'), tax=Decimal('16.00'))
+
+        sale = Sale.objects.get(pk=sale.pk)
+        sale.remission = other
+        sale.save()
+
+        self.remission.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(self.remission.sales_count, 0)
+        self.assertEqual(other.total_sales, Decimal('116.00'))
+
+    def test_summary_and_close_read_single_row(self):
+        Sale.objects.create(remission=self.remission, subtotal=Decimal('100.00'), tax=Decimal('16.00'))
+        CreditAssignment.objects.create(remission=self.remission, amount=Decimal('20.00'), reason="Credit")
+
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/api/remissions/{self.remission.pk}/summary/')
+        self.assertEqual(response.data['total_sales'], Decimal('116.00'))
+        self.assertEqual(response.data['balance'], Decimal('96.00'))
+        self.assertEqual(response.data['sales_count'], 1)
+
+        self.remission.close()
+        self.remission.refresh_from_db()
+        self.assertEqual(self.remission.status, 'closed')
+
+    def test_summary_without_sales_keeps_integer_zeros(self):
+        response = self.client.get(f'/api/remissions/{self.remission.pk}/summary/')
+        self.assertEqual(response.content, b'{"total_sales":0,"total_credits":0,"balance":0,"sales_count":0}')
+
+    def test_rebuild_totals_repairs_drift(self):
+        Sale.objects.create(remission=self.remission, subtotal=Decimal('100.00'), tax=Decimal('16.00'))
+        Remission.objects.filter(pk=self.remission.pk).update(sales_count=5)
+        self.assertTrue(Remission.objects.out_of_sync().exists())
+
+        call_command('rebuild_totals', stdout=StringIO())
+
+        self.assertFalse(Remission.objects.out_of_sync().exists())
+
+    def test_incremental_totals_do_not_drift(self):
+        # SQLite suma los decimales como flotantes: sin redondear cada incremento, 30 ventas de
+        # 0.10 dejarían un subtotal de 3.0000000000000013 que out_of_sync reporta.
+        for _ in range(30):
+            Sale.objects.create(remission=self.remission, subtotal=Decimal('0.10'), tax=Decimal('0.07'))
+            CreditAssignment.objects.create(remission=self.remission, amount=Decimal('0.10'), reason="Credit")
+
+        self.assertFalse(Remission.objects.out_of_sync().exists())
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT sales_subtotal, sales_tax, credits_total FROM business_remission WHERE id = %s',
+                [self.remission.pk]
+            )
+            self.assertEqual(cursor.fetchone(), (3.0, 2.1, 3.0))
+
+    def test_bulk_close_reports_each_remission(self):
+        valid = Remission.objects.create(order=self.order, folio="REM-002", status='open')
+        Sale.objects.create(remission=valid, subtotal=Decimal('100.00'), tax=Decimal('16.00'))
+        over_credited = Remission.objects.create(order=self.order, folio="REM-003", status='open')
+        Sale.objects.create(remission=over_credited, subtotal=Decimal('10.00'), tax=Decimal('1.60'))
+        CreditAssignment.objects.create(remission=over_credited, amount=Decimal('50.00'), reason="Over credit")
+
+        response = self.client.post(
+            '/api/remissions/bulk-close/',
+            {'ids': [self.remission.pk, valid.pk, over_credited.pk, 9999]},
+            content_type='application/json'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        statuses = {result['id']: result['status'] for result in response.data['results']}
+        self.assertEqual(statuses, {
+            self.remission.pk: 'invalid',
+            valid.pk: 'closed',
+            over_credited.pk: 'invalid',
+            9999: 'not_found'
+        })
+        self.assertEqual(response.data['closed'], 1)
+        self.assertEqual(
+            list(Remission.objects.filter(status='closed').values_list('pk', flat=True)), [valid.pk]
+        )
+
+
+class DailySalesRollupTest(TestCase):
+    """
+    Pruebas del acumulado diario que respalda el reporte de ventas.
+    """
+    def setUp(self):
+        customer = Customer.objects.create(name="Test Client", is_active=True)
+        order = Order.objects.create(customer=customer, folio="ORD-001")
+        self.remission = Remission.objects.create(order=order, folio="REM-001", status='open')
+
+    def create_sale(self, subtotal, days_ago=0):
+        sale = Sale.objects.create(remission=self.remission, subtotal=Decimal(subtotal), tax=Decimal('1.00'))
+        if days_ago:
+            sale.created_at = timezone.now() - timedelta(days=days_ago)
+            sale.save()
+        return sale
+
+    def live_report(self, date_from, date_to):
+        return list(
+            Sale.objects.filter(created_at__date__range=[date_from, date_to])
+            .annotate(date=TruncDate('created_at'))
+            .values('date')
+            .annotate(total_sales=Sum('subtotal') + Sum('tax'), total_tax=Sum('tax'), sales_count=Count('id'))
+            .order_by('date')
+        )
+
+    def test_report_matches_live_aggregation(self):
+        self.create_sale('10.00')
+        self.create_sale('20.00', days_ago=1)
+        self.create_sale('30.00', days_ago=1)
+        moved = self.create_sale('40.00', days_ago=3)
+        self.create_sale('50.00', days_ago=5).delete()
+
+        moved.created_at = timezone.now() - timedelta(days=2)
+        moved.save()
+
+        date_from, date_to = (timezone.now() - timedelta(days=6)).date(), timezone.now().date()
+        response = self.client.get('/api/reports/daily-sales/', {'from': date_from, 'to': date_to})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, self.live_report(date_from, date_to))
+        self.assertEqual(len(response.data), 3)
+
+    def test_rebuild_command_restores_rollup(self):
+        self.create_sale('20.00', days_ago=1)
+        DailySalesRollup.objects.all().delete()
+
+        call_command('rebuild_daily_rollup', stdout=StringIO())
+
+        date_from, date_to = (timezone.now() - timedelta(days=2)).date(), timezone.now().date()
+        self.assertEqual(DailySalesRollup.objects.report(date_from, date_to), self.live_report(date_from, date_to))
+
+    def test_report_rejects_invalid_dates(self):
+        response = self.client.get('/api/reports/daily-sales/', {'from': '2024-13-01', 'to': '2024-12-31'})
+        self.assertEqual(response.status_code, 400)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Los planes esperados corresponden a SQLite')
+class QueryPlanTest(TestCase):
+    """
+    Verifica con EXPLAIN que las consultas del reporte y del cierre usan índices.
+    """
+    def test_daily_report_uses_created_at_index(self):
+        start, end = day_range(timezone.now().date(), timezone.now().date())
+        plan = (
+            Sale.objects.filter(created_at__gte=start, created_at__lt=end)
+            .annotate(date=TruncDate('created_at'))
+            .values('date')
+            .annotate(total=Sum('subtotal'), sales_count=Count('id'))
+            .explain()
+        )
+        self.assertIn('sale_created_idx', plan)
+
+    def test_close_queries_use_remission_indexes(self):
+        plan = Remission.objects.filter(pk=1).out_of_sync().explain()
+        self.assertIn('sale_remission_created_idx', plan)
+        self.assertIn('credit_remission_created_idx', plan)
+
+        plan = Remission.objects.filter(status='open').values_list('pk', flat=True).explain()
+        self.assertIn('remission_status_idx', plan)
+
+
+class SeedCommandTest(TestCase):
+    """
+    Pruebas del comando seed.
+    """
+    def test_seed_is_reproducible_and_keeps_totals_in_sync(self):
+        call_command(
+            'seed', customers=5, orders=30, seed=42, batch_size=7,
+            date_from='2025-01-01', date_to='2025-03-31', stdout=StringIO()
+        )
+
+        self.assertEqual(Order.objects.count(), 30)
+        self.assertFalse(Remission.objects.out_of_sync().exists())
+        rollup = list(DailySalesRollup.objects.order_by('date').values_list('date', 'subtotal', 'tax', 'sales_count'))
+        DailySalesRollup.objects.rebuild()
+        self.assertEqual(
+            rollup, list(DailySalesRollup.objects.order_by('date').values_list('date', 'subtotal', 'tax', 'sales_count'))
+        )
+
+        sales = list(Sale.objects.order_by('pk').values_list('subtotal', 'tax', 'created_at'))
+        Customer.objects.all().delete()
+        call_command(
+            'seed', customers=5, orders=30, seed=42, batch_size=7,
+            date_from='2025-01-01', date_to='2025-03-31', stdout=StringIO()
+        )
+        self.assertEqual(list(Sale.objects.order_by('pk').values_list('subtotal', 'tax', 'created_at')), sales)
+
+
+@override_settings(JOB_MAX_RUNNING=2, JOB_RETRY_DELAY=5, JOB_STALE_AFTER=300, JOB_BATCH_PAUSE=0)
+class JobQueueTest(TestCase):
+    """
+    Pruebas de la cola de trabajos en segundo plano y de los trabajos de negocio.
+    """
+    def setUp(self):
+        customer = Customer.objects.create(name="Test Client")
+        self.order = Order.objects.create(customer=customer, folio="ORD-001")
+        self.remissions = []
+        for index in range(5):
+            remission = Remission.objects.create(order=self.order, folio=f"REM-{index}")
+            if index != 4:
+                Sale.objects.create(remission=remission, subtotal=Decimal('100.00'), tax=Decimal('16.00'))
+            self.remissions.append(remission)
+
+    def test_claim_respects_order_and_running_limit(self):
+        first, second, third = (Job.objects.submit('rebuild_daily_rollup') for _ in range(3))
+        later = Job.objects.submit('rebuild_daily_rollup')
+        Job.objects.filter(pk=later.pk).update(run_after=timezone.now() + timedelta(minutes=1))
+
+        self.assertEqual(Job.objects.claim('w1').pk, first.pk)
+        claimed = Job.objects.claim('w2')
+        self.assertEqual((claimed.pk, claimed.status, claimed.attempts, claimed.worker), (second.pk, 'running', 1, 'w2'))
+        self.assertIsNone(Job.objects.claim('w1'))
+
+        run_job(claimed)
+        self.assertEqual(Job.objects.claim('w1').pk, third.pk)
+        run_job(Job.objects.get(pk=first.pk))
+        self.assertIsNone(Job.objects.claim('w1'))
+
+    def test_failed_jobs_are_retried_with_backoff(self):
+        calls = []
+
+        def flaky(job):
+            calls.append(job.attempts)
+            if len(calls) < 2:
+                raise RuntimeError('boom')
+            return {'ok': True}
+
+        JOBS['flaky'] = flaky
+        self.addCleanup(JOBS.pop, 'flaky')
+        job = Job.objects.submit('flaky')
+
+        with self.assertLogs('business.jobs', 'ERROR'):
+            self.assertFalse(run_job(Job.objects.claim('w1')))
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'queued')
+        self.assertIn('RuntimeError: boom', job.error)
+        self.assertGreater(job.run_after, timezone.now() + timedelta(seconds=4))
+        self.assertIsNone(Job.objects.claim('w1'))
+
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        self.assertTrue(run_job(Job.objects.claim('w1')))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.result, job.error, job.attempts), ('succeeded', {'ok': True}, '', 2))
+        self.assertEqual(calls, [1, 2])
+
+    def test_job_fails_after_max_attempts(self):
+        job = Job.objects.submit('unknown', max_attempts=3)
+        with self.assertLogs('business.jobs', 'ERROR'):
+            self.assertFalse(run_job(Job.objects.claim('w1')))
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertIn('Tipo de trabajo desconocido', job.error)
+        self.assertIsNotNone(job.finished_at)
+
+    def test_stale_jobs_are_requeued(self):
+        job = Job.objects.submit('rebuild_daily_rollup', max_attempts=2)
+        Job.objects.claim('w1')
+        Job.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - timedelta(minutes=10))
+
+        self.assertEqual(Job.objects.requeue_stale(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.worker), ('queued', ''))
+
+        Job.objects.claim('w2')
+        Job.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - timedelta(minutes=10))
+        Job.objects.requeue_stale()
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+
+    def test_close_remissions_job_reports_progress_and_failures(self):
+        self.remissions[0].close()
+        job = Job.objects.submit('close_remissions', {'order': self.order.pk, 'batch_size': 2})
+
+        self.assertTrue(run_job(Job.objects.claim('w1')))
+        job.refresh_from_db()
+        self.assertEqual((job.progress, job.progress_total), (4, 4))
+        self.assertEqual(job.result['closed'], 3)
+        self.assertEqual(job.result['failed'], 1)
+        self.assertEqual(job.result['failures'][0]['id'], self.remissions[4].pk)
+        self.assertEqual(Remission.objects.filter(status='open').count(), 1)
+
+    def test_rebuild_daily_rollup_job(self):
+        expected = list(DailySalesRollup.objects.order_by('date').values_list('date', 'subtotal', 'tax', 'sales_count'))
+        DailySalesRollup.objects.update(subtotal=0)
+        Sale.objects.filter(pk=Sale.objects.first().pk).update(created_at=timezone.now() - timedelta(days=70))
+
+        job = Job.objects.submit('rebuild_daily_rollup', {'days_per_batch': 31})
+        self.assertTrue(run_job(Job.objects.claim('w1')))
+        job.refresh_from_db()
+        self.assertEqual(job.result, {'days': 2})
+        self.assertEqual((job.progress, job.progress_total), (71, 71))
+        self.assertEqual(DailySalesRollup.objects.order_by('date').first().subtotal, Decimal('100.00'))
+        self.assertEqual(
+            sum(row[3] for row in expected),
+            DailySalesRollup.objects.aggregate(total=Sum('sales_count'))['total']
+        )
+
+
+@override_settings(JOB_BATCH_PAUSE=0)
+class ArchiveRemissionsTest(TestCase):
+    """
+    Pruebas del archivo de remisiones cerradas.
+    """
+    def setUp(self):
+        customer = Customer.objects.create(name="Test Client")
+        self.order = Order.objects.create(customer=customer, folio="ORD-001")
+        self.old = self.remission('REM-OLD', days_ago=40)
+        self.recent = self.remission('REM-RECENT', days_ago=5)
+        self.open = self.remission('REM-OPEN', days_ago=40, close=False)
+        self.late_credit = self.remission('REM-LATE', days_ago=40)
+        CreditAssignment.objects.create(remission=self.late_credit, amount=Decimal('1.00'), reason="Ajuste")
+
+    def remission(self, folio, days_ago, close=True):
+        created_at = timezone.now() - timedelta(days=days_ago)
+        remission = Remission.objects.create(order=self.order, folio=folio, created_at=created_at)
+        for subtotal in ('10.00', '20.00'):
+            Sale.objects.create(remission=remission, subtotal=Decimal(subtotal), tax=Decimal('1.60'), created_at=created_at)
+        CreditAssignment.objects.create(remission=remission, amount=Decimal('5.00'), reason="Credit", created_at=created_at)
+        if close:
+            remission.close()
+        return remission
+
+    def test_moves_only_old_closed_remissions(self):
+        out = StringIO()
+        call_command('archive_remissions', days=30, batch_size=1, stdout=out)
+
+        self.assertIn('Archived 1 remission(s).', out.getvalue())
+        self.assertFalse(Remission.objects.filter(pk=self.old.pk).exists())
+        self.assertFalse(Sale.objects.filter(remission_id=self.old.pk).exists())
+        self.assertEqual(
+            set(Remission.objects.values_list('pk', flat=True)), {self.recent.pk, self.open.pk, self.late_credit.pk}
+        )
+
+        archived = ArchivedRemission.objects.get(pk=self.old.pk)
+        self.assertEqual((archived.folio, archived.customer_id, archived.status), ('REM-OLD', self.order.customer_id, 'closed'))
+        self.assertEqual(archived.summary(), self.old.summary())
+        self.assertEqual(ArchivedSale.objects.filter(remission=archived).count(), 2)
+        self.assertEqual(ArchivedCreditAssignment.objects.get(remission=archived).amount, Decimal('5.00'))
+
+    def test_dry_run_and_validation(self):
+        out = StringIO()
+        call_command('archive_remissions', days=30, dry_run=True, stdout=out)
+        self.assertIn('1 remission(s) would be archived.', out.getvalue())
+        self.assertFalse(ArchivedRemission.objects.exists())
+
+        with self.assertRaises(CommandError):
+            call_command('archive_remissions', days=0, stdout=StringIO())
+
+    def test_rollup_keeps_archived_sales(self):
+        call_command('archive_remissions', days=30, stdout=StringIO())
+        expected = list(DailySalesRollup.objects.order_by('date').values_list('date', 'subtotal', 'tax', 'sales_count'))
+
+        DailySalesRollup.objects.all().delete()
+        run_job(Job.objects.submit('rebuild_daily_rollup'))
+
+        self.assertEqual(
+            list(DailySalesRollup.objects.order_by('date').values_list('date', 'subtotal', 'tax', 'sales_count')),
+            expected
+        )
+        self.assertEqual(sum(row[3] for row in expected), 8)
+
+
+@override_settings(JOB_BATCH_PAUSE=0)
+class ImportCommandTest(TestCase):
+    """
+    Pruebas del comando import.
+    """
+    HEADER = 'type,customer_email,customer_name,order,remission,subtotal,tax,amount,reason,created_at\n'
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.customer = Customer.objects.create(name="Existing", email="existing@example.com")
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w') as file:
+            file.write(content)
+        return path
+
+    def test_csv_import_resumes_after_a_failed_batch(self):
+        rows = (
+            'sale,existing@example.com,Existing,HORD-1,HREM-1,100.00,16.00,,,2023-03-01T10:00:00\n'
+            'sale,existing@example.com,Existing,HORD-1,HREM-1,50.00,8.00,,,2023-03-01T11:00:00\n'
+            'credit,existing@example.com,Existing,HORD-1,HREM-1,,,20.00,Ajuste,2023-03-02T09:00:00\n'
+            'sale,new@example.com,New Client,HORD-2,HREM-2,10.00,1.60,,,2023-03-02\n'
+        )
+        path = self.write('history.csv', self.HEADER + rows + 'sale,new@example.com,New Client,HORD-2,HREM-2,abc,,,,2023-03-03\n')
+
+        with self.assertRaisesMessage(CommandError, 'Line 6: subtotal is not a number: abc'):
+            call_command('import', path, batch_size=2, stdout=StringIO())
+        # Los dos primeros lotes quedaron confirmados; el tercero (con la fila inválida) no.
+        self.assertEqual(Sale.objects.count(), 3)
+        self.assertEqual(ImportCheckpoint.objects.get().rows, 4)
+
+        self.write('history.csv', self.HEADER + rows + 'sale,new@example.com,New Client,HORD-2,HREM-2,5.00,0.80,,,2023-03-03\n')
+        out = StringIO()
+        call_command('import', path, batch_size=2, stdout=out)
+        self.assertIn('Resuming after 4 row(s), at line 5.', out.getvalue())
+
+        self.assertEqual(Sale.objects.count(), 4)
+        self.assertEqual(CreditAssignment.objects.count(), 1)
+        self.assertFalse(Remission.objects.out_of_sync().exists())
+        first = Remission.objects.get(folio='HREM-1')
+        self.assertEqual(first.order.customer, self.customer)
+        self.assertEqual(first.status, 'closed')
+        self.assertEqual(first.balance, Decimal('154.00'))
+        self.assertEqual(
+            first.created_at, timezone.make_aware(timezone.datetime(2023, 3, 1, 10))
+        )
+        self.assertEqual(Remission.objects.get(folio='HREM-2').order.customer.email, 'new@example.com')
+
+        rollup = list(DailySalesRollup.objects.order_by('date').values_list('date', 'subtotal', 'tax', 'sales_count'))
+        DailySalesRollup.objects.rebuild()
+        self.assertEqual(
+            rollup, list(DailySalesRollup.objects.order_by('date').values_list('date', 'subtotal', 'tax', 'sales_count'))
+        )
+        with self.assertRaisesMessage(CommandError, 'already imported'):
+            call_command('import', path, stdout=StringIO())
+
+    def test_ndjson_import_adds_to_existing_remissions(self):
+        order = Order.objects.create(customer=self.customer, folio="ORD-001")
+        remission = Remission.objects.create(order=order, folio="REM-001")
+        Sale.objects.create(remission=remission, subtotal=Decimal('10.00'), tax=Decimal('1.60'))
+        rows = [
+            {'type': 'sale', 'order': 'ORD-001', 'remission': 'REM-001', 'subtotal': '20.00', 'tax': '3.20',
+             'created_at': '2024-01-05T12:00:00Z'},
+            {'type': 'credit', 'order': 'ORD-001', 'remission': 'REM-001', 'amount': 5, 'reason': 'Ajuste',
+             'created_at': '2024-01-06T12:00:00Z'},
+        ]
+        path = self.write('history.ndjson', ''.join(json.dumps(row) + '\n' for row in rows))
+
+        call_command('import', path, stdout=StringIO())
+
+        remission.refresh_from_db()
+        self.assertEqual((remission.sales_count, remission.credits_total), (2, Decimal('5.00')))
+        self.assertEqual(remission.status, 'open')
+        self.assertFalse(Remission.objects.out_of_sync().exists())
+
+        ArchivedRemission.objects.create(
+            id=999, order=order, customer=self.customer, folio='REM-OLD', status='closed',
+            created_at=timezone.now(), archived_at=timezone.now(), sales_subtotal=Decimal('0.00'),
+            sales_tax=Decimal('0.00'), sales_count=0, credits_total=Decimal('0.00')
+        )
+        path = self.write('archived.ndjson', json.dumps({**rows[0], 'remission': 'REM-OLD'}) + '\n')
+        with self.assertRaisesMessage(CommandError, 'Line 1: remission REM-OLD is archived'):
+            call_command('import', path, stdout=StringIO())
+
+    def test_closed_remissions_need_allow_closed(self):
+        order = Order.objects.create(customer=self.customer, folio="ORD-001")
+        remission = Remission.objects.create(order=order, folio="REM-001", status='closed')
+        row = {'type': 'sale', 'order': 'ORD-001', 'remission': 'REM-001', 'subtotal': '20.00', 'tax': '3.20',
+               'created_at': '2024-01-05T12:00:00Z'}
+        path = self.write('closed.ndjson', json.dumps(row) + '\n')
+
+        with self.assertRaisesMessage(CommandError, 'Line 1: remission REM-001 is closed; use --allow-closed'):
+            call_command('import', path, stdout=StringIO())
+        self.assertFalse(Sale.objects.exists())
+
+        call_command('import', path, allow_closed=True, stdout=StringIO())
+        remission.refresh_from_db()
+        self.assertEqual((remission.sales_count, remission.total_sales), (1, Decimal('23.20')))
+
+
+class RunJobsCommandTest(TransactionTestCase):
+    """
+    Pruebas del worker run_jobs.
+    """
+    def test_burst_runs_queued_jobs_in_threads(self):
+        customer = Customer.objects.create(name="Test Client")
+        order = Order.objects.create(customer=customer, folio="ORD-001")
+        for index in range(3):
+            remission = Remission.objects.create(order=order, folio=f"REM-{index}")
+            Sale.objects.create(remission=remission, subtotal=Decimal('10.00'), tax=Decimal('1.60'))
+        close = Job.objects.submit('close_remissions', {'order': order.pk})
+        rebuild = Job.objects.submit('rebuild_daily_rollup')
+
+        out = StringIO()
+        call_command('run_jobs', burst=True, concurrency=2, poll_interval=0.01, stdout=out)
+
+        self.assertEqual(set(Job.objects.values_list('status', flat=True)), {'succeeded'})
+        self.assertEqual(Job.objects.get(pk=close.pk).result['closed'], 3)
+        self.assertIn(f'Job {rebuild.pk} done.', out.getvalue())
+        self.assertFalse(Remission.objects.filter(status='open').exists())
+
+
+class BenchCommandTest(TransactionTestCase):
+    """
+    Pruebas del comando bench.
+    """
+    def test_runs_more_times_than_open_remissions(self):
+        # El conjunto de 5 órdenes tiene 5 remisiones: remission_close las reabre al agotarlas.
+        output = os.path.join(tempfile.mkdtemp(), 'bench.json')
+        out = StringIO()
+        call_command('bench', sizes='5', repeat=8, output=output, stdout=out)
+
+        with open(output) as output_file:
+            report = json.load(output_file)
+        results = report['results']['5']
+        self.assertEqual(set(results), set(QUERY_BUDGETS))
+        self.assertEqual(results['remission_close']['runs'], 8)
+        for name, result in results.items():
+            self.assertLessEqual(result['queries'], QUERY_BUDGETS[name])
+        self.assertIn('Benchmark completed within budgets.', out.getvalue())
+
+
+class LoadTestCommandTest(TransactionTestCase):
+    """
+    Pruebas del comando loadtest.
+    """
+    def test_reports_traffic_mix_for_in_process_targets(self):
+        customer = Customer.objects.create(name="Test Client")
+        order = Order.objects.create(customer=customer, folio="ORD-001")
+        for index in range(5):
+            Remission.objects.create(order=order, folio=f"REM-{index}")
+
+        for target in ('asgi', 'wsgi'):
+            out = StringIO()
+            call_command(
+                'loadtest', target=target, concurrency=2, duration=0.3, interval=0.1,
+                mix='sale_write=1,summary=1', stdout=out
+            )
+            report = json.loads(out.getvalue())
+
+            self.assertEqual(report['target'], target)
+            self.assertGreater(report['overall']['requests'], 0)
+            self.assertEqual(report['overall']['errors'], 0)
+            self.assertEqual(set(report['operations']), {'sale_write', 'summary'})
+            self.assertEqual(
+                set(report['overall']['latency_ms']), {'mean', 'p50', 'p95', 'p99', 'max'}
+            )
+            self.assertTrue(report['timeseries'])
+            self.assertEqual(
+                sum(bucket['requests'] for bucket in report['timeseries']), report['overall']['requests']
+            )
+        self.assertEqual(
+            Sale.objects.count(), Remission.objects.aggregate(total=Sum('sales_count'))['total']
+        )
+
+    def test_rejects_unknown_operations_and_empty_database(self):
+        with self.assertRaisesMessage(CommandError, 'Unknown operation'):
+            call_command('loadtest', mix='delete_everything=1', stdout=StringIO())
+        with self.assertRaisesMessage(CommandError, 'There are no remissions'):
+            call_command('loadtest', duration=0.1, stdout=StringIO())
+
+    def test_output_without_requests(self):
+        # Sólo cierres y ninguna remisión abierta: no se envía ninguna petición.
+        customer = Customer.objects.create(name="Test Client")
+        order = Order.objects.create(customer=customer, folio="ORD-001")
+        Remission.objects.create(order=order, folio="REM-001", status='closed')
+        output = os.path.join(tempfile.mkdtemp(), 'loadtest.json')
+
+        with self.assertRaisesMessage(CommandError, 'No requests were sent'):
+            call_command('loadtest', duration=0.1, mix='close=1', output=output, stdout=StringIO())
+        with open(output) as output_file:
+            self.assertEqual(json.load(output_file)['overall']['requests'], 0)
@@ -0,0 +1,197 @@
+"""
+Métricas por endpoint en formato de texto de Prometheus.
+
+MetricsMiddleware registra, por ruta y método, la latencia de cada petición (histograma),
+el número de consultas SQL, el tiempo en base de datos y el tamaño de la respuesta.
+Las consultas se cuentan con connection.execute_wrapper, por lo que no depende de DEBUG.
+Las métricas viven en memoria de cada proceso y se exponen con metrics_view.
+"""
+import logging
+import time
+from bisect import bisect_left
+from contextlib import ExitStack, contextmanager
+from threading import Lock
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class RouteMetrics:
+    __slots__ = ('buckets', 'count', 'duration', 'queries', 'db_duration', 'response_bytes', 'statuses')
+
+    def __init__(self):
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.count = 0
+        self.duration = 0.0
+        self.queries = 0
+        self.db_duration = 0.0
+        self.response_bytes = 0
+        self.statuses = {}
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.lock = Lock()
+        self.routes = {}
+
+    def observe(self, route, method, status, duration, queries, db_duration, response_bytes):
+        with self.lock:
+            metrics = self.routes.get((route, method))
+            if metrics is None:
+                metrics = self.routes[(route, method)] = RouteMetrics()
+
+            bucket = bisect_left(LATENCY_BUCKETS, duration)
+            if bucket < len(LATENCY_BUCKETS):
+                metrics.buckets[bucket] += 1
+            metrics.count += 1
+            metrics.duration += duration
+            metrics.queries += queries
+            metrics.db_duration += db_duration
+            metrics.response_bytes += response_bytes
+            metrics.statuses[status] = metrics.statuses.get(status, 0) + 1
+
+    def reset(self):
+        with self.lock:
+            self.routes = {}
+
+    def render(self):
+        """
+        Exposición en formato de texto de Prometheus (versión 0.0.4).
+        """
+        with self.lock:
+            routes = sorted(self.routes.items())
+            lines = [
+                '# HELP http_request_duration_seconds Request latency by route and method.',
+                '# TYPE http_request_duration_seconds histogram',
+            ]
+            for (route, method), metrics in routes:
+                labels = f'route="{escape(route)}",method="{method}"'
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS, metrics.buckets):
+                    cumulative += count
+                    lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {metrics.count}')
+                lines.append(f'http_request_duration_seconds_sum{{{labels}}} {metrics.duration}')
+                lines.append(f'http_request_duration_seconds_count{{{labels}}} {metrics.count}')
+
+            for name, help_text, attribute in (
+                ('http_requests_db_queries_total', 'SQL queries executed by route and method.', 'queries'),
+                ('http_requests_db_duration_seconds_total', 'Time spent in SQL by route and method.', 'db_duration'),
+                ('http_response_size_bytes_total', 'Response bytes by route and method.', 'response_bytes'),
+            ):
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} counter')
+                for (route, method), metrics in routes:
+                    value = getattr(metrics, attribute)
+                    lines.append(f'{name}{{route="{escape(route)}",method="{method}"}} {value}')
+
+            lines.append('# HELP http_requests_total Requests by route, method and status code.')
+            lines.append('# TYPE http_requests_total counter')
+            for (route, method), metrics in routes:
+                for status, count in sorted(metrics.statuses.items()):
+                    lines.append(
+                        f'http_requests_total{{route="{escape(route)}",method="{method}",status="{status}"}} {count}'
+                    )
+        return '\n'.join(lines) + '\n'
+
+
+def escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registry = MetricsRegistry()
+
+
+class QueryCounter:
+    """
+    Envoltura de ejecución que cuenta las consultas y su duración.
+    """
+    def __init__(self):
+        self.queries = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.queries += 1
+
+
+class MetricsMiddleware:
+    """
+    Registra latencia, consultas SQL, tiempo en base de datos y tamaño de respuesta
+    por ruta y método. Las peticiones que superan METRICS_SLOW_REQUEST_MS se registran
+    en el log 'core.metrics'.
+
+    Soporta peticiones síncronas y asíncronas, así que bajo ASGI las vistas asíncronas
+    no se ejecutan en un hilo aparte por causa del middleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slow_request_seconds = getattr(settings, 'METRICS_SLOW_REQUEST_MS', 1000) / 1000
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        counter = QueryCounter()
+        started = time.perf_counter()
+        with count_queries(counter):
+            response = self.get_response(request)
+        self.record(request, response, counter, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        counter = QueryCounter()
+        started = time.perf_counter()
+        with count_queries(counter):
+            response = await self.get_response(request)
+        self.record(request, response, counter, time.perf_counter() - started)
+        return response
+
+    def record(self, request, response, counter, duration):
+        match = request.resolver_match
+        route = match.view_name if match and match.view_name else 'unmatched'
+        response_bytes = 0 if response.streaming else len(response.content)
+
+        registry.observe(
+            route, request.method, response.status_code, duration,
+            counter.queries, counter.duration, response_bytes
+        )
+
+        if duration >= self.slow_request_seconds:
+            logger.warning(
+                'Slow request: %s %s (%s) took %.1fms, %d queries, %.1fms in DB',
+                request.method, request.path, route, duration * 1000, counter.queries, counter.duration * 1000
+            )
+
+
+@contextmanager
+def count_queries(counter):
+    """
+    Instala el contador en todas las conexiones mientras se atiende la petición.
+    """
+    with ExitStack() as stack:
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(counter))
+        yield
+
+
+def metrics_view(request):
+    allowed_ips = getattr(settings, 'METRICS_ALLOWED_IPS', None)
+    if allowed_ips is not None and request.META.get('REMOTE_ADDR') not in allowed_ips:
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,232 @@
+"""
+Perfilado de peticiones bajo demanda.
+
+ProfilingMiddleware captura una petición cuando trae el encabezado PROFILING_HEADER (sólo
+usuarios staff si PROFILING_STAFF_ONLY) o cuando cae en la muestra de PROFILING_SAMPLE_RATE.
+Cada captura guarda en PROFILING_DIR dos archivos con el mismo id:
+
+* <id>.json: la petición, su duración, cada sentencia SQL con sus parámetros, duración y
+  plan (EXPLAIN), el tiempo en serializers y renderers, y las funciones con más tiempo
+  acumulado.
+* <id>.prof: las estadísticas completas de cProfile, para abrirlas con pstats o snakeviz.
+
+El id se regresa en el encabezado X-Profile-Id y las capturas se consultan con el comando
+profiles. Con PROFILING_ENABLED en False el middleware se retira al iniciar y no tiene costo.
+"""
+import cProfile
+import json
+import os
+import pstats
+import random
+import sys
+import time
+import uuid
+from contextlib import ExitStack
+from asgiref.sync import async_to_sync, iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DatabaseError, connections
+from django.utils import timezone
+
+# Funciones del perfil que se guardan en el JSON (el .prof tiene todas).
+TOP_FUNCTIONS = 40
+
+# Archivos cuyo código cuenta como serialización o como generación de la respuesta. Su tiempo
+# es el acumulado desde fuera de esos archivos, para no contar dos veces las llamadas anidadas.
+SERIALIZER_FILES = (
+    os.path.join('rest_framework', 'serializers.py'),
+    os.path.join('api', 'rows.py'),
+)
+RENDERER_FILES = (
+    os.path.join('rest_framework', 'renderers.py'),
+    os.path.join('api', 'renderers.py'),
+)
+
+
+class QueryRecorder:
+    """
+    Envoltura de ejecución que guarda cada sentencia con sus parámetros y duración.
+    """
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.statements.append({
+                'alias': context['connection'].alias,
+                'sql': sql,
+                'params': None if many else params,
+                'many': many,
+                'duration_ms': (time.perf_counter() - started) * 1000,
+            })
+
+
+class ProfilingMiddleware:
+    """
+    Perfila las peticiones elegidas y escribe la captura en PROFILING_DIR.
+
+    Va después de AuthenticationMiddleware para saber si el usuario es staff. Bajo ASGI una
+    petición perfilada se atiende en un hilo (las vistas síncronas vuelven a ese hilo), así
+    que el perfil cubre las vistas de DRF; de las vistas asíncronas sólo se ve su duración.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PROFILING_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.header = getattr(settings, 'PROFILING_HEADER', 'X-Profile')
+        self.staff_only = getattr(settings, 'PROFILING_STAFF_ONLY', True)
+        self.sample_rate = getattr(settings, 'PROFILING_SAMPLE_RATE', 0)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        trigger = self.trigger(request, lambda: request.user)
+        if trigger is None:
+            return self.get_response(request)
+        return self.capture(request, trigger, self.get_response)
+
+    async def __acall__(self, request):
+        user = None
+        if self.header_requested(request) and self.staff_only:
+            user = await request.auser()
+        trigger = self.trigger(request, lambda: user)
+        if trigger is None:
+            return await self.get_response(request)
+        return await sync_to_async(self.capture)(request, trigger, async_to_sync(self.get_response))
+
+    def header_requested(self, request):
+        return request.headers.get(self.header, '').lower() in ('1', 'true', 'yes')
+
+    def trigger(self, request, get_user):
+        """
+        Motivo de la captura ('header' o 'sample'), o None si la petición no se perfila.
+        """
+        if self.header_requested(request):
+            if not self.staff_only or get_user().is_staff:
+                return 'header'
+        if self.sample_rate and random.random() < self.sample_rate:
+            return 'sample'
+        return None
+
+    def capture(self, request, trigger, get_response):
+        recorder = QueryRecorder()
+        profile = cProfile.Profile()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(recorder))
+            profile.enable()
+            try:
+                response = get_response(request)
+            finally:
+                profile.disable()
+        duration = time.perf_counter() - started
+
+        capture_id = f"{timezone.now().strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        write_capture(capture_id, request, response, trigger, duration, recorder.statements, profile)
+        response['X-Profile-Id'] = capture_id
+        return response
+
+
+def write_capture(capture_id, request, response, trigger, duration, statements, profile):
+    directory = settings.PROFILING_DIR
+    os.makedirs(directory, exist_ok=True)
+    profile.dump_stats(os.path.join(directory, f'{capture_id}.prof'))
+
+    stats = pstats.Stats(profile)
+    match = request.resolver_match
+    capture = {
+        'id': capture_id,
+        'created_at': timezone.now().isoformat(),
+        'trigger': trigger,
+        'method': request.method,
+        'path': request.path,
+        'query_string': request.META.get('QUERY_STRING', ''),
+        'view': match.view_name if match and match.view_name else None,
+        'status': response.status_code,
+        'duration_ms': duration * 1000,
+        'sql': {
+            'count': len(statements),
+            'duration_ms': sum(statement['duration_ms'] for statement in statements),
+            'statements': explain(statements),
+        },
+        'serializer_ms': phase_time(stats, SERIALIZER_FILES),
+        'render_ms': phase_time(stats, RENDERER_FILES),
+        'functions': top_functions(stats),
+    }
+    with open(os.path.join(directory, f'{capture_id}.json'), 'w') as capture_file:
+        json.dump(capture, capture_file, indent=2, default=str)
+
+
+def explain(statements):
+    """
+    Agrega a cada SELECT su plan. Se calcula una vez por sentencia y parámetros, después de
+    la respuesta, para no sumar su costo al tiempo medido.
+    """
+    plans = {}
+    for statement in statements:
+        if statement['many'] or not statement['sql'].lstrip().upper().startswith('SELECT'):
+            continue
+        key = (statement['alias'], statement['sql'], repr(statement['params']))
+        if key not in plans:
+            connection = connections[statement['alias']]
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute(f"{connection.ops.explain_query_prefix()} {statement['sql']}", statement['params'])
+                    plans[key] = [str(row[-1]) for row in cursor.fetchall()]
+            except DatabaseError as error:
+                plans[key] = [f'EXPLAIN failed: {error}']
+        statement['explain'] = plans[key]
+    return statements
+
+
+def phase_time(stats, files):
+    """
+    Milisegundos dentro del código de files, sumando sólo las llamadas que entran desde fuera.
+    """
+    def inside(function):
+        return function[0].endswith(files)
+
+    total = 0.0
+    for function, (_, _, _, _, callers) in stats.stats.items():
+        if inside(function):
+            total += sum(caller[3] for source, caller in callers.items() if not inside(source))
+    return total * 1000
+
+
+def top_functions(stats):
+    stats.sort_stats('cumulative')
+    functions = []
+    for function in stats.fcn_list[:TOP_FUNCTIONS]:
+        _, calls, own_time, cumulative_time, _ = stats.stats[function]
+        functions.append({
+            'function': describe(function),
+            'calls': calls,
+            'own_ms': own_time * 1000,
+            'cumulative_ms': cumulative_time * 1000,
+        })
+    return functions
+
+
+def describe(function):
+    """
+    archivo:línea(función), con la ruta relativa al proyecto o a site-packages.
+    """
+    filename, line, name = function
+    if filename == '~':
+        return name
+    for root in (str(settings.BASE_DIR), *(path for path in sys.path if path.endswith('site-packages'))):
+        if filename.startswith(root + os.sep):
+            filename = filename[len(root) + 1:]
+            break
+    return f'{filename}:{line}({name})'
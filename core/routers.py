@@ -0,0 +1,36 @@
+"""
+Ruteo entre la base de datos principal y el alias de lectura.
+
+Las escrituras (y por lo tanto el cierre de remisiones, que bloquea y actualiza la fila)
+siempre van a la principal. Las lecturas también, salvo las que se piden explícitamente
+con .using(read_alias()): reportes, exportaciones y resúmenes en lote, que toleran el
+retraso de una réplica. El resumen de una remisión se lee de la principal porque se guarda
+en caché, donde un valor atrasado sobreviviría a la invalidación.
+"""
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+READ_ALIAS = 'replica'
+
+
+def read_alias():
+    """
+    Alias para lecturas de reportes y resúmenes: la réplica si está configurada, si no la principal.
+    """
+    return READ_ALIAS if READ_ALIAS in settings.DATABASES else DEFAULT_DB_ALIAS
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return None
+
+    def db_for_write(self, model, **hints):
+        # También para instancias leídas de la réplica, que de otro modo se guardarían en ella.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return {obj1._state.db, obj2._state.db} <= {DEFAULT_DB_ALIAS, READ_ALIAS}
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # La réplica recibe el esquema de la principal, no se migra por separado.
+        return db != READ_ALIAS
@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+import tempfile
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -43,11 +45,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.profiling.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -75,13 +79,98 @@ WSGI_APPLICATION = 'core.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Tuning is read from environment variables so production can adjust it without code changes.
+# The pragmas run on every new connection: WAL lets readers work while a writer commits,
+# busy_timeout makes writers wait for the lock instead of failing with "database is locked",
+# and IMMEDIATE transactions take the write lock up front so they do not deadlock on upgrade.
+SQLITE_PRAGMAS = {
+    'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+    'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+    'cache_size': int(os.environ.get('SQLITE_CACHE_SIZE', -20000)),  # Negative values are KiB.
+    'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+    'temp_store': 'MEMORY',
+}
+
+SQLITE_OPTIONS = {
+    'timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000)) / 1000,
+    'transaction_mode': os.environ.get('SQLITE_TRANSACTION_MODE', 'IMMEDIATE'),
+    'init_command': ';'.join(f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items()),
+}
+
+# Seconds a connection is reused across requests (0 closes it after each request, None keeps it open).
+# Under ASGI, set DB_CONN_MAX_AGE=0: async requests do not share threads, so connections are not reused.
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', 60))
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': SQLITE_OPTIONS,
+        # The whole test suite runs on a file database, not Django's default in-memory one. Several
+        # tests write from more than one connection at once (the run_jobs worker and its job
+        # threads, loadtest clients, async views). Connections to a shared-cache in-memory
+        # database ignore busy_timeout and fail at once with "database table is locked", so those
+        # tests failed intermittently for a reason production never sees. On a file, WAL and
+        # busy_timeout behave as in production. The name is per process so a -wal file left by a
+        # thread's connection is never reused. Set DB_TEST_NAME to place it elsewhere.
+        'TEST': {'NAME': os.environ.get(
+            'DB_TEST_NAME', os.path.join(tempfile.gettempdir(), f'certiffy_test_{os.getpid()}.sqlite3')
+        )},
+    },
+}
+
+# Optional read replica for reports, exports and summaries (see core/routers.py), for example
+# a copy of the SQLite file kept in sync with Litestream. Without it every read uses 'default'.
+if os.environ.get('DB_REPLICA_NAME'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.environ['DB_REPLICA_NAME'],
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['core.routers.PrimaryReplicaRouter']
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Local memory is per process; point 'default' (or SUMMARY_CACHE_ALIAS) to a shared backend
+# such as Redis or Memcached when running several workers.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'certiffy',
     }
 }
 
+# Remission summaries (see business/cache.py).
+SUMMARY_CACHE_ALIAS = 'default'
+
+SUMMARY_CACHE_TIMEOUT = 300
+
+
+# Background jobs
+# Stored in the database and executed by `python manage.py run_jobs` (see business/jobs.py).
+
+# Maximum jobs running at once across every worker process.
+JOB_MAX_RUNNING = int(os.environ.get('JOB_MAX_RUNNING', 2))
+
+# Attempts before a failing job is marked as failed; retries wait JOB_RETRY_DELAY * 2 ** attempt seconds.
+JOB_MAX_ATTEMPTS = 3
+JOB_RETRY_DELAY = 5
+
+# A running job whose worker stopped sending heartbeats for this long is queued again.
+JOB_STALE_AFTER = 300
+
+# Pause between the write batches of a job so other writers (API requests, workers) get the
+# SQLite write lock instead of waiting out their busy timeout.
+JOB_BATCH_PAUSE = 0.05
+
+# Directory for files produced by export jobs.
+JOB_RESULTS_DIR = os.environ.get('JOB_RESULTS_DIR', BASE_DIR / 'job_results')
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -125,6 +214,35 @@ STATIC_URL = 'static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
 }
+
+# Metrics
+# Per-route latency and SQL metrics exposed at /metrics (see core/metrics.py).
+
+METRICS_SLOW_REQUEST_MS = 1000
+
+# None allows any client; set a list of IPs to restrict the metrics endpoint.
+METRICS_ALLOWED_IPS = None
+
+
+# Profiling
+# Opt-in captures of single requests: cProfile stats, every SQL statement with its EXPLAIN plan
+# and serializer time, written to PROFILING_DIR (see core/profiling.py and `manage.py profiles`).
+
+# Master switch; when off the middleware is removed at startup.
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', '') == '1'
+
+# A request sent with this header set to 1 is profiled; with PROFILING_STAFF_ONLY only staff users may ask.
+PROFILING_HEADER = 'X-Profile'
+PROFILING_STAFF_ONLY = True
+
+# Fraction of all requests profiled without the header (0 disables sampling).
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', 0))
+
+PROFILING_DIR = os.environ.get('PROFILING_DIR', BASE_DIR / 'profiles')